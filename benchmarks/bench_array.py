@@ -0,0 +1,67 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Benchmarks for storing many numbers in one property as :class:`~odml2.ValueArray` compared
+to one sub section with a single value per number.
+
+Run with ``python benchmarks/bench_array.py [number of elements]``.
+"""
+
+from __future__ import print_function
+
+import io
+import sys
+import timeit
+import tracemalloc
+
+import numpy
+
+from odml2 import Document, SB, ValueArray
+
+
+def build_sections(spikes):
+    doc = Document()
+    doc.root = SB("Recording")
+    doc.root.extend_from_records("spikes", "Spike", {"time": spikes})
+    return doc
+
+
+def build_array(spikes):
+    doc = Document()
+    doc.root = SB("Recording")
+    doc.root["spikes"] = ValueArray(spikes, "s")
+    return doc
+
+
+def measure(build, spikes):
+    tracemalloc.start()
+    doc = build(spikes)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    create = min(timeit.repeat(lambda: build(spikes), number=1, repeat=3))
+    f = io.StringIO()
+    save = timeit.timeit(lambda: doc.save(f), number=1)
+    text = f.getvalue()
+    load = timeit.timeit(lambda: Document().load(io.StringIO(text)), number=1)
+    return create, save, load, size, len(text)
+
+
+def main(size):
+    spikes = numpy.cumsum(numpy.random.exponential(0.01, size))
+    print("%12s %12s %12s %12s %12s %12s" % ("layout", "create [s]", "save [s]", "load [s]", "memory [MB]",
+                                             "file [MB]"))
+    for name, build in (("sections", build_sections), ("array", build_array)):
+        create, save, load, memory, file_size = measure(build, spikes)
+        print("%12s %12.3f %12.3f %12.3f %12.1f %12.1f" % (name, create, save, load, memory / 1e6, file_size / 1e6))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
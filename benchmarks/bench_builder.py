@@ -0,0 +1,114 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Benchmarks for creating section trees from builders, in one batch with :meth:`SB.build`
+compared to setting one property after another, and for creating sections from records
+with :meth:`Section.extend_from_records` compared to one builder per record.
+
+Run with ``python benchmarks/bench_builder.py [number of sections]``.
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from odml2 import Document, SB, Value
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+GROUP_SIZE = 100
+
+
+def make_builder(size):
+    sessions = []
+    for i in range(size // GROUP_SIZE):
+        trials = [SB("Trial", label="trial %d" % j, index=j, duration=Value(1.5, "s", 0.01), valid=True)
+                  for j in range(GROUP_SIZE - 1)]
+        sessions.append(SB("Session", label="session %d" % i, trials=trials))
+    return SB("Experiment", sessions=sessions)
+
+
+def set_properties(section, builder):
+    """
+    Build a section like before bulk building: one property and one sub section at a time.
+    """
+    for p, thing in builder.properties.items():
+        if isinstance(thing, list):
+            for sub in thing:
+                set_properties(section._create_subsection(p, sub.type, sub.uuid, sub.label, sub.reference), sub)
+        else:
+            section[p] = thing
+
+
+def build_incremental(builder):
+    doc = Document()
+    root = doc.create_root(builder.type, builder.uuid, builder.label, builder.reference)
+    set_properties(root, builder)
+    return doc
+
+
+def build_bulk(builder):
+    doc = Document()
+    doc.root = builder
+    return doc
+
+
+def make_records(size):
+    columns = {"index": list(range(size)), "duration": [0.001 * i for i in range(size)],
+               "valid": [i % 2 == 0 for i in range(size)]}
+    if numpy is None:
+        return columns
+    records = numpy.zeros(size, dtype=[("index", "i8"), ("duration", "f8"), ("valid", "?")])
+    for name, column in columns.items():
+        records[name] = column
+    return records
+
+
+def build_from_builders(records):
+    doc = Document()
+    doc.root = SB("Session")
+    names = records.dtype.names if numpy is not None else list(records)
+    columns = [records[name].tolist() if numpy is not None else records[name] for name in names]
+    doc.root["trials"] = [SB("Trial", **dict(zip(names, row))) for row in zip(*columns)]
+    return doc
+
+
+def build_from_records(records):
+    doc = Document()
+    doc.root = SB("Session")
+    doc.root.extend_from_records("trials", "Trial", records)
+    return doc
+
+
+def main(size):
+    builder = make_builder(size)
+    print("%12s %18s %12s" % ("sections", "incremental [s]", "bulk [s]"))
+    incremental = min(timeit.repeat(lambda: build_incremental(builder), number=1, repeat=3))
+    bulk = min(timeit.repeat(lambda: build_bulk(builder), number=1, repeat=3))
+    print("%12d %18.3f %12.3f" % (size, incremental, bulk))
+    print("speedup: %.1fx" % (incremental / bulk))
+
+    records = make_records(size)
+    print()
+    print("%12s %18s %12s" % ("records", "builders [s]", "records [s]"))
+    builders = min(timeit.repeat(lambda: build_from_builders(records), number=1, repeat=3))
+    from_records = min(timeit.repeat(lambda: build_from_records(records), number=1, repeat=3))
+    print("%12d %18.3f %12.3f" % (size, builders, from_records))
+    print("speedup: %.1fx" % (builders / from_records))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
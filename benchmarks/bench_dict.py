@@ -0,0 +1,67 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Benchmarks for to_dict and from_dict with deep and wide section trees.
+
+Run with ``python benchmarks/bench_dict.py [number of sections]``.
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+from uuid import uuid4
+
+from odml2 import Value
+from odml2.api.yml import YamlDocument
+
+
+def build_deep(size):
+    """
+    A chain of sections where each section has exactly one sub section.
+    """
+    doc = YamlDocument()
+    parent = str(uuid4())
+    doc.create_root("Electrode", parent, None, None)
+    for i in range(size - 1):
+        uuid = str(uuid4())
+        doc.sections.add("Channel", uuid, None, None, parent, "child")
+        doc.sections[uuid].value_properties.set("index", Value(i))
+        parent = uuid
+    return doc
+
+
+def build_wide(size):
+    """
+    A root section with all other sections as direct sub sections.
+    """
+    doc = YamlDocument()
+    root = str(uuid4())
+    doc.create_root("Session", root, None, None)
+    for i in range(size - 1):
+        uuid = str(uuid4())
+        doc.sections.add("Trial", uuid, None, None, root, "trials")
+        doc.sections[uuid].value_properties.set("index", Value(i))
+    return doc
+
+
+def main(size):
+    print("%8s %10s %14s %16s" % ("tree", "sections", "to_dict [s]", "from_dict [s]"))
+    for name, build in (("deep", build_deep), ("wide", build_wide)):
+        doc = build(size)
+        data = doc.to_dict()
+        to_dict = timeit.timeit(doc.to_dict, number=1)
+        from_dict = timeit.timeit(lambda: YamlDocument().from_dict(data), number=1)
+        print("%8s %10d %14.3f %16.3f" % (name, size, to_dict, from_dict))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
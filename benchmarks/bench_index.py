@@ -0,0 +1,81 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Benchmarks for range, equality and top-k queries with a value index compared to
+scanning all sections of a document.
+
+Run with ``python benchmarks/bench_index.py [number of sections]``.
+"""
+
+from __future__ import print_function
+
+import sys
+import random
+import timeit
+from uuid import uuid4
+
+from odml2 import Document, Value
+
+
+def build(size):
+    """
+    A document with trials having a random duration between 0 and 100 s.
+    """
+    doc = Document()
+    back_end = doc.back_end
+    root = str(uuid4())
+    back_end.create_root("Session", root, None, None)
+    for i in range(size - 1):
+        uuid = str(uuid4())
+        back_end.sections.add("Trial", uuid, None, None, root, "trials")
+        back_end.sections[uuid].value_properties.set("duration", Value(random.uniform(0, 100), "s"))
+    return doc
+
+
+def scan_range(doc, minimum, maximum):
+    found = []
+    for sec in doc.iter_sections():
+        if sec.type == "Trial":
+            duration = sec.get("duration")
+            if duration is not None and minimum <= duration.value <= maximum:
+                found.append(sec)
+    return found
+
+
+def scan_top(doc, k):
+    trials = [(sec.get("duration"), sec) for sec in doc.iter_sections() if sec.type == "Trial"]
+    trials.sort(key=lambda t: t[0].value, reverse=True)
+    return [sec for _, sec in trials[:k]]
+
+
+def main(size):
+    random.seed(42)
+    doc = build(size)
+    create = timeit.timeit(lambda: doc.create_value_index("Trial", "duration"), number=1)
+    index = doc.create_value_index("Trial", "duration")
+    value = index.top(1)[0].get("duration").value
+    print("sections: %d, index creation: %.3f s" % (size, create))
+
+    queries = (
+        ("range 2-5", lambda: index.range(2, 5), lambda: scan_range(doc, 2, 5)),
+        ("equal", lambda: index.equal(value), lambda: scan_range(doc, value, value)),
+        ("top 10", lambda: index.top(10), lambda: scan_top(doc, 10))
+    )
+    print("%12s %8s %14s %14s" % ("query", "results", "index [ms]", "scan [ms]"))
+    for name, query, scan in queries:
+        assert len(query()) == len(scan())
+        query_time = min(timeit.repeat(query, number=1, repeat=5))
+        scan_time = min(timeit.repeat(scan, number=1, repeat=3))
+        print("%12s %8d %14.3f %14.3f" % (name, len(query()), query_time * 1000, scan_time * 1000))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
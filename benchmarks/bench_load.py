@@ -0,0 +1,69 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Benchmarks for loading documents with and without checks (``trusted=True``).
+
+Run with ``python benchmarks/bench_load.py [number of sections]``.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+import tempfile
+from uuid import uuid4
+
+from odml2 import Document, Value, TypeDef, PropertyDef
+
+
+def build(size, terms=1000):
+    """
+    A document with a terminology and sections with a few values each.
+    """
+    doc = Document()
+    doc.namespaces.set("terms", "terms.yml")
+    for i in range(terms):
+        doc.type_definitions["Type%d" % i] = TypeDef("Type%d" % i, properties=["prop%d" % j for j in range(20)])
+        doc.property_definitions["prop%d" % i] = PropertyDef("prop%d" % i, types=("int", "float", "string"))
+
+    back_end = doc.back_end
+    root = str(uuid4())
+    back_end.create_root("Session", root, None, None)
+    for i in range(size - 1):
+        uuid = str(uuid4())
+        back_end.sections.add("Trial", uuid, "trial %d" % i, None, root, "trials")
+        values = back_end.sections[uuid].value_properties
+        values.set("index", Value(i))
+        values.set("name", Value("trial"))
+        values.set("duration", Value(1.5, "ms", 0.1))
+    return doc
+
+
+def main(size):
+    path = os.path.join(tempfile.mkdtemp(), "bench.yml")
+    build(size).save(path)
+
+    print("%10s %10s %10s" % ("mode", "sections", "load [s]"))
+    times = {}
+    for trusted in (False, True):
+        times[trusted] = min(timeit.repeat(lambda: Document().load(path, trusted=trusted), number=1, repeat=3))
+        print("%10s %10d %10.3f" % ("trusted" if trusted else "checked", size, times[trusted]))
+    print("speedup: %.2fx" % (times[False] / times[True]))
+
+    doc = Document()
+    doc.load(path, trusted=True)
+    print("validate [s]: %.3f" % timeit.timeit(doc.validate, number=1))
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
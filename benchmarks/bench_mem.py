@@ -0,0 +1,111 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Benchmarks for the memory back-end.
+
+Run with ``python benchmarks/bench_mem.py [sizes...]``.
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+from uuid import uuid4
+
+from odml2.api.yml import YamlDocument
+
+
+GROUP_SIZE = 100
+
+
+def build_document(size):
+    """
+    Build a document with ``size`` sections: a root with groups of GROUP_SIZE trials each.
+    Every trial of a group links to the first trial of the previous group.
+
+    :return: The back-end and the uuids of all groups.
+    """
+    doc = YamlDocument()
+    root = str(uuid4())
+    doc.create_root("Experiment", root, None, None)
+    groups = []
+    previous = None
+    while len(doc.sections) < size:
+        group = str(uuid4())
+        doc.sections.add("Session", group, None, None, root, "sessions")
+        trials = []
+        for _ in range(min(GROUP_SIZE, size - len(doc.sections))):
+            trial = str(uuid4())
+            doc.sections.add("Trial", trial, None, None, group, "trials")
+            if previous is not None:
+                doc.sections.add_link(previous, None, trial, "previous")
+            trials.append(trial)
+        previous = trials[0] if len(trials) > 0 else previous
+        groups.append(group)
+    return doc, groups
+
+
+def bench_delete(size, repeat=5):
+    """
+    Time the deletion of a single group (GROUP_SIZE + 1 sections) from a document of
+    the given size.
+    """
+    times = []
+    for _ in range(repeat):
+        doc, groups = build_document(size)
+        group = groups[len(groups) // 2]
+        times.append(timeit.timeit(lambda: doc.sections.__delitem__(group), number=1))
+    return min(times)
+
+
+def bench_append(size):
+    """
+    Time the creation of ``size`` sub sections under a single section property.
+    """
+    doc = YamlDocument()
+    root = str(uuid4())
+    doc.create_root("Session", root, None, None)
+    uuids = [str(uuid4()) for _ in range(size)]
+
+    def append():
+        for uuid in uuids:
+            doc.sections.add("Trial", uuid, None, None, root, "trials")
+
+    return timeit.timeit(append, number=1)
+
+
+def bench_find(size, repeat=5):
+    """
+    Time finding all sessions (one per GROUP_SIZE sections) by type with the index
+    compared to a scan over all sections.
+    """
+    doc, groups = build_document(size)
+    sections = doc.sections
+    # the first search builds the index
+    assert len(sections.find(type="Session")) == len(groups)
+
+    def scan():
+        return [uuid for uuid in sections if sections[uuid].get_type() == "Session"]
+
+    find = min(timeit.repeat(lambda: sections.find(type="Session"), number=1, repeat=repeat))
+    return find, min(timeit.repeat(scan, number=1, repeat=repeat))
+
+
+def main(sizes):
+    print("%12s %16s %16s %16s %16s" % ("sections", "delete [ms]", "append [ms]", "find [ms]", "scan [ms]"))
+    for size in sizes:
+        find, scan = bench_find(size)
+        print("%12d %16.3f %16.3f %16.3f %16.3f" %
+              (size, bench_delete(size) * 1000, bench_append(size) * 1000, find * 1000, scan * 1000))
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,120 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Benchmarks for the memory footprint of the memory back-end.
+
+Run with ``python benchmarks/bench_memory.py [number of sections]``, e.g.
+``python benchmarks/bench_memory.py 1000000``.
+
+Documents are measured once after building them via the back-end API and once after
+loading them from a file, where type and property names come out of the yaml parser.
+"""
+
+from __future__ import print_function
+
+import gc
+import os
+import sys
+import time
+import timeit
+import tempfile
+import tracemalloc
+from uuid import uuid4
+
+from odml2 import Value
+from odml2.api.yml import YamlDocument
+
+
+GROUP_SIZE = 1000
+
+
+def build_document(size):
+    """
+    Build a document with ``size`` sections: a root with sessions of GROUP_SIZE trials
+    each. Trials are leaf sections with three value properties.
+    """
+    doc = YamlDocument()
+    root = str(uuid4())
+    doc.create_root("Experiment", root, None, None)
+    i = 0
+    while len(doc.sections) < size:
+        group = str(uuid4())
+        doc.sections.add("Session", group, "session", None, root, "sessions")
+        for _ in range(min(GROUP_SIZE, size - len(doc.sections))):
+            trial = str(uuid4())
+            doc.sections.add("Trial", trial, None, None, group, "trials")
+            values = doc.sections[trial].value_properties
+            values.set("index", Value(i))
+            values.set("duration", Value(2.5, "s", 0.001))
+            values.set("valid", Value(True))
+            i += 1
+    return doc
+
+
+def load_document(path):
+    doc = YamlDocument()
+    with open(path) as f:
+        doc.load(f)
+    return doc
+
+
+def measure(create, *args):
+    """
+    :return: The created document, the time to create it and the memory it holds in bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    doc = create(*args)
+    duration = time.time() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return doc, duration, current
+
+
+def lookup(doc):
+    """
+    Access all value properties of all sections by name.
+    """
+    sections = doc.sections
+    for uuid in sections:
+        values = sections[uuid].value_properties
+        for prop in ("index", "duration", "valid"):
+            if prop in values:
+                values[prop]
+
+
+def report(name, size, doc, duration, current):
+    lookup_time = min(timeit.repeat(lambda: lookup(doc), number=1, repeat=3))
+    print("%12s %12d %12.2f %16.1f %18.0f %12.3f" %
+          (name, size, duration, current / 1024.0 ** 2, float(current) / size, lookup_time))
+
+
+def main(size):
+    fd, path = tempfile.mkstemp(suffix=".yml")
+    os.close(fd)
+    try:
+        print("%12s %12s %12s %16s %18s %12s" %
+              ("document", "sections", "time [s]", "document [MB]", "bytes per section", "lookup [s]"))
+        doc, duration, current = measure(build_document, size)
+        report("built", size, doc, duration, current)
+        with open(path, "w") as f:
+            doc.save(f)
+        del doc
+        doc, duration, current = measure(load_document, path)
+        report("loaded", size, doc, duration, current)
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,82 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Benchmarks for attribute access and tree walks through :class:`~odml2.Section` handles.
+
+Run with ``python benchmarks/bench_section.py [number of sections]``.
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+from uuid import uuid4
+
+from odml2 import Document, Value
+
+
+GROUP_SIZE = 100
+
+
+def build(size):
+    """
+    A document with sessions of GROUP_SIZE trials each, every trial has two values.
+    """
+    doc = Document()
+    back_end = doc.back_end
+    root = str(uuid4())
+    back_end.create_root("Experiment", root, None, None)
+    group = None
+    for i in range(size - 1):
+        uuid = str(uuid4())
+        if i % (GROUP_SIZE + 1) == 0:
+            back_end.sections.add("Session", uuid, None, None, root, "sessions")
+            group = uuid
+        else:
+            back_end.sections.add("Trial", uuid, "trial %d" % i, None, group, "trials")
+            back_end.sections[uuid].value_properties.set("index", Value(i))
+            back_end.sections[uuid].value_properties.set("duration", Value(1.5, "s"))
+    return doc
+
+
+def walk(section):
+    """
+    Visit all sections of a tree, reading their attributes and values.
+    """
+    count = 0
+    stack = [section]
+    while len(stack) > 0:
+        sec = stack.pop()
+        sec.type, sec.label, sec.reference
+        for key in sec:
+            target = sec.get(key)
+            if isinstance(target, list):
+                stack.extend(target)
+        count += 1
+    return count
+
+
+def attributes(sections):
+    for sec in sections:
+        sec.type, sec.label, sec.reference, len(sec)
+
+
+def main(size):
+    doc = build(size)
+    sections = list(doc.iter_sections())
+    print("%12s %16s %16s" % ("sections", "attributes [s]", "walk [s]"))
+    attribute_time = min(timeit.repeat(lambda: attributes(sections), number=1, repeat=5))
+    walk_time = min(timeit.repeat(lambda: walk(doc.root), number=1, repeat=5))
+    print("%12d %16.3f %16.3f" % (size, attribute_time, walk_time))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
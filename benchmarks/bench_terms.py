@@ -0,0 +1,103 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Benchmarks for writing properties with different terminology strategies and for
+inferring the terminology of an existing document.
+
+Run with ``python benchmarks/bench_terms.py [number of properties]``.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+import tempfile
+
+from uuid import uuid4
+
+from odml2 import Document, TerminologyStrategy, TypeDef, PropertyDef, SB, Value
+
+
+def ingest(doc, size):
+    trial = doc.root
+    for i in range(size):
+        trial["t:index"] = i
+        trial["t:name"] = "trial"
+
+
+def build_legacy(size):
+    """
+    A document with sections of a few types and properties but without any definitions.
+    """
+    doc = Document()
+    back_end = doc.back_end
+    root = str(uuid4())
+    back_end.create_root("Session", root, None, None)
+    for i in range(size - 1):
+        uuid = str(uuid4())
+        back_end.sections.add("Trial%d" % (i % 10), uuid, None, None, root, "trials")
+        back_end.sections[uuid].value_properties.set("index", Value(i))
+        back_end.sections[uuid].value_properties.set("name%d" % (i % 100), Value("trial"))
+    return doc
+
+
+def replay_create(doc):
+    create = TerminologyStrategy.Create
+    sections = doc.back_end.sections
+    for uuid in sections:
+        sec = sections[uuid]
+        for prop, value in sec.value_properties.items():
+            create.handle_triple(doc, sec.get_type(), prop, value.type)
+        for prop, refs in sec.section_properties.items():
+            for ref in refs:
+                create.handle_triple(doc, sec.get_type(), prop, sections[ref.uuid].get_type())
+
+
+def main(size):
+    path = os.path.join(tempfile.mkdtemp(), "terms.yml")
+    terms = Document()
+    terms.type_definitions["Trial"] = TypeDef("Trial", properties=("index", "name"))
+    terms.property_definitions["index"] = PropertyDef("index", types=("int", "float"))
+    terms.property_definitions["name"] = PropertyDef("name", types=("string", ))
+    terms.save(path)
+
+    print("%8s %12s %14s" % ("strategy", "properties", "ingest [s]"))
+    for strategy in (TerminologyStrategy.Ignore, TerminologyStrategy.Strict):
+        doc = Document()
+        doc.namespaces.set("t", path)
+        doc.root = SB("t:Trial")
+        doc.terminology_strategy = strategy
+        time = timeit.timeit(lambda: ingest(doc, size // 2), number=1)
+        print("%8s %12d %14.3f" % (strategy.name, size, time))
+
+    doc = Document(strategy=TerminologyStrategy.Strict)
+    doc.namespaces.set("t", path)
+    doc.root = SB("t:Trial")
+
+    def deferred():
+        with doc.deferred_validation():
+            ingest(doc, size // 2)
+    time = timeit.timeit(deferred, number=1)
+    print("%8s %12d %14.3f" % ("Deferred", size, time))
+    os.remove(path)
+
+    print()
+    print("%18s %10s %10s" % ("inference", "sections", "time [s]"))
+    sections = size // 10
+    for name, infer in (("Create (replayed)", replay_create), ("infer_terminology", Document.infer_terminology)):
+        doc = build_legacy(sections)
+        time = timeit.timeit(lambda: infer(doc), number=1)
+        print("%18s %10d %10.3f" % (name, sections, time))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
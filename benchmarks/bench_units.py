@@ -0,0 +1,43 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Benchmarks for converting values with mixed units into one unit, one by one with
+:meth:`~odml2.Value.to` compared to :func:`~odml2.convert_many`.
+
+Run with ``python benchmarks/bench_units.py [number of values]``.
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+import numpy
+
+from odml2 import Value, convert_many
+
+
+def main(size):
+    units = ("s", "ms", u"μs", "min")
+    values = [Value(float(i), units[i % len(units)]) for i in range(size)]
+
+    def one_by_one():
+        return numpy.array([v.to("ms").value for v in values])
+
+    assert numpy.allclose(one_by_one(), convert_many(values, "ms"))
+    single = min(timeit.repeat(one_by_one, number=1, repeat=5))
+    many = min(timeit.repeat(lambda: convert_many(values, "ms"), number=1, repeat=5))
+    print("%12s %16s %16s" % ("values", "to [ms]", "convert_many [ms]"))
+    print("%12d %16.1f %16.1f" % (size, single * 1000, many * 1000))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,47 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Micro benchmarks for creating values with :meth:`~odml2.Value.from_obj` and for
+:attr:`~odml2.Value.type`.
+
+Run with ``python benchmarks/bench_value.py [number of calls]``.
+"""
+
+from __future__ import print_function
+
+import sys
+import timeit
+
+from odml2 import Value
+
+
+def main(size):
+    texts = ["session %d" % i for i in range(size)]
+    distinct = ["%d.5+-0.001s" % i for i in range(size)]
+    recurring = ["5+-0.001s", "10 mV", "2.5 ms"] * (size // 3)
+    numbers = [float(i) for i in range(size)]
+
+    def from_obj(things):
+        return lambda: [Value.from_obj(t) for t in things]
+
+    def types():
+        # the type is either computed by the constructor or on first access
+        return [Value(n).type for n in numbers]
+
+    print("%24s %12s" % ("path", "time [ms]"))
+    for name, run in (("plain strings", from_obj(texts)), ("distinct quantities", from_obj(distinct)),
+                      ("recurring quantities", from_obj(recurring)), ("numbers", from_obj(numbers)),
+                      ("create and type", types)):
+        print("%24s %12.1f" % (name, min(timeit.repeat(run, number=1, repeat=5)) * 1000))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,131 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Benchmarks for loading and saving with the yaml back-end.
+
+Run with ``python benchmarks/bench_yaml.py [size in MB]``, e.g. ``python benchmarks/bench_yaml.py 500``.
+"""
+
+from __future__ import print_function
+
+import io
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+from uuid import uuid4
+
+import yaml
+
+from odml2.api import yml
+
+
+TRIAL = u"""  - uuid: %s
+    type: Trial
+    label: trial %d
+    index: %d
+    duration: 2.5s+-0.001
+    offset: 10ms
+    valid: true
+"""
+
+
+def write_document(path, size_mb):
+    """
+    Write a document with trials to a file until the file has at least the given size.
+    """
+    with io.open(path, "w", encoding="utf-8") as f:
+        f.write(u"author: John Doe\ndate: 2015-11-11\ndocument_version: 1\nformat_version: 2\n")
+        f.write(u"namespaces: null\ndefinitions: null\n")
+        f.write(u"metadata:\n  uuid: %s\n  type: Session\n  trials:\n" % uuid4())
+        i = 0
+        while f.tell() < size_mb * 1024 * 1024:
+            f.write(TRIAL % (uuid4(), i, i))
+            i += 1
+    return i
+
+
+def load_dict(path):
+    doc = yml.YamlDocument()
+    with io.open(path, "r", encoding="utf-8") as f:
+        data = yaml.load(f, Loader=yml.LOADER)
+    doc.from_dict(data)
+    return doc
+
+
+def load_events(path):
+    doc = yml.YamlDocument()
+    with io.open(path, "r", encoding="utf-8") as f:
+        doc.load(f)
+    return doc
+
+
+def save_dict(doc):
+    f = io.StringIO()
+    f.write(yaml.dump(doc.to_dict(), Dumper=yml.DUMPER, default_flow_style=False, allow_unicode=True))
+    return f
+
+
+def save_events(doc):
+    f = io.StringIO()
+    doc.save(f)
+    return f
+
+
+def measure_save(save, doc):
+    """
+    :return: Time and peak memory during save, without the memory used by the output.
+    """
+    tracemalloc.start()
+    start = time.time()
+    f = save(doc)
+    duration = time.time() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak - current
+
+
+def measure(load, path):
+    """
+    :return: Time, peak memory during load and memory of the loaded document.
+    """
+    tracemalloc.start()
+    start = time.time()
+    doc = load(path)
+    duration = time.time() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del doc
+    return duration, peak, current
+
+
+def main(size_mb):
+    fd, path = tempfile.mkstemp(suffix=".yml")
+    os.close(fd)
+    try:
+        trials = write_document(path, size_mb)
+        print("file: %.1f MB, %d trials, engine: %s" % (os.path.getsize(path) / 1024.0 ** 2, trials, yml.ENGINE))
+        print("%10s %10s %16s %16s" % ("loader", "time [s]", "peak [MB]", "document [MB]"))
+        for name, load in (("dict", load_dict), ("events", load_events)):
+            duration, peak, current = measure(load, path)
+            print("%10s %10.2f %16.1f %16.1f" % (name, duration, peak / 1024.0 ** 2, current / 1024.0 ** 2))
+        doc = load_events(path)
+        print("%10s %10s %16s" % ("writer", "time [s]", "peak [MB]"))
+        for name, save in (("dict", save_dict), ("events", save_events)):
+            duration, peak = measure_save(save, doc)
+            print("%10s %10.2f %16.1f" % (name, duration, peak / 1024.0 ** 2))
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 10)
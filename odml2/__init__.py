@@ -6,7 +6,11 @@
 # modification, are permitted under the terms of the BSD License. See
 # LICENSE file in the root of the project.
 
-from odml2.terms import TerminologyStrategy
-from odml2.model import Section, Value, NameSpace, NameSpaceMap, PropertyDef, PropertyDefMap, TypeDef, TypeDefMap
-from odml2.document import Document
+from odml2.terms import TerminologyStrategy, TerminologyError
+from odml2.model import Section, Value, ValueArray, NameSpace, NameSpaceMap, PropertyDef, PropertyDefMap, \
+    TypeDef, TypeDefMap
+from odml2.document import Document, PrefetchReport, ValueIndex
 from odml2.builder import SB
+from odml2.cache import DocumentCache, CacheStats, NAMESPACE_CACHE
+from odml2.fetch import HttpFetcher
+from odml2.units import UnitRegistry, UNITS, convert_many
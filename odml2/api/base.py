@@ -24,6 +24,17 @@ Provides abstract base classes for back-end implementations.
 #         and read-write attributes.
 
 
+def _is_array_obj(element):
+    """
+    Value arrays are written as tuples (flow sequences) and read as lists without dicts.
+    Empty lists are no arrays but properties without sub sections, empty arrays are never
+    written as such.
+    """
+    if isinstance(element, tuple):
+        return True
+    return isinstance(element, list) and len(element) > 0 and not any(isinstance(e, dict) for e in element)
+
+
 @six.add_metaclass(abc.ABCMeta)
 class BaseDocument(object):
     """
@@ -165,12 +176,13 @@ class BaseDocument(object):
         pass
 
     @abc.abstractmethod
-    def load(self, io, uri=None):
+    def load(self, io, uri=None, trusted=False):
         """
         Fill the document with data from a certain location.
 
-        :param io:  An I/O (StingIO,FileIO) to read the data from.
-        :param uri: The uri of the document.
+        :param io:      An I/O (StingIO,FileIO) to read the data from.
+        :param uri:     The uri of the document.
+        :param trusted: If True names and values are not checked while loading.
         """
         pass
 
@@ -185,15 +197,42 @@ class BaseDocument(object):
         pass
 
     def to_dict(self):
+        root = self._header_to_dict()
+        root_uuid = self.get_root()
+        if root_uuid is None:
+            root["metadata"] = None
+            return root
+
+        # traverse the section tree with an explicit stack, since it can be arbitrarily deep
+        root["metadata"] = self._section_head_to_dict(root_uuid)
+        stack = [(root_uuid, root["metadata"])]
+        while len(stack) > 0:
+            uuid, sec_dict = stack.pop()
+            sec = self.sections[uuid]
+            if not sec._has_section_properties():
+                continue
+            for prop in sec.section_properties:
+                refs = sec.section_properties[prop]
+                converted = []
+                for ref in refs:
+                    if ref.is_link:
+                        converted.append(self._link_to_str(ref))
+                    else:
+                        sub_dict = self._section_head_to_dict(ref.uuid)
+                        converted.append(sub_dict)
+                        stack.append((ref.uuid, sub_dict))
+                sec_dict[prop] = converted[0] if len(refs) == 1 else converted
+        return root
+
+    def _header_to_dict(self):
+        """
+        :return: All document attributes, namespaces and definitions as created by :meth:`to_dict`,
+                 but without metadata.
+        :rtype: OrderedDict
+        """
         root = OrderedDict(author=self.get_author(), date=self.get_date(),
                            document_version=self.get_version(), format_version=2)
 
-        def convert_value(val):
-            if val.unit is not None or val.uncertainty is not None:
-                return str(val)
-            else:
-                return val.value
-
         def convert_ns():
             ns_dict = OrderedDict()
             for ns in self.namespaces.values():
@@ -216,85 +255,155 @@ class BaseDocument(object):
                 defs_dict[td.name] = td_dict
             return defs_dict if len(defs_dict) > 0 else None
 
-        def convert_ref(ref):
-            if ref.is_link:
-                link = ref.uuid
-                if ref.namespace is not None:
-                    link = ref.namespace + ":" + link
-                return link
+        root["namespaces"] = convert_ns()
+        root["definitions"] = convert_definitions()
+        return root
+
+    def _section_head_to_dict(self, uuid):
+        """
+        :return: Uuid, type, label, reference and value properties of a section as created
+                 by :meth:`to_dict`, but without section properties.
+        :rtype: OrderedDict
+        """
+        def convert_value(val):
+            if isinstance(val, odml2.ValueArray):
+                return val._to_obj()
+            elif val.unit is not None or val.uncertainty is not None:
+                return str(val)
             else:
-                return convert_section(ref.uuid)
+                return val.value
 
-        def convert_section(uuid):
-            sec = self.sections[uuid]
-            sec_dict = OrderedDict(uuid=uuid, type=sec.get_type())
-            label = sec.get_label()
-            if label is not None:
-                sec_dict["label"] = label
-            reference = sec.get_reference()
-            if reference is not None:
-                sec_dict["reference"] = reference
+        sec = self.sections[uuid]
+        sec_dict = OrderedDict(uuid=uuid, type=sec.get_type())
+        label = sec.get_label()
+        if label is not None:
+            sec_dict["label"] = label
+        reference = sec.get_reference()
+        if reference is not None:
+            sec_dict["reference"] = reference
+        if sec._has_value_properties():
             for prop in sec.value_properties:
                 value = sec.value_properties[prop]
                 sec_dict[prop] = convert_value(value)
-            for prop in sec.section_properties:
-                refs = sec.section_properties[prop]
-                if len(refs) == 1:
-                    sec_dict[prop] = convert_ref(refs[0])
-                else:
-                    sec_dict[prop] = [convert_ref(ref) for ref in refs]
-            return sec_dict
+        return sec_dict
 
-        root["namespaces"] = convert_ns()
-        root["definitions"] = convert_definitions()
-        if self.get_root() is not None:
-            root["metadata"] = convert_section(self.get_root())
-        else:
-            root["metadata"] = None
-        return root
+    @staticmethod
+    def _link_to_str(ref):
+        link = ref.uuid
+        if ref.namespace is not None:
+            link = ref.namespace + ":" + link
+        return link
 
-    def from_dict(self, data):
+    def from_dict(self, data, trusted=False):
         if data["format_version"] != 2:
             raise RuntimeError("Format version must be 2")
 
         self.clear()
 
-        if "author" in data:
-            self.set_author(data["author"])
-        if "date" in data:
-            self.set_date(data["date"])
-        if "document_version" in data:
-            self.set_version(data["document_version"])
-
-        if "namespaces" in data and data["namespaces"] is not None:
-            for prefix, uri in data["namespaces"].items():
-                self.namespaces.set(prefix, uri)
-        if "definitions" in data and data["definitions"] is not None:
-            for name, def_data in data["definitions"].items():
+        for key in ("author", "date", "document_version", "namespaces", "definitions"):
+            if key in data:
+                self._header_from_obj(key, data[key], trusted)
+
+        if "metadata" in data and data["metadata"] is not None:
+            self._section_from_dict(None, None, data["metadata"], trusted)
+
+    def _header_from_obj(self, key, element, trusted=False):
+        """
+        Set document attributes, namespaces or definitions from an entry of the
+        dict created by :meth:`to_dict`.
+
+        :param key:     The key of the entry.
+        :param element: The content of the entry.
+        :param trusted: If True names are not checked.
+        """
+        if key == "author":
+            self.set_author(element)
+        elif key == "date":
+            self.set_date(element)
+        elif key == "document_version":
+            self.set_version(element)
+        elif key == "namespaces" and element is not None:
+            for prefix, uri in element.items():
+                if trusted:
+                    self.namespaces[prefix] = odml2.NameSpace._unchecked(prefix, uri)
+                else:
+                    self.namespaces.set(prefix, uri)
+        elif key == "definitions" and element is not None:
+            for name, def_data in element.items():
                 if "types" in def_data:
-                    self.property_defs.set(name, def_data.get("definition"), def_data["types"])
+                    if trusted:
+                        pd = odml2.PropertyDef._unchecked(name, def_data.get("definition"), def_data["types"])
+                        self.property_defs[name] = pd
+                    else:
+                        self.property_defs.set(name, def_data.get("definition"), def_data["types"])
                 elif "properties" in def_data:
-                    self.type_defs.set(name, def_data.get("definition"), def_data["properties"])
-
-        def read_section(parent_uuid, parent_prop, sec_data):
+                    if trusted:
+                        td = odml2.TypeDef._unchecked(name, def_data.get("definition"), def_data["properties"])
+                        self.type_defs[name] = td
+                    else:
+                        self.type_defs.set(name, def_data.get("definition"), def_data["properties"])
+
+    def _section_from_dict(self, parent_uuid, parent_prop, sec_data, trusted=False):
+        """
+        Create a section and all its sub sections from a dict.
+
+        :param parent_uuid: The uuid of the parent section or None for the root section.
+        :param parent_prop: The property of the parent that points to the section.
+        :param sec_data:    The section data as created by :meth:`to_dict`.
+        :param trusted:     If True values are not checked.
+        """
+        # sections are created in the same order as a recursive traversal would do, but with an
+        # explicit stack, since the section tree can be arbitrarily deep
+        stack = [(parent_uuid, parent_prop, sec_data)]
+        while len(stack) > 0:
+            parent_uuid, parent_prop, sec_data = stack.pop()
+            uuid = sec_data["uuid"]
             if parent_uuid is None:
-                self.create_root(sec_data["type"], sec_data["uuid"], sec_data.get("label"), sec_data.get("reference"))
+                self.create_root(sec_data["type"], uuid, sec_data.get("label"), sec_data.get("reference"))
             else:
-                self.sections.add(sec_data["type"], sec_data["uuid"], sec_data.get("label"), sec_data.get("reference"),
+                self.sections.add(sec_data["type"], uuid, sec_data.get("label"), sec_data.get("reference"),
                                   parent_uuid, parent_prop)
+            sub_sections = []
+            # values of a trusted document, which are set all at once
+            values = []
             properties = ((k, v) for k, v in sec_data.items() if k not in ("type", "uuid", "label", "reference"))
             for prop, element in properties:
                 if isinstance(element, dict):
-                    read_section(sec_data["uuid"], prop, element)
-                elif isinstance(element, list):
-                    for sub_elem in element:
-                        read_section(sec_data["uuid"], prop, sub_elem)
+                    sub_sections.append((uuid, prop, element))
+                elif isinstance(element, list) and not _is_array_obj(element):
+                    sub_sections.extend((uuid, prop, sub_elem) for sub_elem in element)
+                elif trusted and not _is_array_obj(element):
+                    values.append((prop, odml2.Value._from_trusted_obj(element)))
                 else:
-                    section = self.sections[sec_data["uuid"]]
-                    section.value_properties.set(prop, odml2.Value.from_obj(element))
-
-        if "metadata" in data and data["metadata"] is not None:
-            read_section(None, None, data["metadata"])
+                    self._property_from_obj(uuid, prop, element, trusted)
+            if len(values) > 0:
+                self.sections[uuid].value_properties.set_many(values)
+            stack.extend(reversed(sub_sections))
+
+    def _property_from_obj(self, uuid, prop, element, trusted=False):
+        """
+        Add a property to a section. Dicts and lists of dicts are added as sub sections, other
+        lists and tuples are converted to value arrays and all other elements to values.
+
+        :param uuid:    The uuid of the section.
+        :param prop:    The name of the property.
+        :param element: The target of the property.
+        :param trusted: If True values are not checked.
+        """
+        if isinstance(element, dict):
+            self._section_from_dict(uuid, prop, element, trusted)
+        elif isinstance(element, list) and not _is_array_obj(element):
+            for sub_elem in element:
+                self._section_from_dict(uuid, prop, sub_elem, trusted)
+        else:
+            section = self.sections[uuid]
+            if _is_array_obj(element):
+                value = odml2.ValueArray._from_obj(element)
+            elif trusted:
+                value = odml2.Value._from_trusted_obj(element)
+            else:
+                value = odml2.Value.from_obj(element)
+            section.value_properties.set(prop, value)
 
 
 class BaseNameSpaceMap(MutableMapping):
@@ -302,6 +411,14 @@ class BaseNameSpaceMap(MutableMapping):
     Dict like accessor for namespaces of an odML2 document.
     """
 
+    @property
+    def epoch(self):
+        """
+        A counter which is incremented whenever a name space is added, replaced or removed.
+        :rtype: int
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def set(self, prefix, uri):
         pass
@@ -312,6 +429,14 @@ class BasePropertyDefMap(MutableMapping):
     Dict like accessor for property definitions of an odML2 document.
     """
 
+    @property
+    def epoch(self):
+        """
+        A counter which is incremented whenever a definition is added, replaced or removed.
+        :rtype: int
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def set(self, name, types=tuple()):
         pass
@@ -322,6 +447,14 @@ class BaseTypeDefMap(MutableMapping):
     Dict like accessor for type definitions of an odML2 document.
     """
 
+    @property
+    def epoch(self):
+        """
+        A counter which is incremented whenever a definition is added, replaced or removed.
+        :rtype: int
+        """
+        raise NotImplementedError()
+
     # noinspection PyShadowingBuiltins
     @abc.abstractmethod
     def set(self, type, definition=None, properties=tuple()):
@@ -333,15 +466,99 @@ class BaseSectionMap(MutableMapping):
     Dict like accessor for namespaces of a odML2 document.
     """
 
+    @property
+    def epoch(self):
+        """
+        A counter which is incremented whenever sections are removed from the map. Sections
+        resolved from the map are valid as long as the epoch doesn't change.
+        :rtype: int
+        """
+        raise NotImplementedError()
+
     # noinspection PyShadowingBuiltins
     @abc.abstractmethod
     def add(self, type, uuid, label, reference, parent_uuid, parent_prop):
         pass
 
+    def add_many(self, records):
+        """
+        Add several sub sections at once. Parents must either exist or be added by a
+        preceding record.
+
+        :param records: Tuples of type, uuid, label, reference, parent uuid and parent
+                        property, in the same order as the arguments of :meth:`add`.
+        :type records: list[tuple]
+        """
+        for record in records:
+            if record[4] is None or record[5] is None:
+                raise ValueError("Parent uuid and prop are required for all records")
+            self.add(*record)
+
     @abc.abstractmethod
     def add_link(self, uuid, prefix, parent_uuid, parent_prop):
         pass
 
+    @abc.abstractmethod
+    def get_parent(self, uuid):
+        """
+        :return: The uuid and property name of the parent section or (None, None) for
+                 the root section.
+        :rtype: tuple
+        """
+        pass
+
+    # noinspection PyShadowingBuiltins
+    def find(self, type=None, label=None, has_property=None):
+        """
+        Find sections by type, label and property name. Criteria which are None are
+        ignored, all others must match. This implementation scans all sections, back-ends
+        may override it with an indexed lookup.
+
+        :param type: The type of the sections.
+        :type type: str
+        :param label: The label of the sections.
+        :type label: str
+        :param has_property: The name of a value or section property the sections must have.
+        :type has_property: str
+
+        :return: The uuids of all matching sections in no particular order.
+        :rtype: list[str]
+        """
+        found = []
+        for uuid in self:
+            section = self[uuid]
+            if type is not None and section.get_type() != type:
+                continue
+            if label is not None and section.get_label() != label:
+                continue
+            if has_property is not None and has_property not in section.value_properties and \
+                    has_property not in section.section_properties:
+                continue
+            found.append(uuid)
+        return found
+
+    # noinspection PyShadowingBuiltins
+    def create_value_index(self, type, prop):
+        """
+        Create a sorted index over the values of a property in all sections of a type,
+        or return the existing one. The index is kept up to date until it is dropped.
+
+        :param type: The type of the sections.
+        :type type: str
+        :param prop: The name of the value property.
+        :type prop: str
+
+        :return: The index providing range, equality and top-k queries.
+        """
+        raise NotImplementedError("Value indexes are not supported by this back-end")
+
+    # noinspection PyShadowingBuiltins
+    def drop_value_index(self, type, prop):
+        """
+        Remove the index created by :meth:`create_value_index`.
+        """
+        raise NotImplementedError("Value indexes are not supported by this back-end")
+
 
 @six.add_metaclass(abc.ABCMeta)
 class BaseSection(object):
@@ -349,6 +566,8 @@ class BaseSection(object):
     Low level access to a section within a document.
     """
 
+    __slots__ = ()
+
     @abc.abstractmethod
     def is_linked(self):
         pass
@@ -396,12 +615,30 @@ class BaseSection(object):
         """
         raise NotImplementedError()
 
+    def _has_section_properties(self):
+        """
+        :return: False if the section has no section properties. Back-ends may override this to
+                 answer without creating the property map.
+        :rtype: bool
+        """
+        return len(self.section_properties) > 0
+
+    def _has_value_properties(self):
+        """
+        :return: False if the section has no value properties. Back-ends may override this to
+                 answer without creating the property map.
+        :rtype: bool
+        """
+        return len(self.value_properties) > 0
+
 
 class BaseSectionPropertyMap(MutableMapping):
     """
     Dict like accessor for section properties.
     """
 
+    __slots__ = ()
+
     @abc.abstractmethod
     def set(self, prop, refs):
         """
@@ -413,12 +650,38 @@ class BaseSectionPropertyMap(MutableMapping):
         """
         pass
 
+    def append(self, prop, ref):
+        """
+        Append a single section reference to a section property. The property is
+        created if it does not exist.
+
+        :param prop: The property name.
+        :type prop: str
+        :param ref: The reference to append.
+        :type ref: SectionRef
+        """
+        self.extend(prop, (ref, ))
+
+    def extend(self, prop, refs):
+        """
+        Append several section references to a section property. The property is
+        created if it does not exist.
+
+        :param prop: The property name.
+        :type prop: str
+        :param refs: The references to append.
+        :type refs: collections.Iterable[SectionRef]
+        """
+        self.set(prop, tuple(self.get(prop, ())) + tuple(refs))
+
 
 class SectionRef(object):
     """
     Holds information about a reference to a section used in a section property.
     """
 
+    __slots__ = ("__uuid", "__namespace", "__is_link")
+
     def __init__(self, uuid, namespace, is_link):
         self.__uuid = uuid
         self.__namespace = namespace
@@ -442,6 +705,8 @@ class BaseValuePropertyMap(MutableMapping):
     Dict like accessor for section properties.
     """
 
+    __slots__ = ()
+
     @abc.abstractmethod
     def set(self, prop, value):
         """
@@ -452,3 +717,13 @@ class BaseValuePropertyMap(MutableMapping):
         :type value: odml2.Value
         """
         pass
+
+    def set_many(self, items):
+        """
+        Set the values of several properties at once.
+
+        :param items: Pairs of property name and value.
+        :type items: list[tuple]
+        """
+        for prop, value in items:
+            self.set(prop, value)
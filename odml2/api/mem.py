@@ -9,7 +9,12 @@
 # LICENSE file in the root of the project.
 
 import abc
+import six
+import numbers
+import datetime as dt
 from uuid import UUID
+from collections import Sequence, OrderedDict
+from six.moves import intern
 from sortedcontainers import SortedDict
 import odml2
 from odml2.api import base
@@ -27,6 +32,15 @@ Provides abstract base classes for back-end implementations.
 # TODO sanitize and check input (dates, name identifiers, type identifiers, prefixes, URIs)
 
 
+def _intern(name):
+    """
+    Intern type names, property names and prefixes, which are repeated in many sections
+    but come out of the parser as separate strings.
+    """
+    # python 2 can only intern byte strings
+    return intern(name) if type(name) is str else name
+
+
 class MemDocument(base.BaseDocument):
 
     def __init__(self, is_writable=True):
@@ -50,6 +64,10 @@ class MemDocument(base.BaseDocument):
     def _set_writable(self, writable):
         self.__is_writable = writable
 
+    def assert_writable(self):
+        if not self.__is_writable:
+            raise RuntimeError("The document is not writable!")
+
     def get_uri(self,):
         return self.__uri
 
@@ -118,7 +136,7 @@ class MemDocument(base.BaseDocument):
         self.__sections.clear()
 
     @abc.abstractmethod
-    def load(self, io, uri=None):
+    def load(self, io, uri=None, trusted=False):
         pass
 
     @abc.abstractmethod
@@ -131,16 +149,23 @@ class MemNameSpaceMap(base.BaseNameSpaceMap):
     def __init__(self, doc):
         self.__doc = doc
         self.__namespaces = SortedDict()
+        self.__epoch = 0
+
+    @property
+    def epoch(self):
+        return self.__epoch
 
     def set(self, prefix, uri):
         self.__doc.assert_writable()
         self.__namespaces[prefix] = odml2.NameSpace(prefix, uri)
+        self.__epoch += 1
 
     def __setitem__(self, prefix, ns):
         self.__doc.assert_writable()
         if prefix != ns.prefix:
             raise KeyError("NameSpace prefix mismatch: %s != %s" % (prefix, ns.prefix))
-        self.set(prefix, ns.uri)
+        self.__namespaces[prefix] = ns
+        self.__epoch += 1
 
     def __getitem__(self, prefix):
         return self.__namespaces[prefix]
@@ -148,6 +173,7 @@ class MemNameSpaceMap(base.BaseNameSpaceMap):
     def __delitem__(self, prefix):
         self.__doc.assert_writable()
         del self.__namespaces[prefix]
+        self.__epoch += 1
 
     def __len__(self):
         return len(self.__namespaces)
@@ -161,16 +187,23 @@ class MemPropertyDefMap(base.BasePropertyDefMap):
     def __init__(self, doc):
         self.__doc = doc
         self.__property_defs = SortedDict()
+        self.__epoch = 0
+
+    @property
+    def epoch(self):
+        return self.__epoch
 
     def set(self, name, definition=None, types=frozenset()):
         self.__doc.assert_writable()
         self.__property_defs[name] = odml2.PropertyDef(name, definition, types)
+        self.__epoch += 1
 
     def __setitem__(self, name, pd):
         self.__doc.assert_writable()
         if name != pd.name:
             raise KeyError("Property name mismatch: %s != %s" % (name, pd.name))
-        self.set(name, pd.definition, pd.types)
+        self.__property_defs[name] = pd
+        self.__epoch += 1
 
     def __getitem__(self, name):
         return self.__property_defs[name]
@@ -178,6 +211,7 @@ class MemPropertyDefMap(base.BasePropertyDefMap):
     def __delitem__(self, name):
         self.__doc.assert_writable()
         del self.__property_defs[name]
+        self.__epoch += 1
 
     def __len__(self):
         return len(self.__property_defs)
@@ -191,16 +225,23 @@ class MemTypeDefMap(base.BaseTypeDefMap):
     def __init__(self, doc):
         self.__doc = doc
         self.__type_defs = SortedDict()
+        self.__epoch = 0
+
+    @property
+    def epoch(self):
+        return self.__epoch
 
     def set(self, name, definition=None, properties=frozenset()):
         self.__doc.assert_writable()
         self.__type_defs[name] = odml2.TypeDef(name, definition, properties)
+        self.__epoch += 1
 
     def __setitem__(self, name, td):
         self.__doc.assert_writable()
         if name != td.name:
             raise KeyError("Name mismatch: %s != %s" % (name, td.name))
-        self.set(name, td.definition, td.properties)
+        self.__type_defs[name] = td
+        self.__epoch += 1
 
     def __getitem__(self, name):
         return self.__type_defs[name]
@@ -208,6 +249,7 @@ class MemTypeDefMap(base.BaseTypeDefMap):
     def __delitem__(self, name):
         self.__doc.assert_writable()
         del self.__type_defs[name]
+        self.__epoch += 1
 
     def __len__(self):
         return len(self.__type_defs)
@@ -221,17 +263,33 @@ class MemSectionMap(base.BaseSectionMap):
     def __init__(self, doc):
         self.__doc = doc
         self.__sections = {}
+        # child uuid -> (parent uuid, parent prop) for all non link references
+        self.__parents = {}
+        # target uuid -> set of (parent uuid, parent prop) for all link references
+        self.__links = {}
+        # secondary indexes by "type", "label" and "property": key -> set of uuids,
+        # each index is built on its first use and maintained from then on
+        self.__indexes = {}
+        # (type, prop) -> MemValueIndex, only created on request
+        self.__value_indexes = {}
+        self.__epoch = 0
+
+    @property
+    def epoch(self):
+        return self.__epoch
 
     # noinspection PyShadowingBuiltins
     def add(self, type, uuid, label, reference, parent_uuid, parent_prop):
         self.__doc.assert_writable()
         if isinstance(uuid, UUID):
             uuid = str(uuid)
+        type = _intern(type)
         if parent_uuid is None and parent_prop is None:
             # add a new root section
             self.clear()
             self.__sections[uuid] = MemSection(self.__doc, type, uuid, label, reference, is_linked=False)
             self.__doc.set_root(uuid)
+            self._index_section(self.__sections[uuid])
         elif parent_uuid is not None and parent_prop is not None:
             # add a new sub section
             if uuid in self:
@@ -241,28 +299,182 @@ class MemSectionMap(base.BaseSectionMap):
             if parent is None:
                 raise ValueError("Parent section with uuid '%s' does not exist" % parent_uuid)
 
-            if parent_prop in parent.value_properties:
+            if parent._has_value_properties() and parent_prop in parent.value_properties:
                 del parent.value_properties[parent_prop]
 
-            refs = (base.SectionRef(uuid, None, False), )
-            if parent_prop in parent.section_properties:
-                refs = parent.section_properties[parent_prop] + refs
-            parent.section_properties.set(parent_prop, refs)
             self.__sections[uuid] = MemSection(self.__doc, type, uuid, label, reference, is_linked=False)
+            self._index_section(self.__sections[uuid])
+            parent.section_properties.append(parent_prop, base.SectionRef(uuid, None, False))
         else:
             raise RuntimeError("Parent uuid and prop must be either both None or both not None!")
 
+    # noinspection PyShadowingBuiltins
+    def add_many(self, records):
+        self.__doc.assert_writable()
+        # check all records first, so that nothing is added if one of them is invalid
+        checked = []
+        added = set()
+        for type, uuid, label, reference, parent_uuid, parent_prop in records:
+            if isinstance(uuid, UUID):
+                uuid = str(uuid)
+            if parent_uuid is None or parent_prop is None:
+                raise ValueError("Parent uuid and prop are required for all records")
+            if uuid in self.__sections or uuid in added:
+                raise ValueError("A section with the given uuid '%s' does already exist" % uuid)
+            if parent_uuid not in self.__sections and parent_uuid not in added:
+                raise ValueError("Parent section with uuid '%s' does not exist" % parent_uuid)
+            added.add(uuid)
+            checked.append((_intern(type), uuid, label, reference, parent_uuid, parent_prop))
+
+        # (parent uuid, parent prop) -> refs, so that each property is extended only once
+        refs = OrderedDict()
+        for type, uuid, label, reference, parent_uuid, parent_prop in checked:
+            section = self.__sections[uuid] = MemSection(self.__doc, type, uuid, label, reference, is_linked=False)
+            self._index_section(section)
+            refs.setdefault((parent_uuid, parent_prop), []).append(base.SectionRef(uuid, None, False))
+        for (parent_uuid, parent_prop), prop_refs in refs.items():
+            parent = self.__sections[parent_uuid]
+            if parent._has_value_properties() and parent_prop in parent.value_properties:
+                del parent.value_properties[parent_prop]
+            parent.section_properties.extend(parent_prop, prop_refs)
+
     def add_link(self, uuid, prefix, parent_uuid, parent_prop):
         parent = self[parent_uuid]
 
-        if parent_prop in parent.value_properties:
+        if parent._has_value_properties() and parent_prop in parent.value_properties:
             del parent.value_properties[parent_prop]
 
-        refs = (base.SectionRef(uuid, prefix, True), )
-        if parent_prop in parent.section_properties:
-            refs = parent.section_properties[parent_prop] + refs
+        parent.section_properties.append(parent_prop, base.SectionRef(uuid, _intern(prefix), True))
+
+    def get_parent(self, uuid):
+        return self.__parents.get(uuid, (None, None))
 
-        parent.section_properties.set(parent_prop, refs)
+    # noinspection PyShadowingBuiltins
+    def find(self, type=None, label=None, has_property=None):
+        candidates = []
+        for kind, key in (("type", type), ("label", label), ("property", has_property)):
+            if key is not None:
+                candidates.append(self.__get_index(kind).get(key, ()))
+        if len(candidates) == 0:
+            return list(self.__sections)
+        candidates.sort(key=len)
+        first, others = candidates[0], candidates[1:]
+        return [uuid for uuid in first if all(uuid in uuids for uuids in others)]
+
+    def __get_index(self, kind):
+        index = self.__indexes.get(kind)
+        if index is None:
+            index = self.__indexes[kind] = {}
+            for uuid, section in self.__sections.items():
+                for key in self.__index_keys(section, kind):
+                    index.setdefault(key, set()).add(uuid)
+        return index
+
+    @staticmethod
+    def __index_keys(section, kind):
+        if kind == "type":
+            return section.get_type(),
+        elif kind == "label":
+            return (section.get_label(), ) if section.get_label() is not None else ()
+        else:
+            return section._property_names()
+
+    def _index(self, kind, key, uuid):
+        if not self.__indexes or key is None:
+            return
+        index = self.__indexes.get(kind)
+        if index is not None:
+            index.setdefault(key, set()).add(uuid)
+
+    def _unindex(self, kind, key, uuid):
+        if not self.__indexes or key is None:
+            return
+        index = self.__indexes.get(kind)
+        if index is not None and key in index:
+            uuids = index[key]
+            uuids.discard(uuid)
+            if len(uuids) == 0:
+                del index[key]
+
+    def _unindex_property(self, uuid, prop):
+        if not self.__sections[uuid]._has_property(prop):
+            self._unindex("property", prop, uuid)
+
+    def _index_section(self, section):
+        self.__update_section(section, add=True)
+
+    def _unindex_section(self, section):
+        self.__update_section(section, add=False)
+
+    def __update_section(self, section, add):
+        if not self.__indexes and not self.__value_indexes:
+            return
+        uuid = section.get_uuid()
+        update = self._index if add else self._unindex
+        for kind in self.__indexes:
+            for key in self.__index_keys(section, kind):
+                update(kind, key, uuid)
+        for (index_type, prop), index in self.__value_indexes.items():
+            if index_type == section.get_type() and section._has_property(prop):
+                value = section.value_properties.get(prop)
+                if value is not None:
+                    if add:
+                        index._add(uuid, value)
+                    else:
+                        index._remove(uuid, value)
+
+    def _index_value(self, uuid, prop, old, new):
+        if not self.__value_indexes:
+            return
+        index = self.__value_indexes.get((self.__sections[uuid].get_type(), prop))
+        if index is not None:
+            if old is not None:
+                index._remove(uuid, old)
+            if new is not None:
+                index._add(uuid, new)
+
+    # noinspection PyShadowingBuiltins
+    def create_value_index(self, type, prop):
+        index = self.__value_indexes.get((type, prop))
+        if index is None:
+            values = []
+            for uuid, section in self.__sections.items():
+                if section.get_type() == type and section._has_property(prop):
+                    value = section.value_properties.get(prop)
+                    if value is not None:
+                        values.append((uuid, value))
+            index = self.__value_indexes[(type, prop)] = MemValueIndex(type, prop, values)
+        return index
+
+    # noinspection PyShadowingBuiltins
+    def drop_value_index(self, type, prop):
+        index = self.__value_indexes.pop((type, prop), None)
+        if index is not None:
+            index._clear()
+
+    def _index_refs(self, parent_uuid, parent_prop, refs):
+        for ref in refs:
+            if ref.is_link:
+                self.__links.setdefault(ref.uuid, set()).add((parent_uuid, parent_prop))
+            else:
+                self.__parents[ref.uuid] = (parent_uuid, parent_prop)
+
+    def _unindex_refs(self, parent_uuid, parent_prop, refs):
+        for ref in refs:
+            if ref.is_link:
+                linked_by = self.__links.get(ref.uuid)
+                if linked_by is not None:
+                    linked_by.discard((parent_uuid, parent_prop))
+                    if len(linked_by) == 0:
+                        del self.__links[ref.uuid]
+            elif self.__parents.get(ref.uuid) == (parent_uuid, parent_prop):
+                del self.__parents[ref.uuid]
+
+    def __remove_refs_to(self, parent_uuid, parent_prop, uuid):
+        parent = self.__sections[parent_uuid]
+        refs = parent.section_properties.get(parent_prop)
+        if refs is not None:
+            parent.section_properties.set(parent_prop, tuple(ref for ref in refs if ref.uuid != uuid))
 
     def __setitem__(self, uuid, value):
         self.__doc.assert_writable()
@@ -276,22 +488,49 @@ class MemSectionMap(base.BaseSectionMap):
         self.__doc.assert_writable()
         if uuid not in self:
             raise KeyError("A section with the given uuid '%s' does not exist" % uuid)
-
-        def remove_with_subsections(section_id):
-            for refs in self[section_id].section_properties.values():
-                for ref in refs:
-                    if not ref.is_link:
-                        remove_with_subsections(ref.uuid)
-            for sec in self.__sections.values():
-                for p, refs in sec.section_properties.items():
-                    sec.section_properties[p] = tuple(ref for ref in refs if ref.uuid != section_id)
+        self.__epoch += 1
+
+        # collect the subtree without following links
+        subtree = []
+        stack = [uuid]
+        while len(stack) > 0:
+            section_id = stack.pop()
+            subtree.append(section_id)
+            for refs in self.__sections[section_id].section_properties.values():
+                stack.extend(ref.uuid for ref in refs if not ref.is_link and ref.uuid in self.__sections)
+        removed = set(subtree)
+
+        # detach the subtree from its parent and from all sections linking into it
+        parent_uuid, parent_prop = self.get_parent(uuid)
+        if parent_uuid is not None:
+            self.__remove_refs_to(parent_uuid, parent_prop, uuid)
+        for section_id in subtree:
+            for linking_uuid, linking_prop in tuple(self.__links.get(section_id, ())):
+                if linking_uuid not in removed:
+                    self.__remove_refs_to(linking_uuid, linking_prop, section_id)
+
+        for section_id in subtree:
+            section = self.__sections[section_id]
+            for p, refs in section.section_properties.items():
+                self._unindex_refs(section_id, p, refs)
+            self._unindex_section(section)
+            self.__parents.pop(section_id, None)
             del self.__sections[section_id]
 
-        remove_with_subsections(uuid)
-
         if len(self.__sections) == 0:
             self.__doc.set_root(None)
 
+    def clear(self):
+        self.__doc.assert_writable()
+        self.__epoch += 1
+        self.__sections.clear()
+        self.__parents.clear()
+        self.__links.clear()
+        self.__indexes.clear()
+        for index in self.__value_indexes.values():
+            index._clear()
+        self.__doc.set_root(None)
+
     def __len__(self):
         return len(self.__sections)
 
@@ -301,6 +540,9 @@ class MemSectionMap(base.BaseSectionMap):
 
 class MemSection(base.BaseSection):
 
+    __slots__ = ("__doc", "__type", "__uuid", "__label", "__reference", "__is_linked",
+                 "__section_properties", "__value_properties")
+
     # noinspection PyShadowingBuiltins
     def __init__(self, doc, type, uuid, label, reference, is_linked):
         self.__doc = doc
@@ -309,8 +551,9 @@ class MemSection(base.BaseSection):
         self.__label = label
         self.__reference = reference
         self.__is_linked = is_linked
-        self.__sections_properties = MemSectionPropertyMap(doc)
-        self.__value_properties = MemValuePropertyMap(doc)
+        # property maps are created on first access, most leaf sections never need both
+        self.__section_properties = None
+        self.__value_properties = None
 
     def is_linked(self):
         return self.__is_linked
@@ -324,14 +567,18 @@ class MemSection(base.BaseSection):
     # noinspection PyShadowingBuiltins
     def set_type(self, type, check=False):
         self.__doc.assert_writable()
-        self.__type = type
+        self.__doc.sections._unindex_section(self)
+        self.__type = _intern(type)
+        self.__doc.sections._index_section(self)
 
     def get_label(self):
         return self.__label
 
     def set_label(self, label):
         self.__doc.assert_writable()
+        self.__doc.sections._unindex("label", self.__label, self.__uuid)
         self.__label = label
+        self.__doc.sections._index("label", label, self.__uuid)
 
     def get_reference(self):
         return self.__reference
@@ -342,55 +589,186 @@ class MemSection(base.BaseSection):
 
     @property
     def section_properties(self):
-        return self.__sections_properties
+        if self.__section_properties is None:
+            self.__section_properties = MemSectionPropertyMap(self.__doc, self.__uuid)
+        return self.__section_properties
 
     @property
     def value_properties(self):
+        if self.__value_properties is None:
+            self.__value_properties = MemValuePropertyMap(self.__doc, self.__uuid)
         return self.__value_properties
 
+    def _has_section_properties(self):
+        return self.__section_properties is not None and len(self.__section_properties) > 0
+
+    def _has_value_properties(self):
+        return self.__value_properties is not None and len(self.__value_properties) > 0
+
+    def _has_property(self, prop):
+        return (self.__section_properties is not None and prop in self.__section_properties) or \
+               (self.__value_properties is not None and prop in self.__value_properties)
+
+    def _property_names(self):
+        names = set()
+        for props in (self.__section_properties, self.__value_properties):
+            if props is not None:
+                names.update(props)
+        return names
+
+
+# shared by all empty property maps, replaced by a new dict on the first write
+_EMPTY = {}
+
 
 class MemSectionPropertyMap(base.BaseSectionPropertyMap):
 
-    def __init__(self, doc):
+    __slots__ = ("__doc", "__uuid", "__section_props", "__sorted")
+
+    def __init__(self, doc, uuid):
         self.__doc = doc
-        self.__section_props = SortedDict()
+        self.__uuid = uuid
+        self.__section_props = _EMPTY
+        # sorted property names, built on iteration and dropped when properties are added or removed
+        self.__sorted = None
 
     def set(self, prop, refs):
         self.__doc.assert_writable()
-        self.__section_props[prop] = refs
+        if prop in self.__section_props:
+            self.__doc.sections._unindex_refs(self.__uuid, prop, self.__section_props[prop])
+        else:
+            if self.__section_props is _EMPTY:
+                self.__section_props = {}
+            self.__sorted = None
+            self.__doc.sections._index("property", prop, self.__uuid)
+        # always use a new container, since the old one may be referenced elsewhere
+        self.__section_props[_intern(prop)] = MemSectionRefs()
+        self.extend(prop, refs)
+
+    def append(self, prop, ref):
+        self.extend(prop, (ref, ))
+
+    def extend(self, prop, refs):
+        self.__doc.assert_writable()
+        refs = tuple(refs)
+        container = self.__section_props.get(prop)
+        if container is None:
+            if self.__section_props is _EMPTY:
+                self.__section_props = {}
+            prop = _intern(prop)
+            container = self.__section_props[prop] = MemSectionRefs()
+            self.__sorted = None
+            self.__doc.sections._index("property", prop, self.__uuid)
+        container._extend(refs)
+        self.__doc.sections._index_refs(self.__uuid, prop, refs)
 
     def __setitem__(self, prop, refs):
-        self.__doc.assert_writable()
-        self.__section_props[prop] = refs
+        self.set(prop, refs)
 
     def __getitem__(self, prop):
         return self.__section_props[prop]
 
     def __delitem__(self, prop):
         self.__doc.assert_writable()
-        del self.__section_props[prop]
+        refs = self.__section_props.pop(prop)
+        self.__sorted = None
+        self.__doc.sections._unindex_refs(self.__uuid, prop, refs)
+        self.__doc.sections._unindex_property(self.__uuid, prop)
+
+    def __contains__(self, prop):
+        return prop in self.__section_props
 
     def __len__(self):
         return len(self.__section_props)
 
     def __iter__(self):
-        return iter(self.__section_props)
+        if self.__sorted is None:
+            self.__sorted = sorted(self.__section_props)
+        return iter(self.__sorted)
+
+
+class MemSectionRefs(Sequence):
+    """
+    Read only sequence of section references which grows in amortized constant time.
+    Compares equal to tuples containing the same references.
+    """
+
+    __slots__ = ("__refs", )
+
+    def __init__(self):
+        self.__refs = []
+
+    def _extend(self, refs):
+        self.__refs.extend(refs)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self.__refs[index])
+        return self.__refs[index]
+
+    def __len__(self):
+        return len(self.__refs)
+
+    def __iter__(self):
+        return iter(self.__refs)
+
+    def __add__(self, other):
+        return tuple(self.__refs) + tuple(other)
+
+    def __eq__(self, other):
+        if isinstance(other, Sequence):
+            return tuple(self) == tuple(other)
+        return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "MemSectionRefs(%s)" % repr(tuple(self.__refs))
 
 
 class MemValuePropertyMap(base.BaseValuePropertyMap):
 
-    def __init__(self, doc):
+    __slots__ = ("__doc", "__uuid", "__value_props", "__sorted")
+
+    def __init__(self, doc, uuid):
         self.__doc = doc
-        self.__value_props = SortedDict()
+        self.__uuid = uuid
+        self.__value_props = _EMPTY
+        # sorted property names, built on iteration and dropped when properties are added or removed
+        self.__sorted = None
 
     def set(self, prop, value):
         self.__doc.assert_writable()
         if not isinstance(value, odml2.Value):
             raise ValueError("Type odml2.Value expected, but was %s" % type(value))
-        self.__value_props[prop] = value
+        old = self.__value_props.get(prop)
+        if old is None:
+            if self.__value_props is _EMPTY:
+                self.__value_props = {}
+            self.__sorted = None
+            self.__doc.sections._index("property", prop, self.__uuid)
+        self.__value_props[_intern(prop)] = value
+        self.__doc.sections._index_value(self.__uuid, prop, old, value)
+
+    def set_many(self, items):
+        self.__doc.assert_writable()
+        items = [(_intern(prop), value) for prop, value in items]
+        for _, value in items:
+            if not isinstance(value, odml2.Value):
+                raise ValueError("Type odml2.Value expected, but was %s" % type(value))
+        sections = self.__doc.sections
+        if self.__value_props is _EMPTY:
+            self.__value_props = {}
+        for prop, value in items:
+            old = self.__value_props.get(prop)
+            if old is None:
+                self.__sorted = None
+                sections._index("property", prop, self.__uuid)
+            self.__value_props[prop] = value
+            sections._index_value(self.__uuid, prop, old, value)
 
     def __setitem__(self, prop, value):
-        self.__doc.assert_writable()
         self.set(prop, value)
 
     def __getitem__(self, key):
@@ -398,10 +776,155 @@ class MemValuePropertyMap(base.BaseValuePropertyMap):
 
     def __delitem__(self, prop):
         self.__doc.assert_writable()
-        del self.__value_props[prop]
+        old = self.__value_props.pop(prop)
+        self.__sorted = None
+        self.__doc.sections._unindex_property(self.__uuid, prop)
+        self.__doc.sections._index_value(self.__uuid, prop, old, None)
+
+    def __contains__(self, prop):
+        return prop in self.__value_props
 
     def __len__(self):
         return len(self.__value_props)
 
     def __iter__(self):
-        return iter(self.__value_props)
+        if self.__sorted is None:
+            self.__sorted = sorted(self.__value_props)
+        return iter(self.__sorted)
+
+
+# values of different kinds are not comparable with each other and are sorted separately
+_VALUE_KINDS = ((bool, 0), (numbers.Number, 1), (dt.datetime, 2), (dt.date, 3), (dt.time, 4), (six.string_types, 5))
+# fast lookup for the exact types produced by the parsers
+_VALUE_RANKS = {bool: 0, float: 1, dt.datetime: 2, dt.date: 3, dt.time: 4}
+_VALUE_RANKS.update((kind, 1) for kind in six.integer_types)
+_VALUE_RANKS.update((kind, 5) for kind in six.string_types)
+
+
+def _sort_key(thing):
+    if isinstance(thing, odml2.ValueArray):
+        # arrays can't be ordered and are left out like NaN
+        return None
+    elif isinstance(thing, odml2.Value):
+        thing = thing.value
+    rank = _VALUE_RANKS.get(type(thing))
+    if rank is not None:
+        # NaN can't be ordered
+        return (rank, thing) if thing == thing else None
+    for kind, rank in _VALUE_KINDS:
+        if isinstance(thing, kind):
+            return (rank, thing) if thing == thing else None
+    raise ValueError("Can't compare '%s' with values" % repr(thing))
+
+
+class MemValueIndex(object):
+    """
+    Sorted index over the values of one property in all sections of one type. Values
+    of different kinds (bools, numbers, datetimes, dates, times and strings) are sorted
+    separately and queries only return values of the kind of their arguments.
+
+    :param type:    The type of the indexed sections.
+    :type type:     str
+    :param prop:    The name of the indexed property.
+    :type prop:     str
+    :param values:  Initial pairs of section uuid and value.
+    :type values:   list[tuple]
+    """
+
+    # noinspection PyShadowingBuiltins
+    def __init__(self, type, prop, values=()):
+        self.__type = type
+        self.__prop = prop
+        self.__size = 0
+        # sorting all keys at once is much faster than adding them one by one
+        entries = {}
+        for uuid, value in values:
+            key = _sort_key(value)
+            if key is not None:
+                entries.setdefault(key, set()).add(uuid)
+                self.__size += 1
+        # (rank, value) -> set of uuids
+        self.__entries = SortedDict(entries)
+
+    @property
+    def type(self):
+        return self.__type
+
+    @property
+    def prop(self):
+        return self.__prop
+
+    def _add(self, uuid, value):
+        key = _sort_key(value)
+        if key is not None:
+            self.__entries.setdefault(key, set()).add(uuid)
+            self.__size += 1
+
+    def _remove(self, uuid, value):
+        key = _sort_key(value)
+        uuids = self.__entries.get(key)
+        if uuids is not None and uuid in uuids:
+            uuids.remove(uuid)
+            self.__size -= 1
+            if len(uuids) == 0:
+                del self.__entries[key]
+
+    def _clear(self):
+        self.__entries.clear()
+        self.__size = 0
+
+    def range(self, minimum=None, maximum=None, inclusive=(True, True)):
+        """
+        :param minimum:     The lower bound or None for no lower bound.
+        :param maximum:     The upper bound or None for no upper bound.
+        :param inclusive:   Whether the lower and upper bound are part of the range.
+        :type inclusive:    tuple[bool]
+
+        :return: The uuids of all sections with values in the range in ascending order.
+                 Without bounds all sections are returned.
+        :rtype: list[str]
+        """
+        lower = _sort_key(minimum) if minimum is not None else None
+        upper = _sort_key(maximum) if maximum is not None else None
+        if lower is None and upper is None:
+            keys = iter(self.__entries)
+        else:
+            rank = (lower or upper)[0]
+            if upper is not None and upper[0] != rank:
+                raise ValueError("Lower and upper bound must be of the same kind")
+            # keys are (rank, value) and compare greater than (rank, ) and less than (rank + 1, )
+            keys = self.__entries.irange(lower or (rank, ), upper or (rank + 1, ), inclusive)
+        found = []
+        for key in keys:
+            found.extend(self.__entries[key])
+        return found
+
+    def equal(self, value):
+        """
+        :return: The uuids of all sections with a value equal to the given one.
+        :rtype: list[str]
+        """
+        return list(self.__entries.get(_sort_key(value), ()))
+
+    def top(self, k, largest=True):
+        """
+        :param k:           The maximum number of sections to return.
+        :type k:            int
+        :param largest:     If True return the sections with the largest values,
+                            otherwise those with the smallest.
+        :type largest:      bool
+
+        :return: The uuids of up to k sections ordered by their values.
+        :rtype: list[str]
+        """
+        found = []
+        keys = reversed(self.__entries) if largest else iter(self.__entries)
+        for key in keys:
+            for uuid in self.__entries[key]:
+                if len(found) == k:
+                    return found
+                found.append(uuid)
+        return found
+
+    def __len__(self):
+        return self.__size
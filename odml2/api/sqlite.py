@@ -0,0 +1,839 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Provides an attached back-end implementation which stores documents in a SQLite database.
+"""
+
+import os
+import six
+import json
+import numbers
+import sqlite3
+import datetime as dt
+from uuid import UUID
+from contextlib import contextmanager
+
+import odml2
+from odml2.api import base
+
+# NOTICE: Classes have a getter/setter pattern for attributes instead of
+#         properties in order to distinguish more precisely between read-only
+#         and read-write attributes.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS document (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    format_version INTEGER NOT NULL,
+    author TEXT,
+    date_kind TEXT,
+    date TEXT,
+    version INTEGER,
+    root TEXT
+);
+CREATE TABLE IF NOT EXISTS namespaces (
+    prefix TEXT PRIMARY KEY,
+    uri TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS property_defs (
+    name TEXT PRIMARY KEY,
+    definition TEXT,
+    types TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS type_defs (
+    name TEXT PRIMARY KEY,
+    definition TEXT,
+    properties TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    uuid TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    label TEXT,
+    reference TEXT
+);
+CREATE INDEX IF NOT EXISTS sections_type ON sections (type);
+CREATE TABLE IF NOT EXISTS section_properties (
+    section TEXT NOT NULL,
+    prop TEXT NOT NULL,
+    PRIMARY KEY (section, prop)
+);
+CREATE TABLE IF NOT EXISTS section_refs (
+    section TEXT NOT NULL,
+    prop TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    uuid TEXT NOT NULL,
+    namespace TEXT,
+    is_link INTEGER NOT NULL,
+    PRIMARY KEY (section, prop, position)
+);
+CREATE INDEX IF NOT EXISTS section_refs_uuid ON section_refs (uuid);
+CREATE TABLE IF NOT EXISTS value_properties (
+    section TEXT NOT NULL,
+    prop TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    value,
+    unit TEXT,
+    uncertainty REAL,
+    PRIMARY KEY (section, prop)
+);
+"""
+
+DATETIME_FORMATS = ("%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S")
+TIME_FORMATS = ("%H:%M:%S.%f", "%H:%M:%S")
+
+
+def _strptime(string, formats):
+    for f in formats:
+        try:
+            return dt.datetime.strptime(string, f)
+        except ValueError:
+            pass
+    raise ValueError("Unable to parse date or time: '%s'" % string)
+
+
+def _encode(thing):
+    """
+    Encode a python object for storage in a column without a declared type.
+
+    :return: Tuple of kind and encoded object.
+    """
+    if thing is None:
+        return None, None
+    elif isinstance(thing, bool):
+        return "bool", int(thing)
+    elif isinstance(thing, six.integer_types):
+        return "int", thing
+    elif isinstance(thing, numbers.Number):
+        return "float", float(thing)
+    elif isinstance(thing, dt.datetime):
+        return "datetime", thing.isoformat()
+    elif isinstance(thing, dt.date):
+        return "date", thing.isoformat()
+    elif isinstance(thing, dt.time):
+        return "time", thing.isoformat()
+    elif isinstance(thing, six.string_types):
+        return "string", thing
+    else:
+        raise ValueError("Unable to store object of type %s" % type(thing))
+
+
+def _decode(kind, data):
+    if kind is None:
+        return None
+    elif kind == "bool":
+        return bool(data)
+    elif kind == "int":
+        return int(data)
+    elif kind == "float":
+        return float(data)
+    elif kind == "datetime":
+        return _strptime(data, DATETIME_FORMATS)
+    elif kind == "date":
+        return dt.datetime.strptime(data, "%Y-%m-%d").date()
+    elif kind == "time":
+        return _strptime(data, TIME_FORMATS).time()
+    else:
+        return data
+
+
+def _encode_value(value):
+    """
+    Encode a value for the value_properties table. The elements and uncertainties of value
+    arrays are stored as blobs and the kind contains the NumPy data type of the elements.
+
+    :return: Tuple of kind, encoded value, unit and uncertainty.
+    """
+    if isinstance(value, odml2.ValueArray):
+        uncertainty = value.uncertainty
+        return ("array:" + value.value.dtype.str, sqlite3.Binary(value.value.tobytes()), value.unit,
+                sqlite3.Binary(uncertainty.tobytes()) if uncertainty is not None else None)
+    kind, data = _encode(value.value)
+    return kind, data, value.unit, value.uncertainty
+
+
+def _decode_value(kind, data, unit, uncertainty):
+    if kind.startswith("array:"):
+        return odml2.ValueArray._from_buffers(kind[6:], bytes(data), unit,
+                                              bytes(uncertainty) if uncertainty is not None else None)
+    return odml2.Value(_decode(kind, data), unit, uncertainty)
+
+
+class SqliteDocument(base.BaseDocument):
+    """
+    An attached back-end that keeps the document in a SQLite database. All changes are
+    written to the database immediately and sections are only read on access.
+
+    Newly created documents are kept in an in memory database until they are saved.
+    """
+
+    NAME = "sqlite"
+    FEXT = (".odml2.db", )
+    MIME = tuple()
+
+    def __init__(self, is_writable=True):
+        self.__is_writable = is_writable
+        self.__uri = None
+        self.__conn = None
+        self.__tx_depth = 0
+        self.__namespaces = SqliteNameSpaceMap(self)
+        self.__property_defs = SqlitePropertyDefMap(self)
+        self.__type_defs = SqliteTypeDefMap(self)
+        self.__sections = SqliteSectionMap(self)
+        self.__connect(":memory:")
+
+    def __connect(self, path):
+        conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        tables = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'document'").fetchall()
+        if len(tables) == 0:
+            if not self.__is_writable and path != ":memory:":
+                conn.close()
+                raise ValueError("Not an odML2 database: %s" % path)
+            conn.executescript(SCHEMA)
+            conn.execute("INSERT INTO document (id, format_version, version) VALUES (0, 2, 1)")
+        else:
+            format_version, = conn.execute("SELECT format_version FROM document").fetchone()
+            if format_version != 2:
+                conn.close()
+                raise RuntimeError("Format version must be 2")
+        if self.__conn is not None:
+            self.__conn.close()
+        self.__conn = conn
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Group several statements in one transaction. Transactions can be nested, only the
+        outermost transaction is committed.
+        """
+        if self.__tx_depth == 0:
+            self.__conn.execute("BEGIN")
+        self.__tx_depth += 1
+        try:
+            yield self.__conn
+        except BaseException:
+            self.__tx_depth -= 1
+            if self.__tx_depth == 0:
+                self.__conn.execute("ROLLBACK")
+            raise
+        else:
+            self.__tx_depth -= 1
+            if self.__tx_depth == 0:
+                self.__conn.execute("COMMIT")
+
+    def _execute(self, sql, params=()):
+        return self.__conn.execute(sql, params)
+
+    def _executemany(self, sql, params):
+        return self.__conn.executemany(sql, params)
+
+    def close(self):
+        """
+        Close the connection to the database.
+        """
+        if self.__conn is not None:
+            self.__conn.close()
+            self.__conn = None
+
+    def is_attached(self):
+        return True
+
+    def is_writable(self):
+        return self.__is_writable
+
+    def _set_writable(self, writable):
+        self.__is_writable = writable
+
+    def get_uri(self):
+        return self.__uri
+
+    def set_uri(self, uri):
+        self.assert_writable()
+        self.__uri = uri
+
+    def __get_meta(self, column):
+        return self._execute("SELECT %s FROM document" % column).fetchone()[0]
+
+    def __set_meta(self, column, value):
+        self._execute("UPDATE document SET %s = ?" % column, (value, ))
+
+    def get_date(self):
+        kind, date = self._execute("SELECT date_kind, date FROM document").fetchone()
+        return _decode(kind, date)
+
+    def set_date(self, date):
+        self.assert_writable()
+        kind, date = _encode(date)
+        self._execute("UPDATE document SET date_kind = ?, date = ?", (kind, date))
+
+    def get_author(self):
+        return self.__get_meta("author")
+
+    def set_author(self, author):
+        self.assert_writable()
+        self.__set_meta("author", author)
+
+    def get_version(self):
+        return self.__get_meta("version")
+
+    def set_version(self, version):
+        self.assert_writable()
+        self.__set_meta("version", version)
+
+    # noinspection PyShadowingBuiltins
+    def create_root(self, type, uuid, label, reference):
+        self.sections.add(type, uuid, label, reference, None, None)
+
+    def get_root(self):
+        return self.__get_meta("root")
+
+    def set_root(self, uuid):
+        self.assert_writable()
+        self.__set_meta("root", uuid)
+
+    @property
+    def namespaces(self):
+        return self.__namespaces
+
+    @property
+    def property_defs(self):
+        return self.__property_defs
+
+    @property
+    def type_defs(self):
+        return self.__type_defs
+
+    @property
+    def sections(self):
+        return self.__sections
+
+    def clear(self):
+        self.assert_writable()
+        with self._transaction():
+            self._execute("UPDATE document SET author = NULL, date_kind = NULL, date = NULL, " +
+                          "version = NULL, root = NULL")
+            self.__namespaces.clear()
+            self.__property_defs.clear()
+            self.__type_defs.clear()
+            self.__sections.clear()
+
+    def from_dict(self, data, trusted=False):
+        with self._transaction():
+            super(SqliteDocument, self).from_dict(data, trusted)
+
+    def load(self, io, uri=None, trusted=False):
+        """
+        Attach the document to an existing database.
+
+        :param io:      Ignored if an uri is given, otherwise the name of the I/O is used as path.
+        :param uri:     The path to the database file.
+        :param trusted: Has no effect, since attaching doesn't read any data.
+        """
+        path = uri if uri is not None else getattr(io, "name", None)
+        if path is None:
+            raise ValueError("A path is needed in order to load a SQLite document")
+        if not os.path.exists(path):
+            raise IOError("No such file: '%s'" % path)
+        self.__connect(path)
+        self.__namespaces.clear_cache()
+        self.__property_defs.invalidate()
+        self.__type_defs.invalidate()
+        self.__sections.invalidate()
+        self.__uri = path
+
+    def save(self, io, uri=None):
+        """
+        Copy the database to a new location and attach the document to the copy. Since changes
+        are persisted immediately, saving to the current location does nothing.
+
+        :param io:  Ignored if an uri is given, otherwise the name of the I/O is used as path.
+        :param uri: The path to the database file.
+        """
+        path = uri if uri is not None else getattr(io, "name", None)
+        if path is None:
+            raise ValueError("A path is needed in order to save a SQLite document")
+        if path == self.__uri:
+            return
+        if os.path.exists(path):
+            os.remove(path)
+        target = sqlite3.connect(path, isolation_level=None)
+        try:
+            if hasattr(self.__conn, "backup"):
+                self.__conn.backup(target)
+            else:
+                target.executescript("\n".join(self.__conn.iterdump()))
+        finally:
+            target.close()
+        self.__connect(path)
+        self.__uri = path
+
+
+class SqliteNameSpaceMap(base.BaseNameSpaceMap):
+
+    def __init__(self, doc):
+        self.__doc = doc
+        # keep namespace objects, since they cache the linked document
+        self.__cache = {}
+        self.__epoch = 0
+
+    @property
+    def epoch(self):
+        return self.__epoch
+
+    def clear_cache(self):
+        self.__cache.clear()
+        self.__epoch += 1
+
+    def set(self, prefix, uri):
+        self.__doc.assert_writable()
+        ns = odml2.NameSpace(prefix, uri)
+        self.__doc._execute("INSERT OR REPLACE INTO namespaces (prefix, uri) VALUES (?, ?)", (prefix, uri))
+        self.__cache[prefix] = ns
+        self.__epoch += 1
+
+    def __setitem__(self, prefix, ns):
+        self.__doc.assert_writable()
+        if prefix != ns.prefix:
+            raise KeyError("NameSpace prefix mismatch: %s != %s" % (prefix, ns.prefix))
+        self.set(prefix, ns.uri)
+
+    def __getitem__(self, prefix):
+        if prefix in self.__cache:
+            return self.__cache[prefix]
+        row = self.__doc._execute("SELECT uri FROM namespaces WHERE prefix = ?", (prefix, )).fetchone()
+        if row is None:
+            raise KeyError(prefix)
+        ns = self.__cache[prefix] = odml2.NameSpace(prefix, row[0])
+        return ns
+
+    def __delitem__(self, prefix):
+        self.__doc.assert_writable()
+        if prefix not in self:
+            raise KeyError(prefix)
+        self.__doc._execute("DELETE FROM namespaces WHERE prefix = ?", (prefix, ))
+        self.__cache.pop(prefix, None)
+        self.__epoch += 1
+
+    def __contains__(self, prefix):
+        return self.__doc._execute("SELECT 1 FROM namespaces WHERE prefix = ?", (prefix, )).fetchone() is not None
+
+    def __len__(self):
+        return self.__doc._execute("SELECT COUNT(*) FROM namespaces").fetchone()[0]
+
+    def __iter__(self):
+        rows = self.__doc._execute("SELECT prefix FROM namespaces ORDER BY prefix").fetchall()
+        return iter([r[0] for r in rows])
+
+    def clear(self):
+        self.__doc.assert_writable()
+        self.__doc._execute("DELETE FROM namespaces")
+        self.__cache.clear()
+        self.__epoch += 1
+
+
+class SqlitePropertyDefMap(base.BasePropertyDefMap):
+
+    def __init__(self, doc):
+        self.__doc = doc
+        self.__epoch = 0
+
+    @property
+    def epoch(self):
+        return self.__epoch
+
+    def invalidate(self):
+        """
+        Must be called when the definitions were changed outside of the map, e.g. when the
+        document is attached to another database.
+        """
+        self.__epoch += 1
+
+    def set(self, name, definition=None, types=frozenset()):
+        self.__doc.assert_writable()
+        pd = odml2.PropertyDef(name, definition, types)
+        self.__doc._execute("INSERT OR REPLACE INTO property_defs (name, definition, types) VALUES (?, ?, ?)",
+                            (name, definition, json.dumps(sorted(pd.types))))
+        self.__epoch += 1
+
+    def __setitem__(self, name, pd):
+        self.__doc.assert_writable()
+        if name != pd.name:
+            raise KeyError("Property name mismatch: %s != %s" % (name, pd.name))
+        self.set(name, pd.definition, pd.types)
+
+    def __getitem__(self, name):
+        row = self.__doc._execute("SELECT definition, types FROM property_defs WHERE name = ?", (name, )).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return odml2.PropertyDef(name, row[0], json.loads(row[1]))
+
+    def __delitem__(self, name):
+        self.__doc.assert_writable()
+        if name not in self:
+            raise KeyError(name)
+        self.__doc._execute("DELETE FROM property_defs WHERE name = ?", (name, ))
+        self.__epoch += 1
+
+    def __contains__(self, name):
+        return self.__doc._execute("SELECT 1 FROM property_defs WHERE name = ?", (name, )).fetchone() is not None
+
+    def __len__(self):
+        return self.__doc._execute("SELECT COUNT(*) FROM property_defs").fetchone()[0]
+
+    def __iter__(self):
+        rows = self.__doc._execute("SELECT name FROM property_defs ORDER BY name").fetchall()
+        return iter([r[0] for r in rows])
+
+    def clear(self):
+        self.__doc.assert_writable()
+        self.__doc._execute("DELETE FROM property_defs")
+        self.__epoch += 1
+
+
+class SqliteTypeDefMap(base.BaseTypeDefMap):
+
+    def __init__(self, doc):
+        self.__doc = doc
+        self.__epoch = 0
+
+    @property
+    def epoch(self):
+        return self.__epoch
+
+    def invalidate(self):
+        """
+        Must be called when the definitions were changed outside of the map, e.g. when the
+        document is attached to another database.
+        """
+        self.__epoch += 1
+
+    def set(self, name, definition=None, properties=frozenset()):
+        self.__doc.assert_writable()
+        td = odml2.TypeDef(name, definition, properties)
+        self.__doc._execute("INSERT OR REPLACE INTO type_defs (name, definition, properties) VALUES (?, ?, ?)",
+                            (name, definition, json.dumps(sorted(td.properties))))
+        self.__epoch += 1
+
+    def __setitem__(self, name, td):
+        self.__doc.assert_writable()
+        if name != td.name:
+            raise KeyError("Name mismatch: %s != %s" % (name, td.name))
+        self.set(name, td.definition, td.properties)
+
+    def __getitem__(self, name):
+        row = self.__doc._execute("SELECT definition, properties FROM type_defs WHERE name = ?",
+                                  (name, )).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return odml2.TypeDef(name, row[0], json.loads(row[1]))
+
+    def __delitem__(self, name):
+        self.__doc.assert_writable()
+        if name not in self:
+            raise KeyError(name)
+        self.__doc._execute("DELETE FROM type_defs WHERE name = ?", (name, ))
+        self.__epoch += 1
+
+    def __contains__(self, name):
+        return self.__doc._execute("SELECT 1 FROM type_defs WHERE name = ?", (name, )).fetchone() is not None
+
+    def __len__(self):
+        return self.__doc._execute("SELECT COUNT(*) FROM type_defs").fetchone()[0]
+
+    def __iter__(self):
+        rows = self.__doc._execute("SELECT name FROM type_defs ORDER BY name").fetchall()
+        return iter([r[0] for r in rows])
+
+    def clear(self):
+        self.__doc.assert_writable()
+        self.__doc._execute("DELETE FROM type_defs")
+        self.__epoch += 1
+
+
+class SqliteSectionMap(base.BaseSectionMap):
+
+    def __init__(self, doc):
+        self.__doc = doc
+        self.__epoch = 0
+
+    @property
+    def epoch(self):
+        return self.__epoch
+
+    def invalidate(self):
+        """
+        Must be called when the sections were replaced without being removed, e.g. when the
+        document is attached to another database.
+        """
+        self.__epoch += 1
+
+    # noinspection PyShadowingBuiltins
+    def add(self, type, uuid, label, reference, parent_uuid, parent_prop):
+        self.__doc.assert_writable()
+        if isinstance(uuid, UUID):
+            uuid = str(uuid)
+        if parent_uuid is None and parent_prop is None:
+            # add a new root section
+            with self.__doc._transaction():
+                self.clear()
+                self.__insert(type, uuid, label, reference)
+                self.__doc.set_root(uuid)
+        elif parent_uuid is not None and parent_prop is not None:
+            # add a new sub section
+            if uuid in self:
+                raise ValueError("A section with the given uuid '%s' does already exist" % uuid)
+
+            parent = self.get(parent_uuid)
+            if parent is None:
+                raise ValueError("Parent section with uuid '%s' does not exist" % parent_uuid)
+
+            with self.__doc._transaction():
+                if parent_prop in parent.value_properties:
+                    del parent.value_properties[parent_prop]
+                self.__insert(type, uuid, label, reference)
+                parent.section_properties.append(parent_prop, base.SectionRef(uuid, None, False))
+        else:
+            raise RuntimeError("Parent uuid and prop must be either both None or both not None!")
+
+    def add_many(self, records):
+        with self.__doc._transaction():
+            super(SqliteSectionMap, self).add_many(records)
+
+    # noinspection PyShadowingBuiltins
+    def __insert(self, type, uuid, label, reference):
+        self.__doc._execute("INSERT INTO sections (uuid, type, label, reference) VALUES (?, ?, ?, ?)",
+                            (uuid, type, label, reference))
+
+    def add_link(self, uuid, prefix, parent_uuid, parent_prop):
+        parent = self[parent_uuid]
+
+        with self.__doc._transaction():
+            if parent_prop in parent.value_properties:
+                del parent.value_properties[parent_prop]
+            parent.section_properties.append(parent_prop, base.SectionRef(uuid, prefix, True))
+
+    def get_parent(self, uuid):
+        row = self.__doc._execute("SELECT section, prop FROM section_refs WHERE uuid = ? AND is_link = 0",
+                                  (uuid, )).fetchone()
+        return tuple(row) if row is not None else (None, None)
+
+    def __setitem__(self, uuid, value):
+        self.__doc.assert_writable()
+        # TODO maybe implement later (but is not needed at the moment)
+        raise NotImplementedError()
+
+    def __getitem__(self, uuid):
+        if uuid not in self:
+            raise KeyError(uuid)
+        return SqliteSection(self.__doc, uuid)
+
+    def __contains__(self, uuid):
+        return self.__doc._execute("SELECT 1 FROM sections WHERE uuid = ?", (uuid, )).fetchone() is not None
+
+    def __delitem__(self, uuid):
+        self.__doc.assert_writable()
+        if uuid not in self:
+            raise KeyError("A section with the given uuid '%s' does not exist" % uuid)
+        self.__epoch += 1
+
+        with self.__doc._transaction():
+            execute = self.__doc._execute
+            execute("CREATE TEMP TABLE IF NOT EXISTS subtree (uuid TEXT PRIMARY KEY)")
+            execute("DELETE FROM subtree")
+            execute("INSERT INTO subtree WITH RECURSIVE tree(uuid) AS (" +
+                    "VALUES (?) UNION SELECT r.uuid FROM section_refs r JOIN tree t ON r.section = t.uuid " +
+                    "WHERE r.is_link = 0) SELECT uuid FROM tree", (uuid, ))
+            # refs from the parent and links from other sections
+            execute("DELETE FROM section_refs WHERE uuid IN (SELECT uuid FROM subtree)")
+            for table in ("section_refs", "section_properties", "value_properties"):
+                execute("DELETE FROM %s WHERE section IN (SELECT uuid FROM subtree)" % table)
+            execute("DELETE FROM sections WHERE uuid IN (SELECT uuid FROM subtree)")
+            execute("DELETE FROM subtree")
+
+            if len(self) == 0:
+                self.__doc.set_root(None)
+
+    def clear(self):
+        self.__doc.assert_writable()
+        self.__epoch += 1
+        with self.__doc._transaction():
+            for table in ("sections", "section_properties", "section_refs", "value_properties"):
+                self.__doc._execute("DELETE FROM %s" % table)
+            self.__doc.set_root(None)
+
+    def __len__(self):
+        return self.__doc._execute("SELECT COUNT(*) FROM sections").fetchone()[0]
+
+    def __iter__(self):
+        cursor = self.__doc._execute("SELECT uuid FROM sections ORDER BY rowid")
+        return iter([r[0] for r in cursor])
+
+
+class SqliteSection(base.BaseSection):
+
+    def __init__(self, doc, uuid):
+        self.__doc = doc
+        self.__uuid = uuid
+        self.__sections_properties = SqliteSectionPropertyMap(doc, uuid)
+        self.__value_properties = SqliteValuePropertyMap(doc, uuid)
+
+    def __get(self, column):
+        row = self.__doc._execute("SELECT %s FROM sections WHERE uuid = ?" % column, (self.__uuid, )).fetchone()
+        if row is None:
+            raise KeyError("A section with the given uuid '%s' does not exist" % self.__uuid)
+        return row[0]
+
+    def __set(self, column, value):
+        self.__doc.assert_writable()
+        self.__doc._execute("UPDATE sections SET %s = ? WHERE uuid = ?" % column, (value, self.__uuid))
+
+    def is_linked(self):
+        return False
+
+    def get_uuid(self):
+        return self.__uuid
+
+    def get_type(self):
+        return self.__get("type")
+
+    # noinspection PyShadowingBuiltins
+    def set_type(self, type, check=False):
+        self.__set("type", type)
+
+    def get_label(self):
+        return self.__get("label")
+
+    def set_label(self, label):
+        self.__set("label", label)
+
+    def get_reference(self):
+        return self.__get("reference")
+
+    def set_reference(self, reference):
+        self.__set("reference", reference)
+
+    @property
+    def section_properties(self):
+        return self.__sections_properties
+
+    @property
+    def value_properties(self):
+        return self.__value_properties
+
+
+class SqliteSectionPropertyMap(base.BaseSectionPropertyMap):
+
+    def __init__(self, doc, uuid):
+        self.__doc = doc
+        self.__uuid = uuid
+
+    def set(self, prop, refs):
+        self.__doc.assert_writable()
+        with self.__doc._transaction():
+            self.__doc._execute("DELETE FROM section_refs WHERE section = ? AND prop = ?", (self.__uuid, prop))
+            self.extend(prop, refs)
+
+    def extend(self, prop, refs):
+        self.__doc.assert_writable()
+        with self.__doc._transaction():
+            execute = self.__doc._execute
+            execute("INSERT OR IGNORE INTO section_properties (section, prop) VALUES (?, ?)", (self.__uuid, prop))
+            start, = execute("SELECT COALESCE(MAX(position) + 1, 0) FROM section_refs WHERE section = ? AND prop = ?",
+                             (self.__uuid, prop)).fetchone()
+            self.__doc._executemany(
+                "INSERT INTO section_refs (section, prop, position, uuid, namespace, is_link) " +
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((self.__uuid, prop, start + i, ref.uuid, ref.namespace, int(ref.is_link))
+                 for i, ref in enumerate(refs))
+            )
+
+    def __setitem__(self, prop, refs):
+        self.set(prop, refs)
+
+    def __getitem__(self, prop):
+        if prop not in self:
+            raise KeyError(prop)
+        cursor = self.__doc._execute("SELECT uuid, namespace, is_link FROM section_refs " +
+                                     "WHERE section = ? AND prop = ? ORDER BY position", (self.__uuid, prop))
+        return tuple(base.SectionRef(uuid, namespace, bool(is_link)) for uuid, namespace, is_link in cursor)
+
+    def __delitem__(self, prop):
+        self.__doc.assert_writable()
+        if prop not in self:
+            raise KeyError(prop)
+        with self.__doc._transaction():
+            self.__doc._execute("DELETE FROM section_refs WHERE section = ? AND prop = ?", (self.__uuid, prop))
+            self.__doc._execute("DELETE FROM section_properties WHERE section = ? AND prop = ?", (self.__uuid, prop))
+
+    def __contains__(self, prop):
+        return self.__doc._execute("SELECT 1 FROM section_properties WHERE section = ? AND prop = ?",
+                                   (self.__uuid, prop)).fetchone() is not None
+
+    def __len__(self):
+        return self.__doc._execute("SELECT COUNT(*) FROM section_properties WHERE section = ?",
+                                   (self.__uuid, )).fetchone()[0]
+
+    def __iter__(self):
+        cursor = self.__doc._execute("SELECT prop FROM section_properties WHERE section = ? ORDER BY prop",
+                                     (self.__uuid, ))
+        return iter([r[0] for r in cursor])
+
+
+class SqliteValuePropertyMap(base.BaseValuePropertyMap):
+
+    def __init__(self, doc, uuid):
+        self.__doc = doc
+        self.__uuid = uuid
+
+    def set(self, prop, value):
+        self.__doc.assert_writable()
+        if not isinstance(value, odml2.Value):
+            raise ValueError("Type odml2.Value expected, but was %s" % type(value))
+        self.__doc._execute("INSERT OR REPLACE INTO value_properties (section, prop, kind, value, unit, uncertainty) " +
+                            "VALUES (?, ?, ?, ?, ?, ?)", (self.__uuid, prop) + _encode_value(value))
+
+    def set_many(self, items):
+        self.__doc.assert_writable()
+        rows = []
+        for prop, value in items:
+            if not isinstance(value, odml2.Value):
+                raise ValueError("Type odml2.Value expected, but was %s" % type(value))
+            rows.append((self.__uuid, prop) + _encode_value(value))
+        with self.__doc._transaction():
+            self.__doc._executemany("INSERT OR REPLACE INTO value_properties " +
+                                    "(section, prop, kind, value, unit, uncertainty) VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def __setitem__(self, prop, value):
+        self.set(prop, value)
+
+    def __getitem__(self, prop):
+        row = self.__doc._execute("SELECT kind, value, unit, uncertainty FROM value_properties " +
+                                  "WHERE section = ? AND prop = ?", (self.__uuid, prop)).fetchone()
+        if row is None:
+            raise KeyError(prop)
+        return _decode_value(*row)
+
+    def __delitem__(self, prop):
+        self.__doc.assert_writable()
+        if prop not in self:
+            raise KeyError(prop)
+        self.__doc._execute("DELETE FROM value_properties WHERE section = ? AND prop = ?", (self.__uuid, prop))
+
+    def __contains__(self, prop):
+        return self.__doc._execute("SELECT 1 FROM value_properties WHERE section = ? AND prop = ?",
+                                   (self.__uuid, prop)).fetchone() is not None
+
+    def __len__(self):
+        return self.__doc._execute("SELECT COUNT(*) FROM value_properties WHERE section = ?",
+                                   (self.__uuid, )).fetchone()[0]
+
+    def __iter__(self):
+        cursor = self.__doc._execute("SELECT prop FROM value_properties WHERE section = ? ORDER BY prop",
+                                     (self.__uuid, ))
+        return iter([r[0] for r in cursor])
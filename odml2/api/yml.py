@@ -14,10 +14,24 @@ Provides a back-and implementation for yaml using the memory back-end base class
 
 import six
 import yaml
+import datetime
+import itertools
 from collections import OrderedDict
 
+import odml2
 from odml2.api import mem
 
+# use the LibYAML based loader and dumper if PyYAML was built with LibYAML support
+if hasattr(yaml, "CSafeLoader") and hasattr(yaml, "CSafeDumper"):
+    ENGINE = "libyaml"
+else:
+    ENGINE = "python"
+
+TIME_TAG = u"!time"
+TIME_FORMATS = ("%H:%M:%S.%f", "%H:%M:%S")
+# times in files written by earlier versions with the unsafe PyYAML dumper
+LEGACY_TIME_TAG = u"tag:yaml.org,2002:python/object/apply:datetime.time"
+
 
 class YamlDocument(mem.MemDocument):
 
@@ -28,12 +42,11 @@ class YamlDocument(mem.MemDocument):
     def __init__(self, is_writable=True):
         super(YamlDocument, self).__init__(is_writable)
 
-    def load(self, io, uri=None):
+    def load(self, io, uri=None, trusted=False):
         writable = self.is_writable()
         try:
-            data = yaml.load(io)
             self._set_writable(True)
-            self.from_dict(data)
+            YamlEventReader(self, io, trusted).read()
             self.set_uri(uri)
         finally:
             self._set_writable(writable)
@@ -42,32 +55,462 @@ class YamlDocument(mem.MemDocument):
         writable = self.is_writable()
         try:
             self._set_writable(True)
-            data = self.to_dict()
-            yaml_str = yaml.dump(data, default_flow_style=False, allow_unicode=True)
-            if six.PY2:
-                yaml_str = yaml_str.decode("utf-8")
-            io.write(yaml_str)
+            YamlEventWriter(self, io).write()
             self.set_uri(uri)
         finally:
             self._set_writable(writable)
 
 
+class YamlEventReader(object):
+    """
+    Reads a yaml document from a stream of parser events. Sections and values are created in
+    the back-end as soon as they are read, without building the whole document as dict first.
+
+    :param doc:     The document to fill.
+    :type doc:      odml2.api.base.BaseDocument
+    :param io:      The I/O to read the data from.
+    :param trusted: If True names and values are not checked.
+    :type trusted:  bool
+    """
+
+    HEADER = ("author", "date", "document_version", "namespaces", "definitions")
+
+    def __init__(self, doc, io, trusted=False):
+        self.__doc = doc
+        self.__trusted = trusted
+        self.__events = yaml.parse(io, Loader=LOADER)
+        self.__resolver = yaml.resolver.Resolver()
+        self.__constructor = Constructor()
+        self.__anchors = {}
+
+    def read(self):
+        self.__expect(yaml.StreamStartEvent)
+        self.__expect(yaml.DocumentStartEvent)
+        self.__expect(yaml.MappingStartEvent)
+        self.__check_format(self.__read_format_version())
+        self.__doc.clear()
+
+        while True:
+            event = self.__next()
+            if isinstance(event, yaml.MappingEndEvent):
+                break
+            key = self.__read_obj(event)
+            event = self.__next()
+            if key == "metadata" and isinstance(event, yaml.MappingStartEvent):
+                self.__read_section(None, None)
+            else:
+                element = self.__read_obj(event)
+                if key in self.HEADER:
+                    self.__doc._header_from_obj(key, element, self.__trusted)
+                elif key == "metadata" and element is not None:
+                    self.__doc._section_from_dict(None, None, element, self.__trusted)
+
+        self.__expect(yaml.DocumentEndEvent)
+
+    def __read_format_version(self):
+        """
+        Read ahead to the format version, which may legally come after the metadata, so that
+        the document is only cleared if the version is supported. Events on the way are
+        buffered and replayed afterwards, which costs nothing if the version comes first.
+        """
+        buffered = []
+        depth = 0
+        is_key = True
+        for event in self.__events:
+            if depth == 0 and is_key and isinstance(event, yaml.ScalarEvent) and event.value == "format_version":
+                event = next(self.__events)
+                format_version = self.__read_obj(event) if isinstance(event, yaml.ScalarEvent) else None
+                self.__events = itertools.chain(buffered, self.__events)
+                return format_version
+            buffered.append(event)
+            if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                depth += 1
+            elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                depth -= 1
+                if depth < 0:
+                    return None
+            if depth == 0:
+                is_key = not is_key
+        return None
+
+    @staticmethod
+    def __check_format(format_version):
+        if format_version != 2:
+            raise RuntimeError("Format version must be 2")
+
+    def __next(self):
+        return next(self.__events)
+
+    def __expect(self, event_type):
+        event = self.__next()
+        if not isinstance(event, event_type):
+            raise ValueError("Unexpected yaml event %s" % event)
+        return event
+
+    class SectionState(object):
+        """
+        State of a section while it is read.
+        """
+
+        def __init__(self, parent_uuid, parent_prop):
+            self.parent_uuid = parent_uuid
+            self.parent_prop = parent_prop
+            self.header = {}
+            self.buffered = []
+            # values of a trusted document, which are set all at once
+            self.values = []
+            self.uuid = None
+            self.sequence_prop = None
+
+    def __read_section(self, parent_uuid, parent_prop):
+        """
+        Read a section with all sub sections after its mapping start event. A section is created
+        as soon as its uuid and type are known, all properties read before are buffered.
+        Sub sections are read with an explicit stack, since the section tree can be arbitrarily deep.
+        """
+        stack = [self.SectionState(parent_uuid, parent_prop)]
+        while len(stack) > 0:
+            state = stack[-1]
+            event = self.__next()
+
+            if state.sequence_prop is not None:
+                # inside a sequence of sub sections
+                if isinstance(event, yaml.SequenceEndEvent):
+                    state.sequence_prop = None
+                elif isinstance(event, yaml.MappingStartEvent):
+                    stack.append(self.SectionState(state.uuid, state.sequence_prop))
+                else:
+                    self.__doc._property_from_obj(state.uuid, state.sequence_prop, [self.__read_obj(event)],
+                                                  self.__trusted)
+                continue
+
+            if isinstance(event, yaml.MappingEndEvent):
+                if state.uuid is None:
+                    raise ValueError("A section needs at least a uuid and a type")
+                if len(state.values) > 0:
+                    self.__doc.sections[state.uuid].value_properties.set_many(state.values)
+                stack.pop()
+                continue
+
+            prop = self.__read_obj(event)
+            event = self.__next()
+            if prop in ("uuid", "type", "label", "reference"):
+                element = self.__read_obj(event)
+                if state.uuid is None:
+                    state.header[prop] = element
+                    if "uuid" in state.header and "type" in state.header:
+                        state.uuid = state.header["uuid"]
+                        self.__create_section(state.parent_uuid, state.parent_prop, state.header)
+                        for p, e in state.buffered:
+                            self.__doc._property_from_obj(state.uuid, p, e, self.__trusted)
+                        state.buffered = None
+                elif prop == "label":
+                    self.__doc.sections[state.uuid].set_label(element)
+                elif prop == "reference":
+                    self.__doc.sections[state.uuid].set_reference(element)
+                else:
+                    raise ValueError("Duplicated key '%s' in section '%s'" % (prop, state.uuid))
+            elif state.uuid is None:
+                state.buffered.append((prop, self.__read_obj(event)))
+            elif isinstance(event, yaml.MappingStartEvent):
+                stack.append(self.SectionState(state.uuid, prop))
+            elif isinstance(event, yaml.SequenceStartEvent) and (event.flow_style or event.tag == LEGACY_TIME_TAG):
+                # value arrays are written as flow sequences, old times as block sequences
+                self.__doc._property_from_obj(state.uuid, prop, self.__read_obj(event), self.__trusted)
+            elif isinstance(event, yaml.SequenceStartEvent):
+                state.sequence_prop = prop
+            elif self.__trusted and isinstance(event, yaml.ScalarEvent):
+                state.values.append((prop, odml2.Value._from_trusted_obj(self.__read_obj(event))))
+            else:
+                self.__doc._property_from_obj(state.uuid, prop, self.__read_obj(event), self.__trusted)
+
+    def __create_section(self, parent_uuid, parent_prop, header):
+        if parent_uuid is None:
+            self.__doc.create_root(header["type"], header["uuid"], header.get("label"), header.get("reference"))
+        else:
+            self.__doc.sections.add(header["type"], header["uuid"], header.get("label"), header.get("reference"),
+                                    parent_uuid, parent_prop)
+
+    def __read_obj(self, event):
+        """
+        Read a python object starting with the given event.
+        """
+        if isinstance(event, yaml.ScalarEvent):
+            tag = event.tag
+            if tag is None or tag == u"!":
+                tag = self.__resolver.resolve(yaml.ScalarNode, event.value, event.implicit)
+            node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, event.style)
+            constructors = self.__constructor.yaml_constructors
+            obj = constructors.get(tag, constructors[None])(self.__constructor, node)
+        elif isinstance(event, yaml.SequenceStartEvent):
+            obj = []
+            while True:
+                sub = self.__next()
+                if isinstance(sub, yaml.SequenceEndEvent):
+                    break
+                obj.append(self.__read_obj(sub))
+            if event.tag == LEGACY_TIME_TAG:
+                obj = _legacy_time(obj)
+        elif isinstance(event, yaml.MappingStartEvent):
+            obj = {}
+            while True:
+                sub = self.__next()
+                if isinstance(sub, yaml.MappingEndEvent):
+                    break
+                key = self.__read_obj(sub)
+                obj[key] = self.__read_obj(self.__next())
+        elif isinstance(event, yaml.AliasEvent):
+            if event.anchor not in self.__anchors:
+                raise ValueError("Unknown or unsupported yaml alias '%s'" % event.anchor)
+            return self.__anchors[event.anchor]
+        else:
+            raise ValueError("Unexpected yaml event %s" % event)
+        if event.anchor is not None:
+            self.__anchors[event.anchor] = obj
+        return obj
+
+
+class YamlEventWriter(object):
+    """
+    Writes a document as a stream of yaml events. Sections are written one after another directly
+    to the I/O without creating the whole document as dict first. The output is the same as if the
+    dict created by :meth:`~odml2.api.base.BaseDocument.to_dict` was dumped with :data:`DUMPER`.
+
+    :param doc: The document to write.
+    :type doc:  odml2.api.base.BaseDocument
+    :param io:  The I/O to write the data to.
+    """
+
+    def __init__(self, doc, io):
+        self.__doc = doc
+        self.__dumper = DUMPER(io, default_flow_style=False, allow_unicode=True, encoding=None)
+
+    def write(self):
+        self.__dumper.emit(yaml.StreamStartEvent())
+        self.__dumper.emit(yaml.DocumentStartEvent(explicit=None))
+        self.__write_document()
+        self.__dumper.emit(yaml.DocumentEndEvent(explicit=None))
+        self.__dumper.emit(yaml.StreamEndEvent())
+        self.__dumper.dispose()
+
+    def __write_document(self):
+        self.__write_mapping_start()
+        for key, element in self.__doc._header_to_dict().items():
+            self.__write_obj(key)
+            self.__write_obj(element)
+        self.__write_obj("metadata")
+        root = self.__doc.get_root()
+        if root is not None:
+            self.__write_sections(root)
+        else:
+            self.__write_obj(None)
+        self.__write_mapping_end()
+
+    def __write_sections(self, root):
+        stack = [self.__write_section(root)]
+        while len(stack) > 0:
+            sub_section = next(stack[-1], None)
+            if sub_section is None:
+                stack.pop()
+            else:
+                stack.append(self.__write_section(sub_section))
+
+    def __write_section(self, uuid):
+        """
+        Writes a section and yields the uuids of all sub sections which have to be written in
+        between.
+        """
+        self.__write_mapping_start()
+        for key, element in self.__doc._section_head_to_dict(uuid).items():
+            self.__write_obj(key)
+            self.__write_obj(element)
+        section = self.__doc.sections[uuid]
+        section_props = section.section_properties if section._has_section_properties() else ()
+        for prop in section_props:
+            refs = section_props[prop]
+            self.__write_obj(prop)
+            if len(refs) != 1:
+                self.__write_sequence_start(flow_style=False)
+            for ref in refs:
+                if ref.is_link:
+                    self.__write_obj(self.__doc._link_to_str(ref))
+                else:
+                    yield ref.uuid
+            if len(refs) != 1:
+                self.__write_sequence_end()
+        self.__write_mapping_end()
+
+    def __write_mapping_start(self):
+        self.__dumper.emit(yaml.MappingStartEvent(None, u"tag:yaml.org,2002:map", True, flow_style=None))
+
+    def __write_mapping_end(self):
+        self.__dumper.emit(yaml.MappingEndEvent())
+
+    def __write_sequence_start(self, flow_style=None):
+        self.__dumper.emit(yaml.SequenceStartEvent(None, u"tag:yaml.org,2002:seq", True, flow_style=flow_style))
+
+    def __write_sequence_end(self):
+        self.__dumper.emit(yaml.SequenceEndEvent())
+
+    def __write_obj(self, obj):
+        """
+        Writes objects of types used by to_dict like the respective representers do.
+        """
+        if isinstance(obj, OrderedDict):
+            self.__write_mapping_start()
+            for k, v in obj.items():
+                self.__write_obj(k)
+                self.__write_obj(v)
+            self.__write_mapping_end()
+        elif isinstance(obj, tuple):
+            # value arrays
+            self.__write_sequence_start(flow_style=True)
+            for v in obj:
+                self.__write_obj(v)
+            self.__write_sequence_end()
+        elif isinstance(obj, (frozenset, list)):
+            self.__write_sequence_start(flow_style=False if isinstance(obj, list) else None)
+            for v in obj:
+                self.__write_obj(v)
+            self.__write_sequence_end()
+        else:
+            self.__write_scalar(obj)
+
+    def __write_scalar(self, obj):
+        dumper = self.__dumper
+        # the dumper doesn't keep track of represented objects, since it ignores aliases
+        node = dumper.represent_data(obj)
+        if not isinstance(node, yaml.ScalarNode):
+            raise ValueError("Unable to write object of type %s" % type(obj))
+        detected_tag = dumper.resolve(yaml.ScalarNode, node.value, (True, False))
+        default_tag = dumper.resolve(yaml.ScalarNode, node.value, (False, True))
+        implicit = (node.tag == detected_tag, node.tag == default_tag)
+        dumper.emit(yaml.ScalarEvent(None, node.tag, implicit, node.value, style=node.style))
+
+
 def __ordered_dict_representer(dumper, od):
     nodes = [(dumper.represent_data(k), dumper.represent_data(v)) for k, v in od.items()]
     return yaml.nodes.MappingNode(u'tag:yaml.org,2002:map', nodes)
 
-yaml.add_representer(OrderedDict, __ordered_dict_representer)
-
 
 def __frozenset_representer(dumper, fs):
     nodes = [dumper.represent_data(v) for v in fs]
     return yaml.nodes.SequenceNode(u'tag:yaml.org,2002:seq', nodes)
 
-yaml.add_representer(frozenset, __frozenset_representer)
+
+def __tuple_representer(dumper, t):
+    # value arrays
+    nodes = [dumper.represent_data(v) for v in t]
+    return yaml.nodes.SequenceNode(u'tag:yaml.org,2002:seq', nodes, flow_style=True)
+
+
+def __time_representer(dumper, t):
+    # yaml has no type for times, the tag makes sure that they are read as times again
+    return dumper.represent_scalar(TIME_TAG, six.text_type(t.isoformat()))
+
+
+def __time_constructor(constructor, node):
+    value = constructor.construct_scalar(node)
+    for f in TIME_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, f).time()
+        except ValueError:
+            pass
+    raise ValueError("Unable to parse time: '%s'" % value)
+
+
+def _legacy_time(args):
+    """
+    Create a time from the arguments of a python/object/apply:datetime.time tag, which
+    is the pickle state of the time: hour, minute, second and three bytes microseconds.
+    """
+    state = args[0] if len(args) == 1 else None
+    if isinstance(state, six.text_type):
+        # written by python 2 as plain string if all bytes are ascii
+        state = state.encode("latin-1")
+    if not isinstance(state, bytes) or len(state) != 6:
+        raise ValueError("Unable to read time in old format: %r" % (args, ))
+    state = bytearray(state)
+    # the highest bit of the hour is the fold flag
+    return datetime.time(state[0] & 0x7F, state[1], state[2], (state[3] << 16) | (state[4] << 8) | state[5])
+
+
+def __legacy_time_constructor(constructor, node):
+    return _legacy_time(constructor.construct_sequence(node, deep=True))
+
 
 if six.PY2:
     def __unicode_str_representer(_, ustr):
         return yaml.nodes.ScalarNode(u'tag:yaml.org,2002:str', ustr)
 
-    # noinspection PyUnresolvedReferences
-    yaml.add_representer(unicode, __unicode_str_representer)
+
+class DumperMixin(object):
+    """
+    Documents contain only plain data without shared structures, therefore the dumpers of
+    this module never write anchors and aliases. This also allows :class:`YamlEventWriter`
+    to write the same output as the dumper without a pass over the whole document first.
+    """
+
+    # noinspection PyMethodMayBeStatic
+    def ignore_aliases(self, data):
+        return True
+
+
+class Dumper(DumperMixin, yaml.SafeDumper):
+    """
+    Safe dumper with representers for all types used by odML documents. The representers are
+    only added to the dumpers of this module, so that the global PyYAML dumpers are not modified.
+    """
+    pass
+
+
+class Constructor(yaml.constructor.SafeConstructor):
+    """
+    Safe constructor which also constructs times written by :class:`Dumper` or by earlier
+    versions, which used the unsafe PyYAML dumper.
+    """
+    pass
+
+
+class Loader(yaml.SafeLoader):
+    """
+    Safe loader which also constructs times written by :class:`Dumper` or by earlier
+    versions, which used the unsafe PyYAML dumper.
+    """
+    pass
+
+
+DUMPERS = [Dumper]
+LOADERS = [Loader, Constructor]
+
+if ENGINE == "libyaml":
+    class CDumper(DumperMixin, yaml.CSafeDumper):
+        """
+        LibYAML based variant of :class:`Dumper`.
+        """
+        pass
+
+    class CLoader(yaml.CSafeLoader):
+        """
+        LibYAML based variant of :class:`Loader`.
+        """
+        pass
+
+    DUMPERS.append(CDumper)
+    LOADERS.append(CLoader)
+    LOADER, DUMPER = CLoader, CDumper
+else:
+    LOADER, DUMPER = Loader, Dumper
+
+for __dumper in DUMPERS:
+    __dumper.add_representer(OrderedDict, __ordered_dict_representer)
+    __dumper.add_representer(frozenset, __frozenset_representer)
+    __dumper.add_representer(tuple, __tuple_representer)
+    __dumper.add_representer(datetime.time, __time_representer)
+    if six.PY2:
+        # noinspection PyUnresolvedReferences
+        __dumper.add_representer(unicode, __unicode_str_representer)
+
+for __loader in LOADERS:
+    __loader.add_constructor(TIME_TAG, __time_constructor)
+    __loader.add_constructor(LEGACY_TIME_TAG, __legacy_time_constructor)
@@ -10,6 +10,7 @@
 
 from uuid import uuid4
 
+import odml2
 from odml2.checks import *
 
 __all__ = ("SB", )
@@ -34,13 +35,82 @@ class SB(object):
 
     # noinspection PyProtectedMember
     def build(self, document, parent_uuid=None, parent_prop=None):
+        """
+        Create the section and all sub sections and values of the builder in the document.
+        All sections and values are passed to the back-end in one batch.
+
+        :param document:    The document to build the section in.
+        :type document:     :class:`~odml2.Document`
+        :param parent_uuid: The uuid of the parent section or None for a root section.
+        :type parent_uuid:  str
+        :param parent_prop: The property of the parent section.
+        :type parent_prop:  str
+        """
         if parent_uuid is None:
-            section = document.create_root(self.type, self.uuid, self.label, self.reference)
+            parent_type = None
         else:
             if parent_prop is None:
                 raise ValueError("A property name is needed in order to append a sub section")
             parent = document.find_section(parent_uuid)
-            section = parent._create_subsection(parent_prop, self.type, self.uuid, self.label, self.reference)
+            if parent is None:
+                raise ValueError("Parent section with uuid '%s' does not exist" % parent_uuid)
+            parent_type = parent.type
+
+        records, values, triples, deferred = self.__flatten(parent_type, parent_uuid, parent_prop)
+        strategy = document.terminology_strategy
+        for triple in triples:
+            strategy.handle_triple(document, *triple)
+
+        sections = document.back_end.sections
+        if parent_uuid is None:
+            document.create_root(self.type, self.uuid, self.label, self.reference)
+            records = records[1:]
+        sections.add_many(records)
+        for uuid, items in values:
+            sections[uuid].value_properties.set_many(items)
+        # sections may be linked or copied, which is left to the section
+        for uuid, p, thing in deferred:
+            document._get_section(uuid)[p] = thing
+
+    def __flatten(self, parent_type, parent_uuid, parent_prop):
+        """
+        :return: Section records in breadth first order, values per section uuid, distinct
+                 terminology triples and properties with sections which are set afterwards.
+        """
+        records = []
+        values = []
+        triples = []
+        seen = set()
+        deferred = []
+
+        def add_triple(triple):
+            if triple not in seen:
+                seen.add(triple)
+                triples.append(triple)
 
-        for p, thing in self.properties.items():
-            section[p] = thing
+        queue = [(self, parent_type, parent_uuid, parent_prop)]
+        for sb, p_type, p_uuid, p_prop in queue:
+            records.append((sb.type, sb.uuid, sb.label, sb.reference, p_uuid, p_prop))
+            if p_uuid is not None:
+                add_triple((p_type, p_prop, sb.type))
+            section_values = []
+            for p, thing in sb.properties.items():
+                if isinstance(thing, SB):
+                    queue.append((thing, sb.type, sb.uuid, p))
+                elif isinstance(thing, list):
+                    if any(isinstance(sub, odml2.Section) for sub in thing):
+                        deferred.append((sb.uuid, p, thing))
+                        continue
+                    for sub in thing:
+                        if not isinstance(sub, SB):
+                            raise ValueError("Section builder expected but was %s" % type(sub))
+                        queue.append((sub, sb.type, sb.uuid, p))
+                elif isinstance(thing, odml2.Section):
+                    deferred.append((sb.uuid, p, thing))
+                else:
+                    value = odml2.Value.from_obj(thing)
+                    add_triple((sb.type, p, value.type))
+                    section_values.append((p, value))
+            if len(section_values) > 0:
+                values.append((sb.uuid, section_values))
+        return records, values, triples, deferred
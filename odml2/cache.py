@@ -0,0 +1,201 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Provides a process wide cache for read-only documents such as terminologies linked via namespaces.
+"""
+
+# noinspection PyUnresolvedReferences
+from six.moves.urllib.parse import urlparse
+
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import odml2
+from odml2 import fetch
+
+__all__ = ("DocumentCache", "CacheStats", "NAMESPACE_CACHE")
+
+
+CacheStats = namedtuple("CacheStats", ("hits", "misses", "size", "max_size"))
+
+
+def resolve_uri(uri):
+    """
+    Resolve local paths and file uris to absolute paths. Other uris are returned unchanged.
+
+    :param uri: The uri or path to resolve.
+    :type uri:  str
+
+    :return: The resolved uri.
+    :rtype: str
+    """
+    parsed = urlparse(uri)
+    if parsed.scheme == "file":
+        return os.path.abspath(parsed.path)
+    elif parsed.scheme == "":
+        return os.path.abspath(uri)
+    return uri
+
+
+def source_version(path):
+    """
+    Get a token that changes whenever the data of a local file changes, based on its
+    modification time and size. Http sources are revalidated with conditional requests
+    by :class:`~.DocumentCache` instead.
+
+    :param path: A resolved path.
+    :type path:  str
+
+    :return: The version token or None if the version can't be determined.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return getattr(stat, "st_mtime_ns", stat.st_mtime), stat.st_size
+
+
+class DocumentCache(object):
+    """
+    A thread safe, size bounded cache of read-only documents keyed by their resolved uri.
+    The least recently used document is dropped when the cache is full. Cached documents are
+    validated against the modification time (local files) or ETag and Last-Modified header
+    (http) of their source on each access and reloaded if the source has changed.
+
+    :param max_size:    The maximum number of cached documents.
+    :type max_size:     int
+    """
+
+    def __init__(self, max_size=64):
+        self.__max_size = max_size
+        self.__entries = OrderedDict()
+        self.__lock = threading.RLock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__epoch = 0
+
+    @property
+    def epoch(self):
+        """
+        A counter which is incremented whenever a cached document is invalidated or reloaded
+        because its source has changed. Documents obtained from the cache are up to date as
+        long as the epoch doesn't change. This is a read only property.
+
+        :type:      int
+        """
+        return self.__epoch
+
+    @property
+    def max_size(self):
+        """
+        The maximum number of cached documents.
+
+        :type:      int
+        """
+        return self.__max_size
+
+    @max_size.setter
+    def max_size(self, max_size):
+        with self.__lock:
+            self.__max_size = max_size
+            self.__evict()
+
+    def get_document(self, uri):
+        """
+        Get a read-only document from the cache or load it if it's not cached or outdated.
+
+        :param uri:     The uri or path of the document.
+        :type uri:      str
+
+        :return:    The document the uri points to.
+        :rtype:     :class:`~.Document`
+        """
+        key = resolve_uri(uri)
+        result = None
+        if urlparse(key).scheme in ("http", "https"):
+            with self.__lock:
+                entry = self.__entries.get(key)
+            version = entry[0] if entry is not None else None
+            # a single conditional request, which only downloads the document if it changed
+            result = fetch.FETCHER.fetch(key, *(version or (None, None)))
+            if result is not None:
+                version = (result.etag, result.last_modified)
+                version = version if version != (None, None) else None
+        else:
+            version = source_version(key)
+
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            if entry is not None and version is not None and entry[0] == version:
+                self.__entries[key] = entry
+                self.__hits += 1
+                return entry[1]
+            self.__misses += 1
+            if entry is not None:
+                self.__epoch += 1
+
+        doc = odml2.Document()
+        if result is not None:
+            doc._load_fetched(result, is_writable=False)
+        else:
+            doc.load(key, is_writable=False)
+
+        with self.__lock:
+            self.__entries.pop(key, None)
+            self.__entries[key] = (version, doc)
+            self.__evict()
+        return doc
+
+    def invalidate(self, uri=None):
+        """
+        Remove a document from the cache.
+
+        :param uri:     The uri or path of the document. If None all documents are removed.
+        :type uri:      str
+        """
+        with self.__lock:
+            if uri is None:
+                self.__entries.clear()
+            else:
+                self.__entries.pop(resolve_uri(uri), None)
+            self.__epoch += 1
+
+    def stats(self):
+        """
+        :return:    Number of cache hits and misses, the current and the maximum size.
+        :rtype:     :class:`~.CacheStats`
+        """
+        with self.__lock:
+            return CacheStats(self.__hits, self.__misses, len(self.__entries), self.__max_size)
+
+    def reset_stats(self):
+        """
+        Reset the hit and miss counters.
+        """
+        with self.__lock:
+            self.__hits = 0
+            self.__misses = 0
+
+    def __contains__(self, uri):
+        with self.__lock:
+            return resolve_uri(uri) in self.__entries
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__entries)
+
+    def __evict(self):
+        while len(self.__entries) > max(self.__max_size, 0):
+            self.__entries.popitem(last=False)
+
+
+NAMESPACE_CACHE = DocumentCache()
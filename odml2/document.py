@@ -15,19 +15,124 @@ from six.moves import StringIO
 from six.moves.urllib.parse import urlparse
 
 import io
-import os
-import requests
+import time
+import weakref
+import contextlib
 import datetime as dt
+from collections import OrderedDict, namedtuple
+from multiprocessing.pool import ThreadPool
 from future.utils import python_2_unicode_compatible
 
 import odml2
-from odml2.checks import split_prefixed_name
-from odml2.api import yml, base
+from odml2.checks import split_prefixed_name, assert_uuid
+from odml2 import fetch
+from odml2.cache import NAMESPACE_CACHE, resolve_uri
+from odml2.terms import DeferredValidation, VALUE_TYPE_NAMES
+from odml2.api import yml, sqlite, base
 
-__all__ = ("BACK_ENDS", "Document", "TerminologyMode")
+__all__ = ("BACK_ENDS", "Document", "TerminologyMode", "PrefetchReport", "ValueIndex")
 
 
-BACK_ENDS = (yml.YamlDocument, )
+BACK_ENDS = (yml.YamlDocument, sqlite.SqliteDocument)
+
+
+class PrefetchReport(namedtuple("PrefetchReport", ("timings", "cycles", "errors"))):
+    """
+    The result of :meth:`~.Document.prefetch_namespaces`.
+
+    :ivar timings:  Load time in seconds for each namespace uri in the order documents were loaded.
+    :ivar cycles:   Cycles in the namespace graph as tuples of uris starting and ending with the same uri.
+    :ivar errors:   Exceptions raised while loading a namespace uri.
+    """
+
+
+class ValueIndex(object):
+    """
+    Sorted index over the values of a property in all sections of a certain type.
+    Use :meth:`~.Document.create_value_index` to obtain an index.
+
+    Values of different kinds (bools, numbers, datetimes, dates, times and strings)
+    are sorted separately and queries only return sections with values of the same
+    kind as their arguments. Units are not taken into account.
+
+    :param document:    The document of the index.
+    :type document:     :class:`~.Document`
+    :param index:       The back-end index.
+    """
+
+    def __init__(self, document, index):
+        self.__document = document
+        self.__index = index
+
+    @property
+    def type(self):
+        """
+        The type of the indexed sections.
+
+        :type:  str
+        """
+        return self.__index.type
+
+    @property
+    def prop(self):
+        """
+        The name of the indexed property.
+
+        :type:  str
+        """
+        return self.__index.prop
+
+    def range(self, minimum=None, maximum=None, inclusive=(True, True)):
+        """
+        Find all sections with values in a range.
+
+        .. code-block:: python
+
+            index = doc.create_value_index("Trial", "duration")
+            trials = index.range(2.0, 5.0)
+
+        :param minimum:     The lower bound or None for no lower bound.
+        :type minimum:      bool | float | int | str | datetime | date | time | Value
+        :param maximum:     The upper bound or None for no upper bound.
+        :type maximum:      bool | float | int | str | datetime | date | time | Value
+        :param inclusive:   Whether the lower and upper bound are part of the range.
+        :type inclusive:    tuple[bool]
+
+        :return:    The matching sections in ascending order of their values.
+        :rtype:     list[Section]
+        """
+        return self.__sections(self.__index.range(minimum, maximum, inclusive))
+
+    def equal(self, value):
+        """
+        Find all sections with a value equal to the given one.
+
+        :param value:   The value to look for.
+        :type value:    bool | float | int | str | datetime | date | time | Value
+
+        :rtype:     list[Section]
+        """
+        return self.__sections(self.__index.equal(value))
+
+    def top(self, k, largest=True):
+        """
+        Find the sections with the largest or smallest values.
+
+        :param k:           The maximum number of sections to return.
+        :type k:            int
+        :param largest:     If True the sections with the largest values are returned in
+                            descending order, otherwise those with the smallest in ascending order.
+        :type largest:      bool
+
+        :rtype:     list[Section]
+        """
+        return self.__sections(self.__index.top(k, largest))
+
+    def __sections(self, uuids):
+        return [self.__document._get_section(uuid) for uuid in uuids]
+
+    def __len__(self):
+        return len(self.__index)
 
 
 @python_2_unicode_compatible
@@ -55,6 +160,10 @@ class Document(object):
             raise ValueError("Not a valid back-end %s" % type(back_end))
 
         self.__strategy = strategy
+        self.__namespace_index = None
+        # incremented whenever the back-end is replaced or reloaded, see _invalidate_sections()
+        self.__section_epoch = 0
+        self.__section_handles = weakref.WeakValueDictionary()
         self.__namespaces = odml2.NameSpaceMap(self.__back_end)
         self.__property_defs = odml2.PropertyDefMap(self.__back_end)
         self.__type_defs = odml2.TypeDefMap(self.__back_end)
@@ -145,7 +254,7 @@ class Document(object):
         uuid = self.back_end.get_root()
         if uuid is None:
             return None
-        return odml2.Section(uuid, self)
+        return self._get_section(uuid)
 
     # noinspection PyProtectedMember
     @root.setter
@@ -178,7 +287,7 @@ class Document(object):
         """
         self.terminology_strategy.handle_type(self, type)
         self.back_end.create_root(type, uuid, label, reference)
-        return odml2.Section(uuid, self)
+        return self._get_section(uuid)
 
     def find_section_and_prefix(self, uuid, search_namespaces=False):
         """
@@ -192,25 +301,21 @@ class Document(object):
 
         :return:    The section with its namespace or None
         """
-        document, prefix, is_link = None, None, False
+        document, prefix = None, None
 
         if uuid in self.back_end.sections:
             document = self
         elif search_namespaces:
             p, uuid = split_prefixed_name(uuid)
             if p is None:
-                for ns in self.namespaces.values():
-                    tmp = ns.get_document()
-                    if uuid in tmp.back_end.sections:
-                        document, prefix, is_link = tmp, ns.prefix, True
-                        break
-            if p in self.namespaces:
+                document, prefix = self.__find_in_namespaces(uuid)
+            elif p in self.namespaces:
                 tmp = self.namespaces[p].get_document()
                 if uuid in tmp.back_end.sections:
-                    document, prefix, is_link = tmp, p, True
+                    document, prefix = tmp, p
 
         if document is not None:
-            return odml2.Section(uuid, document), prefix
+            return document._get_section(uuid), prefix
         else:
             return None, None
 
@@ -235,7 +340,62 @@ class Document(object):
         :rtype:     generator
         """
         for uuid in self.back_end.sections:
-            yield odml2.Section(uuid, self)
+            yield self._get_section(uuid)
+
+    # noinspection PyShadowingBuiltins
+    def find_sections(self, type=None, label=None, has_property=None):
+        """
+        Find all sections of the document matching the given criteria. Criteria which
+        are None are ignored, all others must match. With the memory based back-ends the
+        lookup uses indexes, which are created on the first search for each criterion.
+
+        .. code-block:: python
+
+            trials = doc.find_sections(type="Trial", has_property="stimulus")
+
+        :param type:            The type of the sections.
+        :type type:             str
+        :param label:           The label of the sections.
+        :type label:            str
+        :param has_property:    The name of a property the sections must have.
+        :type has_property:     str
+
+        :return:    All matching sections in no particular order.
+        :rtype:     list[Section]
+        """
+        uuids = self.back_end.sections.find(type=type, label=label, has_property=has_property)
+        return [self._get_section(uuid) for uuid in uuids]
+
+    # noinspection PyShadowingBuiltins
+    def create_value_index(self, type, prop):
+        """
+        Create a sorted index over the values of a property in all sections of a certain
+        type, which allows range, equality and top-k queries without scanning the whole
+        document. The index is kept up to date until it is dropped. If an index for
+        type and property already exists, it is returned instead.
+
+        *NOTICE:* Value indexes are only supported by the memory based back-ends.
+
+        :param type:    The type of the sections.
+        :type type:     str
+        :param prop:    The name of the value property.
+        :type prop:     str
+
+        :rtype:     :class:`~.ValueIndex`
+        """
+        return ValueIndex(self, self.back_end.sections.create_value_index(type, prop))
+
+    # noinspection PyShadowingBuiltins
+    def drop_value_index(self, type, prop):
+        """
+        Remove an index created by :meth:`~.Document.create_value_index`.
+
+        :param type:    The type of the sections.
+        :type type:     str
+        :param prop:    The name of the value property.
+        :type prop:     str
+        """
+        self.back_end.sections.drop_value_index(type, prop)
 
     @property
     def namespaces(self):
@@ -282,7 +442,8 @@ class Document(object):
     def terminology_strategy(self):
         """
         The terminology strategy defines how section types and property names are
-        handled with respect to a given terminology.
+        handled with respect to a given terminology. Inside :meth:`~.Document.deferred_validation`
+        this is a :class:`~odml2.terms.DeferredValidation` wrapping the actual strategy.
 
         :class:`~.TerminologyStrategy`
         """
@@ -292,6 +453,107 @@ class Document(object):
     def terminology_strategy(self, strategy):
         self.__strategy = strategy
 
+    @contextlib.contextmanager
+    def deferred_validation(self):
+        """
+        Context manager which postpones terminology handling until the end of the block.
+        Section types and property triples used inside the block are only collected and
+        each distinct one is handled once by the terminology strategy on exit. Changes
+        made inside the block are not reverted if the validation fails.
+
+        .. code-block:: python
+
+            with doc.deferred_validation():
+                for i, trial in enumerate(trials):
+                    doc.root["trials"].append(SB("Trial", index=i, duration=trial))
+
+        :raises TerminologyError:   All violations found on exit.
+        """
+        if isinstance(self.__strategy, DeferredValidation):
+            yield self.__strategy
+            return
+
+        deferred = DeferredValidation(self.__strategy)
+        self.__strategy = deferred
+        try:
+            yield deferred
+        finally:
+            if self.__strategy is deferred:
+                self.__strategy = deferred.strategy
+        deferred.validate(self)
+
+    def validate(self):
+        """
+        Check the whole document: name space prefixes, definitions, section uuids, types
+        and property names as well as all values. Afterwards all section types and
+        properties are handled by the :attr:`~.Document.terminology_strategy` in one pass
+        (see :meth:`~.Document.deferred_validation`). This covers all checks which are
+        skipped when a document is loaded with ``trusted=True``.
+
+        :raises ValueError:         If a name or value is not valid.
+        :raises TerminologyError:   All violations of the terminology strategy.
+        """
+        for ns in self.namespaces.values():
+            ns.copy()
+        for td in self.type_definitions.values():
+            odml2.TypeDef(td.name, td.definition, td.properties)
+        for pd in self.property_definitions.values():
+            odml2.PropertyDef(pd.name, pd.definition, pd.types)
+
+        root = self.back_end.get_root()
+        with self.deferred_validation():
+            for sec, triples in self.__iter_triples():
+                assert_uuid(sec.get_uuid())
+                if sec.get_uuid() == root:
+                    self.terminology_strategy.handle_type(self, sec.get_type())
+                for value in sec.value_properties.values():
+                    value.copy()
+                for prop, target_type in triples:
+                    self.terminology_strategy.handle_triple(self, sec.get_type(), prop, target_type)
+
+    def infer_terminology(self):
+        """
+        Create or extend the type and property definitions of the document so that they cover
+        all sections and properties of the document. The result is the same as if the whole
+        document was written using :attr:`~.TerminologyStrategy.Create`, but the sections are
+        scanned only once and every definition is written at most once. Types and properties
+        with a prefix belong to the terminology of the respective name space and are not
+        defined here, but their names are added to the definitions that use them in the same
+        way as :attr:`~.TerminologyStrategy.Strict` checks them.
+        """
+        type_props = {}
+        prop_types = {}
+
+        for sec, triples in self.__iter_triples():
+            source_prefix, source_type = split_prefixed_name(sec.get_type())
+            source_props = type_props.setdefault(source_type, set()) if source_prefix is None else None
+
+            for prop, target_type in triples:
+                target_prefix, target_name = split_prefixed_name(target_type)
+                if target_prefix is None and target_name not in VALUE_TYPE_NAMES:
+                    type_props.setdefault(target_name, set())
+                prop_prefix, prop_name = split_prefixed_name(prop)
+                if prop_prefix is None:
+                    prop_types.setdefault(prop_name, set()).add(target_name)
+                if source_props is not None:
+                    source_props.add(prop_name)
+
+        for name, types in prop_types.items():
+            if name in self.property_definitions:
+                prop_def = self.property_definitions[name]
+                if not types <= prop_def.types:
+                    self.property_definitions[name] = prop_def.copy(types=prop_def.types | types)
+            else:
+                self.property_definitions[name] = odml2.PropertyDef(name, types=types)
+
+        for name, props in type_props.items():
+            if name in self.type_definitions:
+                type_def = self.type_definitions[name]
+                if not props <= type_def.properties:
+                    self.type_definitions[name] = type_def.copy(properties=type_def.properties | props)
+            else:
+                self.type_definitions[name] = odml2.TypeDef(name, properties=props)
+
     def save(self, destination=None):
         """
         Save a document to a given destination.
@@ -302,55 +564,234 @@ class Document(object):
         if not hasattr(destination, "write"):
             parsed = urlparse(destination)
             if parsed.scheme == "file" or parsed.scheme == "":
-                with io.open(destination, "w", encoding="utf-8") as f:
-                    self.back_end.save(f, destination)
+                if self.back_end.is_attached():
+                    self.back_end.save(None, destination)
+                else:
+                    with io.open(destination, "w", encoding="utf-8") as f:
+                        self.back_end.save(f, destination)
             else:
                 raise RuntimeError("Unable to save to destination: %s" % destination)
         else:
             uri = destination.name if hasattr(destination, "name") else None
             self.back_end.save(destination, uri)
 
-    def load(self, source, is_writable=True):
+    def load(self, source, is_writable=True, prefetch_namespaces=False, trusted=False):
         """
-        Load data to the document from a certain source.
+        Load data to the document from a certain source. Documents from http or https
+        sources are fetched via :data:`odml2.fetch.FETCHER`.
 
         :param source:      Where to load the content of the document from.
         :type source:       str | io.FileIO | io.StringIO
         :param is_writable: Whether or not the loaded document should be writable.
         :type is_writable:  bool
+        :param prefetch_namespaces: If True all linked namespaces are loaded concurrently
+                                    (see :meth:`~.Document.prefetch_namespaces`).
+        :type prefetch_namespaces:  bool
+        :param trusted:     If True names, prefixes and values are not checked while loading.
+                            Only use this for sources known to be valid, e.g. documents saved
+                            by odML itself. The checks can be done later with
+                            :meth:`~.Document.validate`.
+        :type trusted:      bool
+
+        :return:    The :class:`~.PrefetchReport` if namespaces were prefetched, otherwise None.
         """
         if not hasattr(source, "read"):
             parsed = urlparse(source)
             if parsed.scheme == "file" or parsed.scheme == "":
-                _, extension = os.path.splitext(source)
-                back_end = self.__find_back_end(extension)(is_writable)
-                with io.open(source, "r", encoding="utf-8") as f:
-                    back_end.load(f, source)
-                self.__set_back_end(back_end)
-            elif parsed.scheme == "http":
-                result = requests.get(source)
-                mime_type = result.headers["content-type"].split(";")[0]
-                back_end = self.__find_back_end(mime_type)(is_writable)
-                back_end.load(StringIO(result.text), source)
+                back_end = self.__find_back_end(source)(is_writable)
+                if back_end.is_attached():
+                    back_end.load(None, source, trusted)
+                else:
+                    with io.open(source, "r", encoding="utf-8") as f:
+                        back_end.load(f, source, trusted)
                 self.__set_back_end(back_end)
+            elif parsed.scheme in ("http", "https"):
+                self._load_fetched(fetch.FETCHER.fetch(source), is_writable, trusted)
             else:
                 raise RuntimeError("Unable to load from source: %s" % source)
         else:
-            self.back_end.load(source)
+            try:
+                self.back_end.load(source, trusted=trusted)
+            finally:
+                self._invalidate_sections()
+
+        if prefetch_namespaces:
+            return self.prefetch_namespaces()
+
+    def _load_fetched(self, result, is_writable=True, trusted=False):
+        """
+        Load data to the document from the response to a http request.
+
+        :param result:  The response.
+        :type result:   :class:`~odml2.fetch.FetchResult`
+        """
+        try:
+            back_end = self.__find_back_end(result.content_type)(is_writable)
+        except ValueError:
+            back_end = self.__find_back_end(urlparse(result.url).path)(is_writable)
+        back_end.load(StringIO(result.text), result.url, trusted)
+        self.__set_back_end(back_end)
+
+    def prefetch_namespaces(self, max_workers=4):
+        """
+        Load the documents of all namespaces concurrently. Namespaces of the loaded documents
+        are followed as well until the whole namespace graph is resolved. Loaded documents are
+        stored in :data:`~odml2.cache.NAMESPACE_CACHE` and are therefore available to
+        :meth:`~.NameSpace.get_document` without further loading. Namespaces that can't be
+        loaded don't abort the prefetch but are reported.
+
+        :param max_workers: The maximum number of documents loaded at the same time.
+        :type max_workers:  int
+
+        :return:    Load timings, cycles and errors in the namespace graph.
+        :rtype:     :class:`~.PrefetchReport`
+        """
+        def load_namespace(uri):
+            start = time.time()
+            try:
+                doc, error = NAMESPACE_CACHE.get_document(uri), None
+            except Exception as e:
+                doc, error = None, e
+            return uri, doc, time.time() - start, error
+
+        root = resolve_uri(self.location) if self.location is not None else None
+        timings = OrderedDict()
+        errors = OrderedDict()
+        edges = {root: [resolve_uri(ns.uri) for ns in self.namespaces.values()]}
+
+        seen = set(edges[root])
+        seen.add(root)
+        level = list(OrderedDict.fromkeys(edges[root]))
+        pool = ThreadPool(max(1, min(max_workers, len(level) or 1)))
+        try:
+            while len(level) > 0:
+                for uri, doc, elapsed, error in pool.imap_unordered(load_namespace, level):
+                    timings[uri] = elapsed
+                    if error is not None:
+                        errors[uri] = error
+                        edges[uri] = []
+                    else:
+                        edges[uri] = [resolve_uri(ns.uri) for ns in doc.namespaces.values()]
+                next_level = []
+                for uri in level:
+                    for target in edges[uri]:
+                        if target not in seen:
+                            seen.add(target)
+                            next_level.append(target)
+                level = next_level
+        finally:
+            pool.close()
+            pool.join()
+
+        return PrefetchReport(timings, self.__find_cycles(edges, root), errors)
+
+    @property
+    def _section_epoch(self):
+        """
+        Sections resolved from the back-end are valid as long as the epoch doesn't change.
+        The epoch of the back-end section map covers removed sections.
+        """
+        return self.__section_epoch, self.__back_end.sections.epoch
+
+    def _invalidate_sections(self):
+        """
+        Must be called whenever the back-end is replaced or reloaded.
+        """
+        self.__section_epoch += 1
+
+    def _get_section(self, uuid, is_link=False):
+        """
+        Get a :class:`~.Section` handle. Handles are shared as long as they are in use.
+        """
+        key = (uuid, is_link)
+        section = self.__section_handles.get(key)
+        if section is None:
+            section = self.__section_handles[key] = odml2.Section(uuid, self, is_link)
+        return section
+
+    @staticmethod
+    def __find_cycles(edges, root):
+        cycles = []
+        state = {root: 1}
+        path = [root]
+        stack = [iter(edges[root])]
+        while len(stack) > 0:
+            for target in stack[-1]:
+                if state.get(target) == 1:
+                    cycles.append(tuple(path[path.index(target):]) + (target, ))
+                elif target not in state:
+                    state[target] = 1
+                    path.append(target)
+                    stack.append(iter(edges.get(target, ())))
+                    break
+            else:
+                state[path.pop()] = 2
+                stack.pop()
+        return cycles
 
     # noinspection PyMethodMayBeStatic
     def __find_back_end(self, hint):
         for be in BACK_ENDS:
-            if hint == be.NAME or hint in be.FEXT or hint in be.MIME:
+            if hint == be.NAME or hint in be.MIME or any(hint.endswith(ext) for ext in be.FEXT):
                 return be
         raise ValueError("No suitable back-end fund for: %s" % hint)
 
     def __set_back_end(self, be):
         self.__back_end = be
+        self.__namespace_index = None
+        self._invalidate_sections()
         self.__namespaces = odml2.NameSpaceMap(self.__back_end)
         self.__property_defs = odml2.PropertyDefMap(self.__back_end)
         self.__type_defs = odml2.TypeDefMap(self.__back_end)
 
+    def __iter_triples(self):
+        """
+        Iterate over all back-end sections together with a list of (property, target type)
+        pairs for all their value and section properties.
+        """
+        sections = self.back_end.sections
+        for uuid in sections:
+            sec = sections[uuid]
+            triples = [(prop, value.type) for prop, value in sec.value_properties.items()]
+            for prop, refs in sec.section_properties.items():
+                for ref in refs:
+                    if ref.namespace is None:
+                        target_sec = sections[ref.uuid]
+                    else:
+                        doc = self.namespaces[ref.namespace].get_document()
+                        target_sec = doc.back_end.sections[ref.uuid]
+                    triples.append((prop, target_sec.get_type()))
+            yield sec, triples
+
+    def __find_in_namespaces(self, uuid):
+        """
+        Find the linked document and prefix of a section by its uuid, using an index from
+        the uuids of all sections in linked documents to their prefix. If a uuid exists in
+        several documents the first name space wins.
+
+        The index keeps the documents it was built from and is only rebuilt after namespaces
+        have changed or :data:`~odml2.cache.NAMESPACE_CACHE` has invalidated or reloaded a
+        document, so that lookups need no I/O.
+
+        :return: The document and the prefix or (None, None)
+        """
+        epoch = (self.namespaces.epoch, NAMESPACE_CACHE.epoch)
+        index = self.__namespace_index
+        if index is None or index[0] != epoch:
+            docs = {}
+            uuids = {}
+            for ns in self.namespaces.values():
+                doc = docs[ns.prefix] = NAMESPACE_CACHE.get_document(ns.uri)
+                for section_uuid in doc.back_end.sections:
+                    uuids.setdefault(section_uuid, ns.prefix)
+            # the epoch of the cache may have changed while the documents were loaded
+            index = self.__namespace_index = ((self.namespaces.epoch, NAMESPACE_CACHE.epoch), docs, uuids)
+
+        prefix = index[2].get(uuid)
+        if prefix is None:
+            return None, None
+        return index[1][prefix], prefix
+
     def __str__(self):
         return u"Document(location='%s', author='%s', date=%s)" % (self.back_end.get_uri(), self.author, self.date)
 
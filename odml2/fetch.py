@@ -0,0 +1,234 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Provides pooled and cached access to documents served via http or https.
+"""
+
+import io
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import requests
+from collections import namedtuple
+from requests.adapters import HTTPAdapter
+# noinspection PyUnresolvedReferences
+from requests.packages.urllib3.util.retry import Retry
+
+__all__ = ("HttpFetcher", "FetchResult", "FETCHER")
+
+
+def default_cache_dir():
+    """
+    :return:    The default directory for cached http responses.
+    :rtype:     str
+    """
+    base_dir = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base_dir, "odml2", "http")
+
+
+class FetchResult(namedtuple("FetchResult", ("url", "content", "content_type", "encoding",
+                                             "etag", "last_modified", "from_cache"))):
+    """
+    The response to a request made by :class:`~.HttpFetcher`.
+    """
+
+    @property
+    def text(self):
+        """
+        The decoded content of the response.
+
+        :type:  str
+        """
+        return self.content.decode(self.encoding or "utf-8")
+
+
+class HttpFetcher(object):
+    """
+    Fetches documents via http or https using a shared connection pool. If a cache
+    directory is given, responses providing an ETag or Last-Modified header are stored
+    in an on-disk cache and are revalidated with conditional requests.
+
+    :param cache_dir:   Directory for cached responses. If None responses are not cached.
+    :type cache_dir:    str
+    :param timeout:     Connect and read timeout in seconds.
+    :type timeout:      float
+    :param retries:     How often failed connections or server errors are retried.
+    :type retries:      int
+    :param backoff:     Backoff factor in seconds between retries.
+    :type backoff:      float
+    :param pool_size:   Maximum number of pooled connections per host.
+    :type pool_size:    int
+    """
+
+    RETRY_STATUS = (500, 502, 503, 504)
+
+    def __init__(self, cache_dir=None, timeout=10.0, retries=3, backoff=0.1, pool_size=10):
+        self.__cache_dir = cache_dir
+        self.__timeout = timeout
+        self.__lock = threading.Lock()
+
+        retry = Retry(total=retries, connect=retries, read=retries, backoff_factor=backoff,
+                      status_forcelist=self.RETRY_STATUS, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.__session = requests.Session()
+        self.__session.mount("http://", adapter)
+        self.__session.mount("https://", adapter)
+
+    @property
+    def cache_dir(self):
+        """
+        Directory for cached responses. This is a read only property.
+
+        :type:  str
+        """
+        return self.__cache_dir
+
+    @property
+    def timeout(self):
+        """
+        Connect and read timeout in seconds.
+
+        :type:  float
+        """
+        return self.__timeout
+
+    @timeout.setter
+    def timeout(self, timeout):
+        self.__timeout = timeout
+
+    def fetch(self, url, etag=None, last_modified=None):
+        """
+        Fetch the content of an url. If a cached response exists it is revalidated
+        with the server and only downloaded again if it has changed.
+
+        Callers which keep a copy of the content themselves can pass its ETag and
+        Last-Modified header instead. In this case the on-disk cache is bypassed and
+        nothing is downloaded if the copy is still up to date.
+
+        :param url:             The http or https url to fetch.
+        :type url:              str
+        :param etag:            The ETag of a copy held by the caller.
+        :type etag:             str
+        :param last_modified:   The Last-Modified header of a copy held by the caller.
+        :type last_modified:    str
+
+        :return:    The fetched content along with its headers or None if the copy of the
+                    caller is still up to date.
+        :rtype:     :class:`~.FetchResult`
+        """
+        has_copy = etag is not None or last_modified is not None
+        cached = self.__read_cache(url) if not has_copy else None
+        if cached is not None:
+            etag, last_modified = cached.etag, cached.last_modified
+        headers = {}
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        if last_modified is not None:
+            headers["If-Modified-Since"] = last_modified
+
+        response = self.__session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            if cached is not None:
+                return cached
+            elif has_copy:
+                return None
+        response.raise_for_status()
+
+        content_type, _, params = response.headers.get("content-type", "").partition(";")
+        encoding = None
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "charset":
+                encoding = value.strip("\"' ")
+        result = FetchResult(
+            url=url,
+            content=response.content,
+            content_type=content_type.strip(),
+            encoding=encoding,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+            from_cache=False
+        )
+        if result.etag is not None or result.last_modified is not None:
+            self.__write_cache(result)
+        return result
+
+    def invalidate(self, url=None):
+        """
+        Remove a cached response from the disk.
+
+        :param url:     The url to remove. If None all cached responses are removed.
+        :type url:      str
+        """
+        if self.cache_dir is None or not os.path.isdir(self.cache_dir):
+            return
+        if url is None:
+            names = [n for n in os.listdir(self.cache_dir) if self.__is_key(n) or n.endswith(".tmp")]
+        else:
+            names = (self.__key(url), )
+        for name in names:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    def close(self):
+        """
+        Close all pooled connections.
+        """
+        self.__session.close()
+
+    @staticmethod
+    def __key(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def __is_key(name):
+        return len(name) == 40 and all(c in "0123456789abcdef" for c in name)
+
+    def __read_cache(self, url):
+        if self.cache_dir is None:
+            return None
+        try:
+            with io.open(os.path.join(self.cache_dir, self.__key(url)), "rb") as f:
+                meta = json.loads(f.readline().decode("utf-8"))
+                content = f.read()
+        except (IOError, OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        return FetchResult(url, content, meta.get("content_type"), meta.get("encoding"),
+                           meta.get("etag"), meta.get("last_modified"), True)
+
+    def __write_cache(self, result):
+        if self.cache_dir is None:
+            return
+        meta = {
+            "url": result.url, "content_type": result.content_type, "encoding": result.encoding,
+            "etag": result.etag, "last_modified": result.last_modified
+        }
+        with self.__lock:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            # write to a temporary file first so that concurrent readers never see partial data
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(meta).encode("utf-8") + b"\n")
+                f.write(result.content)
+            replace = getattr(os, "replace", os.rename)
+            replace(tmp, os.path.join(self.cache_dir, self.__key(result.url)))
+
+
+#: The fetcher used for all http and https sources. It doesn't cache responses on disk,
+#: replace it with a fetcher with a cache directory, e.g. :func:`default_cache_dir`, to do so.
+FETCHER = HttpFetcher()
@@ -16,17 +16,39 @@ import numbers
 import itertools
 import collections
 import datetime as dt
+from uuid import uuid4
 
 import odml2
 from odml2.checks import *
+from odml2.cache import NAMESPACE_CACHE
+from odml2.units import UNITS
 
-__all__ = ("Section", "Value", "NameSpace", "PropertyDef", "TypeDef", "Value.from_obj")
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ("Section", "Value", "ValueArray", "NameSpace", "PropertyDef", "TypeDef", "Value.from_obj")
 
 PLUS_MINUS_UNICODE = u"±"
 PLUS_MINUS = PLUS_MINUS_UNICODE if six.PY3 else "+-"
 ALLOWED_VALUE_TYPES = (bool, numbers.Number, dt.date, dt.time, dt.datetime) + six.string_types
 VALUE_TYPE_MAP = {bool: "bool", int: "int", numbers.Number: "float", dt.datetime: "datetime",
                   dt.time: "time", dt.date: "date", six.string_types: "string"}
+ARRAY_TYPE = "array"
+# value class -> type name, filled on demand
+_VALUE_TYPE_NAMES = {}
+# first characters of strings which can match VALUE_EXPR
+_QUANTITY_START = frozenset("+-.0123456789")
+# characters of units which can match VALUE_EXPR
+_UNIT_CHARS = frozenset(u"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzΩμ")
+# relative tolerance for comparing values that were converted into another unit
+UNIT_TOLERANCE = 1e-12
+# the maximum number of parsed strings kept by _parse_value
+_VALUE_CACHE_SIZE = 1024
+_VALUE_CACHE = collections.OrderedDict()
+# value classes that need no checks or parsing
+_PLAIN_VALUE_TYPES = frozenset((bool, float) + six.integer_types)
 VALUE_EXPR = re.compile(u"^([-+]?(([0-9]+)|([0-9]*\.[0-9]+([eE][-+]?[0-9]+)?)))\s?" +
                         u"((\+-|\\xb1)(([0-9]+)|([0-9]*\.[0-9]+([eE][-+]?[0-9]+)?)))?\s?" +
                         u"([A-Za-zΩμ]{1,4})?$")
@@ -42,6 +64,9 @@ class Section(collections.MutableMapping):
         self.__is_link = is_link
         self.__uuid = uuid
         self.__document = document
+        # the resolved back-end section, valid as long as the epoch of the document doesn't change
+        self.__back_end_section = None
+        self.__epoch = None
 
     @property
     def uuid(self):
@@ -59,14 +84,14 @@ class Section(collections.MutableMapping):
 
         :type:      str
         """
-        return self.document.back_end.sections[self.uuid].get_type()
+        return self.__resolve().get_type()
 
     # noinspection PyShadowingBuiltins
     @type.setter
     def type(self, type):
         # TODO handle type or remove
         assert_prefixed_name(type)
-        self.document.back_end.sections[self.uuid].set_type(type)
+        self.__resolve().set_type(type)
 
     @property
     def label(self):
@@ -76,13 +101,13 @@ class Section(collections.MutableMapping):
 
         :type:      str
         """
-        return self.document.back_end.sections[self.uuid].get_label()
+        return self.__resolve().get_label()
 
     @label.setter
     def label(self, label):
         if label is not None and not isinstance(label, six.string_types):
             raise ValueError("Label must be a string")
-        self.document.back_end.sections[self.uuid].set_label(label)
+        self.__resolve().set_label(label)
 
     @property
     def reference(self):
@@ -91,13 +116,13 @@ class Section(collections.MutableMapping):
 
         :type:      str
         """
-        return self.document.back_end.sections[self.uuid].get_reference()
+        return self.__resolve().get_reference()
 
     @reference.setter
     def reference(self, reference):
         if reference is not None and not isinstance(reference, six.string_types):
             raise ValueError("Reference must be a string")
-        self.document.back_end.sections[self.uuid].set_reference(reference)
+        self.__resolve().set_reference(reference)
 
     @property
     def is_link(self):
@@ -139,12 +164,12 @@ class Section(collections.MutableMapping):
 
         def mk_section(ref):
             if ref.namespace is None:
-                doc = self.document
+                doc = self.__document
             else:
-                doc = self.document.namespaces[ref.namespace].get_document()
-            return Section(ref.uuid, doc, ref.is_link)
+                doc = self.__document.namespaces[ref.namespace].get_document()
+            return doc._get_section(ref.uuid, ref.is_link)
 
-        sec = self.document.back_end.sections[self.uuid]
+        sec = self.__resolve()
         if key in sec.value_properties:
             return sec.value_properties[key]
         elif key in sec.section_properties:
@@ -190,9 +215,9 @@ class Section(collections.MutableMapping):
         If the element is a :class:`~.SB` object an analogous section will be created in
         the document.
 
-        If the element is a :class:`~.Value` the value is used as target for the property. In
-        all other cases a :class:`~.Value` object will be constructed from the element if this
-        is supported for the elements type.
+        If the element is a :class:`~.Value` the value is used as target for the property. NumPy
+        arrays are stored as :class:`~.ValueArray`. In all other cases a :class:`~.Value` object
+        will be constructed from the element if this is supported for the elements type.
 
         :param key:         The name of the property.
         :type key:          str
@@ -208,16 +233,16 @@ class Section(collections.MutableMapping):
                 elif isinstance(sub, odml2.Section):
                     sub._copy_section(self.document, self.uuid, key)
                 else:
-                    ValueError("Section builder expected but was %s" % type(sub))
+                    raise ValueError("Section builder expected but was %s" % type(sub))
         elif isinstance(element, odml2.SB):
             element.build(self.document, self.uuid, key)
         elif isinstance(element, Section):
             element._copy_section(self.document, self.uuid, key)
         else:
-            sec = self.document.back_end.sections[self.uuid]
+            sec = self.__resolve()
             val = Value.from_obj(element)
-            self.document.terminology_strategy.handle_triple(self.document, self.type, key, val.type)
-            sec.value_properties[key] = Value.from_obj(element)
+            self.document.terminology_strategy.handle_triple(self.document, sec.get_type(), key, val.type)
+            sec.value_properties[key] = val
 
     def __delitem__(self, key):
         """
@@ -227,24 +252,30 @@ class Section(collections.MutableMapping):
         :param key:     The name of the property to remove.
         :type key:      str
         """
-        sec = self.document.back_end.sections[self.uuid]
+        sec = self.__resolve()
         if key in sec.value_properties:
             del sec.value_properties[key]
         elif key in sec.section_properties:
-            for ref in sec.section_properties[key]:
+            # remove the property first, so that the back-end doesn't need to update it for each subsection
+            refs = sec.section_properties[key]
+            del sec.section_properties[key]
+            for ref in refs:
                 if not ref.is_link and ref.uuid in self.document.back_end.sections:
                     del self.document.back_end.sections[ref.uuid]
-            del sec.section_properties[key]
         else:
             raise KeyError("The section has no property with the name '%s'" % key)
 
+    def __contains__(self, key):
+        sec = self.__resolve()
+        return key in sec.value_properties or key in sec.section_properties
+
     def __len__(self):
         """
         The number of properties in the section.
 
         :rtype:         int
         """
-        sec = self.document.back_end.sections[self.uuid]
+        sec = self.__resolve()
         return len(sec.value_properties) + len(sec.section_properties)
 
     def __iter__(self):
@@ -254,7 +285,7 @@ class Section(collections.MutableMapping):
 
         :return:        A generator over all property targets
         """
-        sec = self.document.back_end.sections[self.uuid]
+        sec = self.__resolve()
         return itertools.chain(iter(sec.value_properties), iter(sec.section_properties))
 
     def items(self):
@@ -277,6 +308,62 @@ class Section(collections.MutableMapping):
         for key in self:
             yield self.get(key)
 
+    # noinspection PyShadowingBuiltins,PyProtectedMember
+    def extend_from_records(self, prop, type, records, uuid_field=None):
+        """
+        Append one sub section of the given type per record to a section property. Each field
+        of a record becomes a value property of the respective sub section.
+
+        The records can be a NumPy structured array, a dict that maps field names to columns
+        or an iterable of dicts (e.g. a :class:`csv.DictReader`). Fields that are None are
+        left out. All sub sections and values are passed to the back-end in one batch.
+
+        .. code-block:: python
+
+            trials = numpy.array([(1, 0.5), (2, 0.7)], dtype=[("index", int), ("duration", float)])
+            section.extend_from_records("trials", "Trial", trials)
+
+        :param prop:        The name of the section property.
+        :type prop:         str
+        :param type:        The type of the created sub sections.
+        :type type:         str
+        :param records:     The records to create the sub sections from.
+        :param uuid_field:  The field that contains the uuids of the sub sections (optional).
+        :type uuid_field:   str
+
+        :raises:            ValueError if the records are not consistent.
+        """
+        assert_prefixed_name(prop)
+        names, columns, count = _record_columns(records)
+        if uuid_field is not None:
+            if uuid_field not in names:
+                raise ValueError("The records have no field '%s'" % uuid_field)
+            uuids = [str(u) for u in columns.pop(names.index(uuid_field))]
+            names.remove(uuid_field)
+            for uuid in uuids:
+                assert_uuid(uuid)
+        else:
+            uuids = [str(uuid4()) for _ in range(count)]
+        for name in names:
+            assert_prefixed_name(name)
+
+        triples = [(self.type, prop, type)]
+        value_columns = []
+        for name, column in zip(names, columns):
+            values, value_types = _column_values(column)
+            triples.extend((type, name, t) for t in value_types)
+            value_columns.append(values)
+        strategy = self.document.terminology_strategy
+        for triple in triples:
+            strategy.handle_triple(self.document, *triple)
+
+        sections = self.document.back_end.sections
+        sections.add_many((type, uuid, None, None, self.uuid, prop) for uuid in uuids)
+        for uuid, row in zip(uuids, zip(*value_columns) if len(value_columns) > 0 else ()):
+            items = [(name, value) for name, value in zip(names, row) if value is not None]
+            if len(items) > 0:
+                sections[uuid].value_properties.set_many(items)
+
     #
     # built in methods
     #
@@ -300,6 +387,13 @@ class Section(collections.MutableMapping):
     # Internally used methods
     #
 
+    def __resolve(self):
+        epoch = self.__document._section_epoch
+        if self.__epoch != epoch:
+            self.__back_end_section = self.__document.back_end.sections[self.__uuid]
+            self.__epoch = epoch
+        return self.__back_end_section
+
     # noinspection PyShadowingBuiltins
     def _create_subsection(self, prop, type, uuid, label, reference):
         self.document.terminology_strategy.handle_triple(self.document, self.type, prop, type)
@@ -334,6 +428,60 @@ class Section(collections.MutableMapping):
                     section[p] = thing
 
 
+def _record_columns(records):
+    """
+    Split records into field names and columns.
+
+    :return:    The field names, the columns with plain python objects and the number of records.
+    """
+    dtype = getattr(records, "dtype", None)
+    if dtype is not None and dtype.names is not None:
+        # numpy structured array, tolist() converts whole columns to python objects at once
+        names = list(dtype.names)
+        columns = [records[name].tolist() for name in names]
+    elif isinstance(records, collections.Mapping):
+        names = list(records.keys())
+        columns = [c.tolist() if hasattr(c, "tolist") else list(c) for c in records.values()]
+    else:
+        names = None
+        columns = []
+        count = 0
+        for row in records:
+            count += 1
+            if names is None:
+                names = list(row.keys())
+                columns = [[] for _ in names]
+            elif len(row) != len(names):
+                raise ValueError("All records must have the same fields")
+            for name, column in zip(names, columns):
+                if name not in row:
+                    raise ValueError("All records must have the same fields")
+                column.append(row[name])
+        return names or [], columns, count
+    lengths = set(len(c) for c in columns)
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length")
+    return names, columns, lengths.pop() if len(lengths) > 0 else 0
+
+
+def _column_values(column):
+    """
+    Create values for all elements of a column. Columns with only numbers or only booleans
+    are converted in one pass without checking each element.
+
+    :return:    The values (None for missing elements) and the set of their value types.
+    """
+    kinds = set(v.__class__ for v in column)
+    kinds.discard(type(None))
+    if len(kinds) == 1 and kinds <= _PLAIN_VALUE_TYPES:
+        unchecked = Value._unchecked
+        values = [unchecked(v) if v is not None else None for v in column]
+        sample = next(v for v in values if v is not None)
+        return values, {sample.type}
+    values = [Value.from_obj(v) if v is not None else None for v in column]
+    return values, set(v.type for v in values if v is not None)
+
+
 class Value(object):
     """
     Create a new value.
@@ -349,6 +497,8 @@ class Value(object):
     :type uncertainty:      float
     """
 
+    __slots__ = ("__value", "__unit", "__uncertainty", "__type")
+
     def __init__(self, value, unit=None, uncertainty=None):
         if not isinstance(value, ALLOWED_VALUE_TYPES):
             raise ValueError("Value must be a one of the following types: %s" %
@@ -360,7 +510,7 @@ class Value(object):
             raise ValueError("Uncertainty and unit must be None if value is not a number")
         self.__unit = unit
         self.__uncertainty = float(uncertainty) if uncertainty is not None else None
-        self.__type = None
+        self.__type = _value_type(value)
 
     @property
     def value(self):
@@ -388,10 +538,6 @@ class Value(object):
         """
         The name of the values data type.
         """
-        if self.__type is None:
-            for t, s in VALUE_TYPE_MAP.items():
-                if isinstance(self.value, t):
-                    self.__type = s
         return self.__type
 
     def copy(self, value=None, unit=None, uncertainty=None):
@@ -421,14 +567,47 @@ class Value(object):
             uncertainty if uncertainty is not None else self.uncertainty
         )
 
+    def to(self, unit):
+        """
+        Convert the value into another unit using the registry :data:`odml2.units.UNITS`.
+
+        .. code-block:: python
+
+            Value(5, "ms", 0.1).to("s")     # Value(0.005, "s", 0.0001)
+
+        :param unit:    The target unit.
+        :type unit:     str
+
+        :return:    The converted value.
+        :rtype:     :class:`~.Value`
+
+        :raises:    ValueError if the value has no unit or the units are not convertible.
+        """
+        if self.unit is None:
+            raise ValueError("A value without unit can't be converted")
+        factor = UNITS.factor(self.unit, unit)
+        return Value(self.value * factor, unit, self.uncertainty * factor if self.uncertainty is not None else None)
+
     def __lt__(self, other):
+        if self.unit != other.unit and self.unit is not None and other.unit is not None:
+            if not UNITS.is_convertible(other.unit, self.unit):
+                raise TypeError("Can't compare values with the units '%s' and '%s'" % (self.unit, other.unit))
+            return self.value < other.value * UNITS.factor(other.unit, self.unit)
         return self.value < other.value
 
     def __eq__(self, other):
-        if isinstance(other, Value):
-            return self.value == other.value and self.unit == other.unit and self.uncertainty == other.uncertainty
-        else:
+        if not isinstance(other, Value):
             return False
+        elif self.unit != other.unit and self.unit is not None and other.unit is not None:
+            # values in different units are equal if they are equal after conversion
+            if not UNITS.is_convertible(other.unit, self.unit):
+                return False
+            factor = UNITS.factor(other.unit, self.unit)
+            if (self.uncertainty is None) != (other.uncertainty is None):
+                return False
+            return (_is_close(self.value, other.value * factor) and
+                    (self.uncertainty is None or _is_close(self.uncertainty, other.uncertainty * factor)))
+        return self.value == other.value and self.unit == other.unit and self.uncertainty == other.uncertainty
 
     def __ne__(self, other):
         return not self == other
@@ -478,22 +657,292 @@ class Value(object):
         :raises:        ValueError if the object can't be converted to a value.
         """
         if isinstance(thing, six.string_types):
-            match = VALUE_EXPR.match(thing)
-            if match is None:
-                return Value(thing)
-            else:
-                g = match.groups()
-                num, is_float, uncertainty, unit = (g[0], g[3], g[7], g[11])
-                num = float(num) if is_float is not None else int(num)
-                uncertainty = float(uncertainty) if uncertainty is not None else None
-                return Value(num, unit, uncertainty)
+            return _parse_value(thing)
         if isinstance(thing, ALLOWED_VALUE_TYPES):
             return Value(thing)
         elif isinstance(thing, Value):
             return thing
+        elif numpy is not None and isinstance(thing, numpy.ndarray):
+            return ValueArray(thing)
         else:
             raise ValueError("Can't covert '%s' to a value" % repr(thing))
 
+    @staticmethod
+    def _unchecked(value, unit=None, uncertainty=None):
+        """
+        Create a value without checking the arguments. Only for data from trusted sources.
+        """
+        v = Value.__new__(Value)
+        v._set(value, unit, uncertainty)
+        return v
+
+    def _set(self, value, unit, uncertainty, type=None):
+        """
+        Set all attributes without checks, only used during initialization.
+        """
+        self.__value = value
+        self.__unit = unit
+        self.__uncertainty = uncertainty
+        self.__type = type if type is not None else _value_type(value)
+
+    @staticmethod
+    def _from_trusted_obj(thing):
+        """
+        Like :meth:`~.Value.from_obj` but without checking the types of the parsed values.
+        Strings written by odML itself are parsed without :data:`VALUE_EXPR`.
+        """
+        if isinstance(thing, six.string_types):
+            return _parse_value(thing, trusted=True)
+        elif isinstance(thing, Value):
+            return thing
+        elif thing is None:
+            raise ValueError("Can't covert None to a value")
+        return Value._unchecked(thing)
+
+
+def _is_close(a, b):
+    return abs(a - b) <= UNIT_TOLERANCE * max(abs(a), abs(b))
+
+
+def _value_type(value):
+    """
+    :return: The type name of a value, looked up once per class of values.
+    """
+    cls = value.__class__
+    name = _VALUE_TYPE_NAMES.get(cls)
+    if name is None:
+        for t, s in VALUE_TYPE_MAP.items():
+            if issubclass(cls, t):
+                name = s
+        _VALUE_TYPE_NAMES[cls] = name
+    return name
+
+
+def _split_quantity(string):
+    """
+    Split a string in the exact form written by :class:`~.Value`, like '10±0.001mV', into
+    number, uncertainty and unit without VALUE_EXPR.
+
+    :return: The value or None if the string is not in this form.
+    :rtype: :class:`~.Value`
+    """
+    end = len(string)
+    while end > 0 and string[end - 1] in _UNIT_CHARS:
+        end -= 1
+    if len(string) - end > 4:
+        return None
+    number, sep, uncertainty = string[:end].partition(PLUS_MINUS_UNICODE)
+    if not sep:
+        number, sep, uncertainty = number.partition("+-")
+    try:
+        num = float(number) if "." in number else int(number)
+        unc = float(uncertainty) if sep else None
+    except ValueError:
+        return None
+    # only numbers as written by str(), VALUE_EXPR decides about all others
+    if str(num) != number or sep and (unc < 0 or str(unc) != uncertainty):
+        return None
+    return Value._unchecked(num, string[end:] or None, unc)
+
+
+def _parse_value(string, trusted=False):
+    """
+    Create a value from a string like '10 +-0.001 mV'. Strings that can't be a number are
+    not matched against VALUE_EXPR, the results for all others are kept in a bounded LRU
+    cache, since values are immutable and the same strings occur over and over again.
+
+    :param trusted: If True strings written by odML itself are split without VALUE_EXPR.
+
+    :return: The parsed value.
+    :rtype: :class:`~.Value`
+    """
+    if len(string) == 0 or string[0] not in _QUANTITY_START:
+        return Value._unchecked(string)
+    value = _VALUE_CACHE.pop(string, None)
+    if value is None and trusted:
+        value = _split_quantity(string)
+    if value is None:
+        match = VALUE_EXPR.match(string)
+        if match is None:
+            value = Value._unchecked(string)
+        else:
+            g = match.groups()
+            num, is_float, uncertainty, unit = (g[0], g[3], g[7], g[11])
+            num = float(num) if is_float is not None else int(num)
+            uncertainty = float(uncertainty) if uncertainty is not None else None
+            value = Value._unchecked(num, unit, uncertainty)
+        if len(_VALUE_CACHE) >= _VALUE_CACHE_SIZE:
+            try:
+                _VALUE_CACHE.popitem(last=False)
+            except KeyError:
+                # emptied by another thread in between
+                pass
+    _VALUE_CACHE[string] = value
+    return value
+
+
+@python_2_unicode_compatible
+class ValueArray(Value):
+    """
+    A homogeneous array of numbers (or booleans) with a shared unit and an optional
+    uncertainty for each element, which is stored as a single value. The data is kept in
+    read only NumPy arrays without creating a :class:`~.Value` object per element.
+
+    .. code-block:: python
+
+        spikes = ValueArray(numpy.array([0.012, 0.107, 0.113]), unit="s")
+        section["spike_times"] = spikes
+        first = spikes[0]           # Value(0.012, "s")
+        later = spikes[1:]          # ValueArray sharing the data of spikes
+
+    Indexing with an integer returns a single :class:`~.Value`, slicing returns a value array
+    which shares its data with the sliced array. The whole data is available as NumPy arrays
+    through :attr:`~.Value.value` and :attr:`~.Value.uncertainty`.
+
+    :param values:          The elements of the array (one dimensional).
+    :type values:           numpy.ndarray
+    :param unit:            The SI unit of all elements.
+    :type unit:             str
+    :param uncertainty:     The uncertainty of each element (optional).
+    :type uncertainty:      numpy.ndarray
+    """
+
+    __slots__ = ()
+
+    def __init__(self, values, unit=None, uncertainty=None):
+        if numpy is None:
+            raise ImportError("NumPy is required for value arrays")
+        values = ValueArray.__read_only(numpy.asarray(values))
+        if values.ndim != 1 or values.dtype.kind not in "biuf":
+            raise ValueError("Values must be a one dimensional array of numbers or booleans")
+        if unit is not None and not isinstance(unit, six.string_types):
+            raise ValueError("Unit must be a string")
+        if uncertainty is not None:
+            uncertainty = ValueArray.__read_only(numpy.asarray(uncertainty, dtype=float))
+            if uncertainty.shape != values.shape:
+                raise ValueError("Uncertainty must have the same shape as the values")
+        self._set(values, unit, uncertainty, ARRAY_TYPE)
+
+    @staticmethod
+    def __read_only(array):
+        # a view, so that the data is not copied but can't be changed through the value
+        if array.flags.writeable:
+            array = array.view()
+            array.flags.writeable = False
+        return array
+
+    @property
+    def type(self):
+        """
+        The name of the values data type, which is always ``"array"``.
+        """
+        return ARRAY_TYPE
+
+    def copy(self, value=None, unit=None, uncertainty=None):
+        return ValueArray(
+            value if value is not None else self.value,
+            unit if unit is not None else self.unit,
+            uncertainty if uncertainty is not None else self.uncertainty
+        )
+
+    def to(self, unit):
+        """
+        Convert all elements into another unit using the registry :data:`odml2.units.UNITS`.
+
+        :param unit:    The target unit.
+        :type unit:     str
+
+        :return:    The converted array.
+        :rtype:     :class:`~.ValueArray`
+
+        :raises:    ValueError if the array has no unit or the units are not convertible.
+        """
+        if self.unit is None:
+            raise ValueError("A value without unit can't be converted")
+        factor = UNITS.factor(self.unit, unit)
+        uncertainty = self.uncertainty
+        return ValueArray(self.value * factor, unit, uncertainty * factor if uncertainty is not None else None)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __getitem__(self, index):
+        uncertainty = self.uncertainty
+        if isinstance(index, slice):
+            return ValueArray(self.value[index], self.unit,
+                              uncertainty[index] if uncertainty is not None else None)
+        return Value._unchecked(self.value[index].item(), self.unit,
+                                uncertainty[index].item() if uncertainty is not None else None)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __lt__(self, other):
+        raise TypeError("Value arrays can't be ordered")
+
+    def __eq__(self, other):
+        if not isinstance(other, ValueArray):
+            return False
+        elif self.unit != other.unit and self.unit is not None and other.unit is not None:
+            if not UNITS.is_convertible(other.unit, self.unit):
+                return False
+            other = other.to(self.unit)
+            if (self.uncertainty is None) != (other.uncertainty is None) or len(self) != len(other):
+                return False
+            return (numpy.allclose(self.value, other.value, rtol=UNIT_TOLERANCE, atol=0) and
+                    (self.uncertainty is None or
+                     numpy.allclose(self.uncertainty, other.uncertainty, rtol=UNIT_TOLERANCE, atol=0)))
+        uncertainty, other_uncertainty = self.uncertainty, other.uncertainty
+        if (uncertainty is None) != (other_uncertainty is None):
+            return False
+        return (self.unit == other.unit and numpy.array_equal(self.value, other.value) and
+                (uncertainty is None or numpy.array_equal(uncertainty, other_uncertainty)))
+
+    def __str__(self):
+        return u"ValueArray(len=%d, unit=%s)" % (len(self), self.unit)
+
+    def __repr__(self):
+        return "ValueArray(value=%s, unit=%s, uncertainty=%s)" % (self.value, self.unit, self.uncertainty)
+
+    def _to_obj(self):
+        """
+        :return: A flow sequence of all elements, or a sequence of the elements, the unit
+                 and the uncertainties if one of them is set. Empty arrays also carry the
+                 name of their dtype, which can't be derived from the elements.
+        :rtype: tuple
+        """
+        if len(self) == 0:
+            uncertainty = [] if self.uncertainty is not None else None
+            return [], self.unit, uncertainty, self.value.dtype.name
+        elif self.unit is None and self.uncertainty is None:
+            return tuple(self.value.tolist())
+        elif self.uncertainty is None:
+            return self.value.tolist(), self.unit
+        return self.value.tolist(), self.unit, self.uncertainty.tolist()
+
+    @staticmethod
+    def _from_obj(thing):
+        """
+        Inverse of :meth:`_to_obj`, which also accepts lists.
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for value arrays")
+        if len(thing) > 0 and isinstance(thing[0], (list, tuple)):
+            values = numpy.array(thing[0], dtype=thing[3] if len(thing) > 3 else None)
+            return ValueArray(values, thing[1] if len(thing) > 1 else None, thing[2] if len(thing) > 2 else None)
+        return ValueArray(numpy.array(thing))
+
+    @staticmethod
+    def _from_buffers(dtype, values, unit=None, uncertainty=None):
+        """
+        Create a value array from the raw bytes of the elements and uncertainties.
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for value arrays")
+        return ValueArray(numpy.frombuffer(values, dtype=dtype), unit,
+                          numpy.frombuffer(uncertainty, dtype=float) if uncertainty is not None else None)
+
 
 @python_2_unicode_compatible
 class NameSpace(object):
@@ -506,6 +955,8 @@ class NameSpace(object):
     :type uri:          str
     """
 
+    __slots__ = ("__prefix", "__uri", "__doc")
+
     def __init__(self, prefix, uri):
         assert_prefix(prefix)
         self.__prefix = prefix
@@ -532,15 +983,14 @@ class NameSpace(object):
 
     def get_document(self):
         """
-        Try to open the document the uri of the name space points to.
+        Try to open the document the uri of the name space points to. Documents are
+        shared between name spaces with the same uri via :data:`~odml2.cache.NAMESPACE_CACHE`.
 
         :return:    The odML document the uri points to.
         :rtype:     :class:`~.Document`
         """
         if self.__doc is None:
-            doc = odml2.Document()
-            doc.load(self.uri, is_writable=False)
-            self.__doc = doc
+            self.__doc = NAMESPACE_CACHE.get_document(self.uri)
         return self.__doc
 
     def copy(self, prefix=None, uri=None):
@@ -568,6 +1018,17 @@ class NameSpace(object):
             str(uri) if uri is not None else self.__uri
         )
 
+    @staticmethod
+    def _unchecked(prefix, uri):
+        """
+        Create a name space without checking the prefix. Only for data from trusted sources.
+        """
+        ns = NameSpace.__new__(NameSpace)
+        ns.__prefix = prefix
+        ns.__uri = uri
+        ns.__doc = None
+        return ns
+
     def __eq__(self, other):
         if not isinstance(other, NameSpace):
             return False
@@ -589,6 +1050,16 @@ class NameSpaceMap(collections.MutableMapping):
     def __init__(self, back_end):
         self.__back_end = back_end
 
+    @property
+    def epoch(self):
+        """
+        A counter which is incremented whenever a name space is added, replaced or removed,
+        kept by the back-end. This is a read only property.
+
+        :type:      int
+        """
+        return self.__back_end.namespaces.epoch
+
     def set(self, prefix, uri):
         self[prefix] = NameSpace(prefix, uri)
 
@@ -653,6 +1124,17 @@ class TypeDef(object):
                 properties if properties != frozenset() else self.__properties
         )
 
+    @staticmethod
+    def _unchecked(name, definition=None, properties=frozenset()):
+        """
+        Create a type definition without checking the names. Only for data from trusted sources.
+        """
+        td = TypeDef.__new__(TypeDef)
+        td.__name = name
+        td.__definition = definition
+        td.__properties = frozenset(properties)
+        return td
+
     def __eq__(self, other):
         if not isinstance(other, TypeDef):
             return False
@@ -674,6 +1156,16 @@ class TypeDefMap(collections.MutableMapping):
     def __init__(self, back_end):
         self.__back_end = back_end
 
+    @property
+    def epoch(self):
+        """
+        A counter which is incremented whenever a definition is added, replaced or removed,
+        kept by the back-end. This is a read only property.
+
+        :type:      int
+        """
+        return self.__back_end.type_defs.epoch
+
     def set(self, name, definition=None, properties=frozenset()):
         self[name] = TypeDef(name, definition, properties)
 
@@ -740,6 +1232,17 @@ class PropertyDef(object):
                 types if types != frozenset() else self.__types
         )
 
+    @staticmethod
+    def _unchecked(name, definition=None, types=frozenset()):
+        """
+        Create a property definition without checking the names. Only for data from trusted sources.
+        """
+        pd = PropertyDef.__new__(PropertyDef)
+        pd.__name = name
+        pd.__definition = definition
+        pd.__types = frozenset(types)
+        return pd
+
     def __eq__(self, other):
         if not isinstance(other, PropertyDef):
             return False
@@ -761,6 +1264,16 @@ class PropertyDefMap(collections.MutableMapping):
     def __init__(self, back_end):
         self.__back_end = back_end
 
+    @property
+    def epoch(self):
+        """
+        A counter which is incremented whenever a definition is added, replaced or removed,
+        kept by the back-end. This is a read only property.
+
+        :type:      int
+        """
+        return self.__back_end.property_defs.epoch
+
     def set(self, name, definition=None, types=frozenset()):
         self[name] = PropertyDef(name, definition, types)
 
@@ -10,15 +10,18 @@
 
 from future.utils import python_2_unicode_compatible
 import enum
+import weakref
+from collections import OrderedDict
 
 import odml2
-from odml2.model import VALUE_TYPE_MAP
-from odml2.checks import assert_prefixed_name, split_prefixed_name, join_prefixed_name
+from odml2.model import VALUE_TYPE_MAP, ARRAY_TYPE
+from odml2.cache import NAMESPACE_CACHE
+from odml2.checks import assert_prefixed_name, is_prefixed_name, split_prefixed_name, join_prefixed_name
 
-__all__ = ("TerminologyStrategy", )
+__all__ = ("TerminologyStrategy", "TerminologyError", "DeferredValidation")
 
 
-VALUE_TYPE_NAMES = tuple(VALUE_TYPE_MAP.values())
+VALUE_TYPE_NAMES = tuple(VALUE_TYPE_MAP.values()) + (ARRAY_TYPE, )
 
 
 # noinspection PyShadowingBuiltins
@@ -52,6 +55,150 @@ def _get_prop_definition(document, prefix, prop):
     return document.property_definitions[prop]
 
 
+class CompiledTerminology(object):
+    """
+    Precomputed terminology of a document and all documents linked via its namespaces.
+    All allowed (source type, property, target type) triples are stored in a hash set
+    which is updated incrementally when type or property definitions of the document
+    change.
+    """
+
+    def __init__(self):
+        self.__maps = None
+        self.__epochs = None
+        self.__type_defs = {}
+        self.__prop_defs = {}
+        self.__props_by_name = {}
+        self.__allowed = set()
+        self.__by_source = {}
+        self.__by_prop = {}
+        self.__accepted_triples = set()
+        self.__accepted_types = set()
+
+    # noinspection PyShadowingBuiltins
+    def has_type(self, document, type):
+        """
+        :return: True if the (prefixed) type name is defined.
+        """
+        self.sync(document)
+        if type in self.__accepted_types:
+            return True
+        if type in self.__type_defs:
+            self.__accepted_types.add(type)
+            return True
+        return False
+
+    def has_triple(self, document, source_type, prop, target_type):
+        """
+        :return: True if the property can be used in sections of the source type
+                 with values or sections of the target type.
+        """
+        self.sync(document)
+        triple = (source_type, prop, target_type)
+        if triple in self.__accepted_triples:
+            return True
+        if (source_type, prop, split_prefixed_name(target_type)[1]) in self.__allowed and \
+                is_prefixed_name(target_type):
+            self.__accepted_triples.add(triple)
+            return True
+        return False
+
+    def sync(self, document):
+        """
+        Update the compiled terminology if definitions of the document have changed. Everything
+        is rebuilt if the namespaces changed or a linked document was invalidated or reloaded
+        by :data:`~odml2.cache.NAMESPACE_CACHE`.
+        """
+        maps = (document.namespaces, document.type_definitions, document.property_definitions)
+        epochs = tuple(m.epoch for m in maps) + (NAMESPACE_CACHE.epoch, )
+        same_maps = self.__maps is not None and all(a is b for a, b in zip(maps, self.__maps))
+        if same_maps and epochs == self.__epochs:
+            return
+
+        if not same_maps or epochs[0] != self.__epochs[0] or epochs[3] != self.__epochs[3]:
+            self.__rebuild(document)
+        else:
+            self.__update(document)
+        self.__maps = maps
+        self.__epochs = epochs
+        self.__accepted_triples.clear()
+        self.__accepted_types.clear()
+
+    def __rebuild(self, document):
+        self.__type_defs.clear()
+        self.__prop_defs.clear()
+        self.__props_by_name.clear()
+        self.__allowed.clear()
+        self.__by_source.clear()
+        self.__by_prop.clear()
+
+        documents = [(None, document)]
+        for ns in document.namespaces.values():
+            try:
+                documents.append((ns.prefix, NAMESPACE_CACHE.get_document(ns.uri)))
+            except Exception:
+                # names from this namespace are reported by the strategy's own lookups
+                continue
+        for prefix, doc in documents:
+            for name, td in doc.type_definitions.items():
+                self.__type_defs[join_prefixed_name(prefix, name)] = td.properties
+            for name, pd in doc.property_definitions.items():
+                self.__set_prop(join_prefixed_name(prefix, name), pd.types)
+        for source_type in self.__type_defs:
+            self.__add_source(source_type)
+
+    def __update(self, document):
+        type_defs = dict((name, td.properties) for name, td in document.type_definitions.items())
+        prop_defs = dict((name, pd.types) for name, pd in document.property_definitions.items())
+        local_types = set(n for n in self.__type_defs if split_prefixed_name(n)[0] is None)
+        local_props = set(n for n in self.__prop_defs if split_prefixed_name(n)[0] is None)
+
+        for name in local_props | set(prop_defs):
+            types = prop_defs.get(name)
+            if types == self.__prop_defs.get(name):
+                continue
+            self.__remove(self.__by_prop.pop(name, ()))
+            self.__prop_defs.pop(name, None)
+            self.__props_by_name.get(name, set()).discard(name)
+            if types is not None:
+                self.__set_prop(name, types)
+                for source_type, props in self.__type_defs.items():
+                    if name in props:
+                        self.__add_triples(source_type, name, types)
+
+        for name in local_types | set(type_defs):
+            props = type_defs.get(name)
+            if props == self.__type_defs.get(name):
+                continue
+            self.__remove(self.__by_source.pop(name, ()))
+            self.__type_defs.pop(name, None)
+            if props is not None:
+                self.__type_defs[name] = props
+                self.__add_source(name)
+
+    def __set_prop(self, full_name, types):
+        self.__prop_defs[full_name] = types
+        self.__props_by_name.setdefault(split_prefixed_name(full_name)[1], set()).add(full_name)
+
+    def __add_source(self, source_type):
+        for prop_name in self.__type_defs[source_type]:
+            for prop in self.__props_by_name.get(prop_name, ()):
+                self.__add_triples(source_type, prop, self.__prop_defs[prop])
+
+    def __add_triples(self, source_type, prop, types):
+        for target_type in types:
+            triple = (source_type, prop, target_type)
+            self.__allowed.add(triple)
+            self.__by_source.setdefault(source_type, set()).add(triple)
+            self.__by_prop.setdefault(prop, set()).add(triple)
+
+    def __remove(self, triples):
+        for triple in triples:
+            self.__allowed.discard(triple)
+            self.__by_source.get(triple[0], set()).discard(triple)
+            self.__by_prop.get(triple[1], set()).discard(triple)
+
+
 class BasicStrategy(object):
     """
     Just checks whether the property and type names are valid names.
@@ -118,13 +265,30 @@ class CreateStrategy(BasicStrategy):
             _get_type_definition(document, prefix, type)
 
 
-# TODO implement strict strategy
 class StrictStrategy(BasicStrategy):
     """
     Only allows consistent use of known properties or types.
+    Names are checked against a :class:`~.CompiledTerminology` of the document, the slower
+    lookups below are only used to report violations.
     """
 
+    def __init__(self):
+        self.__compiled = weakref.WeakKeyDictionary()
+
+    def compiled(self, document):
+        """
+        :return: The compiled terminology of the document.
+        :rtype: :class:`~.CompiledTerminology`
+        """
+        compiled = self.__compiled.get(document)
+        if compiled is None:
+            compiled = CompiledTerminology()
+            self.__compiled[document] = compiled
+        return compiled
+
     def handle_triple(self, document, source_type, prop, target_type):
+        if self.compiled(document).has_triple(document, source_type, prop, target_type):
+            return
         super(StrictStrategy, self).handle_triple(document, source_type, prop, target_type)
         source_prefix, source_type = split_prefixed_name(source_type)
         source_def = _get_type_definition(document, source_prefix, source_type)
@@ -142,11 +306,79 @@ class StrictStrategy(BasicStrategy):
 
     # noinspection PyShadowingBuiltins
     def handle_type(self, document, type):
+        if self.compiled(document).has_type(document, type):
+            return
         super(StrictStrategy, self).handle_type(document, type)
         prefix, type = split_prefixed_name(type)
         _get_type_definition(document, prefix, type)
 
 
+@python_2_unicode_compatible
+class TerminologyError(ValueError):
+    """
+    Reports all terminology violations found by :class:`~.DeferredValidation`.
+
+    :param errors:  Pairs of the offending type or (source type, property, target type)
+                    triple and the error raised for it.
+    :type errors:   list[tuple]
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        lines = [u"%d terminology violation(s):" % len(errors)]
+        lines.extend(u"  %s: %s" % (u", ".join(item) if isinstance(item, tuple) else item, e)
+                     for item, e in errors)
+        super(TerminologyError, self).__init__(u"\n".join(lines))
+
+    def __str__(self):
+        return self.args[0]
+
+
+class DeferredValidation(BasicStrategy):
+    """
+    Collects types and triples instead of handling them immediately. Each distinct type
+    and triple is later handled once by the wrapped strategy in :meth:`validate`.
+    See :meth:`~.Document.deferred_validation`.
+
+    :param strategy:    The strategy used for validation.
+    :type strategy:     :class:`~.TerminologyStrategy`
+    """
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.__types = OrderedDict()
+        self.__triples = OrderedDict()
+
+    def handle_triple(self, document, source_type, prop, target_type):
+        self.__triples[(source_type, prop, target_type)] = None
+
+    # noinspection PyShadowingBuiltins
+    def handle_type(self, document, type):
+        self.__types[type] = None
+
+    def validate(self, document):
+        """
+        Handle all collected types and triples with the wrapped strategy.
+
+        :raises TerminologyError: If one or more types or triples are not valid.
+        """
+        errors = []
+        for type in self.__types:
+            try:
+                self.strategy.handle_type(document, type)
+            except ValueError as e:
+                errors.append((type, e))
+        for triple in self.__triples:
+            try:
+                self.strategy.handle_triple(document, *triple)
+            except ValueError as e:
+                errors.append((triple, e))
+        self.__types.clear()
+        self.__triples.clear()
+        if len(errors) > 0:
+            raise TerminologyError(errors)
+
+
 @python_2_unicode_compatible
 class TerminologyStrategy(BasicStrategy, enum.Enum):
     Ignore = BasicStrategy()
@@ -0,0 +1,173 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+"""
+Provides a registry of SI units and their prefixes, which is used to compare and convert
+values with different units.
+"""
+
+import odml2
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ("UnitRegistry", "UNITS", "convert_many")
+
+
+MICRO_SIGN = u"µ"
+GREEK_MU = u"μ"
+OMEGA = u"Ω"
+
+SI_PREFIXES = {
+    "Y": 1e24, "Z": 1e21, "E": 1e18, "P": 1e15, "T": 1e12, "G": 1e9, "M": 1e6, "k": 1e3, "h": 1e2, "da": 1e1,
+    "d": 1e-1, "c": 1e-2, "m": 1e-3, "u": 1e-6, MICRO_SIGN: 1e-6, GREEK_MU: 1e-6, "n": 1e-9, "p": 1e-12,
+    "f": 1e-15, "a": 1e-18, "z": 1e-21, "y": 1e-24
+}
+
+
+class UnitRegistry(object):
+    """
+    A registry of units which can be converted into each other. Each unit is measured in
+    a base unit with a certain factor, units with the same base unit are convertible. All
+    prefixed forms of a unit are registered together with the unit, e.g. ``ms``, ``µs`` and
+    ``μs`` for ``s``.
+
+    .. code-block:: python
+
+        units = UnitRegistry()
+        units.define("s")
+        units.define("min", "s", 60, prefixes=False)
+        units.factor("min", "ms")   # 60000.0
+    """
+
+    def __init__(self):
+        # unit -> (base unit, factor)
+        self.__units = {}
+
+    def define(self, unit, base=None, factor=1.0, prefixes=True):
+        """
+        Define a unit. Explicitly defined units take precedence over prefixed forms of
+        other units.
+
+        :param unit:        The symbol of the unit.
+        :type unit:         str
+        :param base:        A known unit the new unit is measured in or None if the unit is
+                            a base unit itself.
+        :type base:         str
+        :param factor:      The value of one unit in the base unit.
+        :type factor:       float
+        :param prefixes:    Whether the unit can be used with SI prefixes.
+        :type prefixes:     bool
+        """
+        if base is None:
+            base = unit
+        else:
+            base, base_factor = self.get(base)
+            factor *= base_factor
+        self.__units[unit] = (base, float(factor))
+        if prefixes:
+            for prefix, prefix_factor in SI_PREFIXES.items():
+                self.__units.setdefault(prefix + unit, (base, factor * prefix_factor))
+
+    def get(self, unit):
+        """
+        :param unit:    The symbol of the unit.
+        :type unit:     str
+
+        :return: The base unit of a unit and the value of the unit in its base unit.
+        :rtype: tuple
+
+        :raises: ValueError if the unit is not known.
+        """
+        entry = self.__units.get(unit)
+        if entry is None:
+            raise ValueError("Unknown unit '%s'" % unit)
+        return entry
+
+    def factor(self, source, target):
+        """
+        :return: The factor that converts numbers in the source unit into the target unit.
+        :rtype: float
+
+        :raises: ValueError if a unit is unknown or the units are not convertible.
+        """
+        source_base, source_factor = self.get(source)
+        target_base, target_factor = self.get(target)
+        if source_base != target_base:
+            raise ValueError("Unit '%s' can't be converted into '%s'" % (source, target))
+        return source_factor / target_factor
+
+    def is_convertible(self, source, target):
+        """
+        :return: True if both units are known and have the same base unit.
+        :rtype: bool
+        """
+        source_entry = self.__units.get(source)
+        target_entry = self.__units.get(target)
+        return source_entry is not None and target_entry is not None and source_entry[0] == target_entry[0]
+
+    def __contains__(self, unit):
+        return unit in self.__units
+
+    def __len__(self):
+        return len(self.__units)
+
+
+def _si_units():
+    units = UnitRegistry()
+    for unit in ("s", "m", "g", "A", "K", "mol", "cd", "rad", "sr", "Hz", "N", "Pa", "J", "W", "C", "V", OMEGA,
+                 "S", "F", "Wb", "T", "H", "lm", "lx", "Bq", "Gy", "Sv", "kat", "l", "eV"):
+        units.define(unit)
+    units.define("Ohm", OMEGA)
+    units.define("L", "l")
+    units.define("min", "s", 60, prefixes=False)
+    units.define("h", "s", 3600, prefixes=False)
+    return units
+
+
+#: The registry used for unit aware comparisons and conversions of values.
+UNITS = _si_units()
+
+
+def convert_many(values, unit):
+    """
+    Convert many values with possibly different but convertible units into one NumPy array of
+    numbers in the given unit. Factors are looked up once per distinct unit and the conversion
+    itself is done in one vectorized multiplication.
+
+    :param values:  The values to convert, a sequence of :class:`~odml2.Value` objects or a
+                    :class:`~odml2.ValueArray`.
+    :param unit:    The target unit.
+    :type unit:     str
+
+    :return: The converted numbers.
+    :rtype: numpy.ndarray
+
+    :raises: ValueError if a value has no unit or a unit that is not convertible.
+    """
+    if numpy is None:
+        raise ImportError("NumPy is required for converting many values at once")
+    if isinstance(values, odml2.ValueArray):
+        return values.value * UNITS.factor(values.unit, unit)
+
+    factors = {}
+    numbers = []
+    scales = []
+    for value in values:
+        factor = factors.get(value.unit)
+        if factor is None:
+            if value.unit is None:
+                raise ValueError("Value %s has no unit" % repr(value))
+            factor = factors[value.unit] = UNITS.factor(value.unit, unit)
+        numbers.append(value.value)
+        scales.append(factor)
+    return numpy.array(numbers, dtype=float) * numpy.array(scales, dtype=float)
@@ -50,6 +50,10 @@ setup(
         "PyYAML"
     ],
 
+    extras_require={
+        "numpy": ["numpy"]
+    },
+
     tests_require=[
         "nose"
     ],
@@ -0,0 +1,124 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+import os
+import shutil
+import tempfile
+import unittest
+import datetime as dt
+from uuid import uuid4
+
+from odml2 import Document, SB, Value
+from odml2.api.sqlite import SqliteDocument
+from test import test_model
+from test.api import test_yml
+
+
+class TestSqliteDocument(test_yml.TestYamlDocument):
+
+    BACK_END = SqliteDocument
+
+    def test_is_attached(self):
+        self.assertTrue(self.doc.is_attached())
+
+
+class TestSqliteSection(test_yml.TestYamlSection):
+
+    BACK_END = SqliteDocument
+
+
+class TestSqliteModelSection(test_model.TestSection):
+
+    BACK_END = SqliteDocument
+
+
+class TestSqlitePersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "test.odml2.db")
+        self.copy_path = os.path.join(self.dir, "copy.odml2.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_save_and_load(self):
+        doc = Document(back_end="sqlite")
+        self.assertTrue(doc.is_attached)
+        doc.author = "John Doe"
+        doc.date = dt.date(2015, 11, 11)
+        doc.namespaces.set("terms", "terms.yml")
+        doc.root = SB(
+            "RecordingSession",
+            label="session one",
+            start=dt.datetime(2015, 11, 11, 10, 30, 1, 500),
+            trials=[
+                SB("Trial", duration=Value(5, "ms", 0.1), valid=True),
+                SB("Trial", duration="2.5ms", valid=False)
+            ]
+        )
+        doc.root["first_trial"] = doc.root["trials"][0]
+        doc.save(self.path)
+        self.assertEqual(doc.location, self.path)
+
+        # changes are written immediately
+        doc.root["notes"] = "written after save"
+
+        loaded = Document()
+        loaded.load(self.path)
+        self.assertIsInstance(loaded.back_end, SqliteDocument)
+        self.assertEqual(loaded.author, "John Doe")
+        self.assertEqual(loaded.date, dt.date(2015, 11, 11))
+        self.assertEqual(loaded.namespaces["terms"].uri, "terms.yml")
+        root = loaded.root
+        self.assertEqual(root.label, "session one")
+        self.assertEqual(root["start"], dt.datetime(2015, 11, 11, 10, 30, 1, 500))
+        self.assertEqual(root["notes"], "written after save")
+        trials = root["trials"]
+        self.assertEqual(len(trials), 2)
+        self.assertEqual(trials[0].get("duration"), Value(5, "ms", 0.1))
+        self.assertEqual(trials[1].get("duration"), Value(2.5, "ms"))
+        self.assertIs(trials[0]["valid"], True)
+        self.assertTrue(root["first_trial"].is_link)
+        self.assertEqual(root["first_trial"].uuid, trials[0].uuid)
+        self.assertEqual(loaded.back_end.to_dict(), doc.back_end.to_dict())
+
+        del root["trials"]
+        self.assertEqual(len(loaded.back_end.sections), 1)
+        self.assertEqual(root.get("first_trial"), [])
+
+        loaded.save(self.copy_path)
+        self.assertEqual(loaded.location, self.copy_path)
+        self.assertEqual(len(Document(back_end=SqliteDocument()).back_end.sections), 0)
+
+    def test_read_only(self):
+        doc = Document(back_end="sqlite")
+        doc.root = SB("Experiment")
+        doc.save(self.path)
+
+        loaded = Document()
+        loaded.load(self.path, is_writable=False)
+        self.assertFalse(loaded.is_writable)
+
+        def set_label():
+            loaded.root.label = "label"
+        self.assertRaises(RuntimeError, set_label)
+
+    def test_load_missing(self):
+        doc = Document()
+        self.assertRaises(IOError, lambda: doc.load(self.path))
+
+    def test_replace_root(self):
+        doc = Document(back_end="sqlite")
+        doc.root = SB("Experiment", subjects=[SB("Subject"), SB("Subject")])
+        uuid = str(uuid4())
+        doc.root = SB("Experiment", uuid)
+        self.assertEqual(len(doc.back_end.sections), 1)
+        self.assertEqual(doc.root.uuid, uuid)
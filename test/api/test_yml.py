@@ -8,20 +8,32 @@
 # modification, are permitted under the terms of the BSD License. See
 # LICENSE file in the root of the project.
 
+import io
+import sys
+import yaml
 import unittest
-from datetime import datetime
+from datetime import date, datetime, time
 from uuid import uuid4
 
-from odml2 import Value
+from odml2 import Value, ValueArray
+from odml2.api import yml
 from odml2.api.base import BaseSection
+from odml2.model import ALLOWED_VALUE_TYPES
 from odml2.api.yml import YamlDocument
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class TestYamlDocument(unittest.TestCase):
 
+    BACK_END = YamlDocument
+
     def setUp(self):
-        self.doc = YamlDocument()
-        self.doc_ro = YamlDocument(is_writable=False)
+        self.doc = self.BACK_END()
+        self.doc_ro = self.BACK_END(is_writable=False)
 
     def test_is_attached(self):
         self.assertFalse(self.doc.is_attached())
@@ -117,10 +129,312 @@ class TestYamlDocument(unittest.TestCase):
         pass
 
 
-class TestYamlSection(unittest.TestCase):
+class TestYamlEngine(unittest.TestCase):
 
     def setUp(self):
         self.doc = YamlDocument()
+        self.doc.set_author(u"John Doe")
+        self.doc.set_date(datetime(2015, 11, 11, 10, 30))
+        self.doc.type_defs.set("Experiment", None, ("date", ))
+        self.doc.create_root("Experiment", str(uuid4()), u"Expériment", None)
+        sec = self.doc.sections[self.doc.get_root()]
+        sec.value_properties.set("duration", Value(1.5, "ms", 0.01))
+        sec.value_properties.set("valid", Value(True))
+
+    def save_and_load(self, loader, dumper):
+        loader_, dumper_ = yml.LOADER, yml.DUMPER
+        try:
+            yml.LOADER, yml.DUMPER = loader, dumper
+            f = io.StringIO()
+            self.doc.save(f)
+            doc = YamlDocument()
+            doc.load(io.StringIO(f.getvalue()))
+            return f.getvalue(), doc.to_dict()
+        finally:
+            yml.LOADER, yml.DUMPER = loader_, dumper_
+
+    def test_engine(self):
+        self.assertEqual(yml.ENGINE, "libyaml" if yaml.__with_libyaml__ else "python")
+
+    def test_global_yaml(self):
+        # representers are only registered on the private dumpers
+        self.assertEqual(yaml.dump((1, 2)).strip(), "!!python/tuple\n- 1\n- 2")
+        self.assertEqual(yaml.safe_dump((1, 2)), "- 1\n- 2\n")
+        self.assertRaises(yaml.representer.RepresenterError, lambda: yaml.safe_dump(time(10, 30)))
+
+    def test_same_output(self):
+        yaml_str, data = self.save_and_load(yml.Loader, yml.Dumper)
+        self.assertEqual(data, self.doc.to_dict())
+        self.assertEqual((yaml_str, data), self.save_and_load(yml.LOADER, yml.DUMPER))
+
+
+class TestYamlValueTypes(unittest.TestCase):
+
+    VALUES = {
+        "flag": True,
+        "count": 10,
+        "ratio": 1.5,
+        "day": date(2015, 11, 11),
+        "start": time(10, 30),
+        "precise": time(10, 30, 5, 250),
+        "created": datetime(2015, 11, 11, 10, 30),
+        "name": u"Sässion",
+        "clock": u"10:30:00",
+        "answer": u"yes",
+    }
+
+    def setUp(self):
+        self.doc = YamlDocument()
+        self.doc.create_root("Session", str(uuid4()), None, None)
+        values = self.doc.sections[self.doc.get_root()].value_properties
+        for prop, value in self.VALUES.items():
+            values.set(prop, Value(value))
+
+    def assert_values(self, doc):
+        values = doc.sections[doc.get_root()].value_properties
+        for prop, value in self.VALUES.items():
+            self.assertEqual(values[prop].value, value)
+            self.assertIs(type(values[prop].value), type(value))
+            self.assertEqual(values[prop].type, Value(value).type)
+
+    def test_allowed_types(self):
+        types = tuple(type(v) for v in self.VALUES.values())
+        for allowed in ALLOWED_VALUE_TYPES:
+            self.assertTrue(any(issubclass(t, allowed) for t in types), allowed)
+
+    def test_save_load(self):
+        for loader, dumper in set(((yml.Loader, yml.Dumper), (yml.LOADER, yml.DUMPER))):
+            loader_, dumper_ = yml.LOADER, yml.DUMPER
+            try:
+                yml.LOADER, yml.DUMPER = loader, dumper
+                f = io.StringIO()
+                self.doc.save(f)
+                doc = YamlDocument()
+                doc.load(io.StringIO(f.getvalue()))
+                self.assert_values(doc)
+
+                doc = YamlDocument()
+                doc.from_dict(yaml.load(f.getvalue(), Loader=loader))
+                self.assert_values(doc)
+            finally:
+                yml.LOADER, yml.DUMPER = loader_, dumper_
+
+
+class TestYamlEventReader(unittest.TestCase):
+
+    YAML = u"""
+metadata:
+  duration: &d 10ms
+  trials:
+  - type: Trial
+    uuid: 3a1b6bc6-b5b3-4d87-bd6d-a4e6d1b9ad22
+    duration: *d
+  - index: 2
+    uuid: 6fb9e2f4-0ee1-49e5-a8a3-ed27eaf45a10
+    stimulus:
+      uuid: 9e3a8e6f-e1b7-4a2b-8f34-7b8e1fa58c49
+      type: Stimulus
+    type: Trial
+    label: second trial
+  type: Session
+  uuid: 0c8f8c52-1b7b-4d62-a497-42e6e0ccb1fb
+  label: session
+definitions:
+  Session:
+    properties: [duration, trials]
+namespaces:
+  ns: ns.yml
+author: John Doe
+date: 2015-11-11
+format_version: 2
+"""
+
+    def test_read(self):
+        doc = YamlDocument()
+        doc.load(io.StringIO(self.YAML))
+        self.assertEqual(doc.get_author(), "John Doe")
+        self.assertEqual(doc.get_date(), datetime(2015, 11, 11).date())
+        self.assertEqual(doc.namespaces["ns"].uri, "ns.yml")
+        self.assertEqual(doc.type_defs["Session"].properties, {"duration", "trials"})
+
+        root = doc.sections[doc.get_root()]
+        self.assertEqual(root.get_uuid(), "0c8f8c52-1b7b-4d62-a497-42e6e0ccb1fb")
+        self.assertEqual(root.get_label(), "session")
+        self.assertEqual(root.value_properties["duration"], Value(10, "ms"))
+        trials = [doc.sections[ref.uuid] for ref in root.section_properties["trials"]]
+        self.assertEqual([t.get_type() for t in trials], ["Trial", "Trial"])
+        self.assertEqual(trials[0].value_properties["duration"], Value(10, "ms"))
+        self.assertEqual(trials[1].get_label(), "second trial")
+        self.assertEqual(trials[1].value_properties["index"], Value(2))
+        stimulus = trials[1].section_properties["stimulus"][0]
+        self.assertEqual(doc.sections[stimulus.uuid].get_type(), "Stimulus")
+
+        expected = YamlDocument()
+        expected.from_dict(yaml.load(self.YAML, Loader=yaml.SafeLoader))
+        self.assertEqual(doc.to_dict(), expected.to_dict())
+
+    def test_read_empty_list(self):
+        data = u"format_version: 2\nmetadata:\n  type: Session\n  uuid: %s\n  trials: []\n" % uuid4()
+        doc = YamlDocument()
+        doc.load(io.StringIO(data))
+        expected = YamlDocument()
+        expected.from_dict(yaml.safe_load(data))
+        for d in (doc, expected):
+            root = d.sections[d.get_root()]
+            self.assertNotIn("trials", root.value_properties)
+            self.assertNotIn("trials", root.section_properties)
+
+    def test_legacy_time(self):
+        # times written by earlier versions with yaml.Dumper, python 3 and python 2 style
+        data = u"""format_version: 2
+metadata:
+  type: Session
+  uuid: %s
+  start: !!python/object/apply:datetime.time
+  - !!binary |
+    Dh4BAAH0
+  end: !!python/object/apply:datetime.time
+  - "\\n\\x1E\\0\\0\\0\\0"
+""" % uuid4()
+        expected = {"start": time(14, 30, 1, 500), "end": time(10, 30)}
+        doc = YamlDocument()
+        doc.load(io.StringIO(data))
+        values = doc.sections[doc.get_root()].value_properties
+        self.assertEqual(dict((p, values[p].value) for p in values), expected)
+
+        for loader in set((yml.Loader, yml.LOADER)):
+            loaded = yaml.load(data, Loader=loader)["metadata"]
+            self.assertEqual(loaded["start"], expected["start"])
+            self.assertEqual(loaded["end"], expected["end"])
+
+        invalid = data.replace("Dh4BAAH0", "Dh4B")
+        self.assertRaises(ValueError, lambda: YamlDocument().load(io.StringIO(invalid)))
+        self.assertRaises(ValueError, lambda: yaml.load(invalid, Loader=yml.LOADER))
+
+    def test_format_version(self):
+        doc = YamlDocument()
+        self.assertRaises(RuntimeError, lambda: doc.load(io.StringIO(u"format_version: 1\nmetadata: null\n")))
+        self.assertRaises(RuntimeError, lambda: doc.load(io.StringIO(u"metadata: null\n")))
+
+        # a version after the metadata must be checked before the document is cleared
+        doc.load(io.StringIO(self.YAML))
+        expected = doc.to_dict()
+        other = u"metadata:\n  type: Other\n  uuid: %s\nformat_version: 3\n" % uuid4()
+        self.assertRaises(RuntimeError, lambda: doc.load(io.StringIO(other)))
+        self.assertEqual(doc.to_dict(), expected)
+        self.assertEqual(doc.sections[doc.get_root()].get_type(), "Session")
+
+
+class TestYamlEventWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = YamlDocument()
+        date = datetime(2015, 11, 11, 10, 30)
+        self.doc.set_date(date)
+        types = frozenset(("int", "float"))
+        self.doc.property_defs.set("index", "The index " * 10, types)
+        self.doc.property_defs.set("count", None, types)
+        self.ids = [str(uuid4()) for _ in range(4)]
+        self.doc.create_root("Session", self.ids[0], u"Sässion", None)
+        root = self.doc.sections[self.ids[0]]
+        root.value_properties.set("start", Value(date))
+        root.value_properties.set("time", Value(time(10, 30)))
+        root.value_properties.set("flag", Value("yes"))
+        self.doc.sections.add("Trial", self.ids[1], None, None, self.ids[0], "trials")
+        self.doc.sections.add("Trial", self.ids[2], None, "data.h5", self.ids[0], "trials")
+        self.doc.sections.add("Subject", self.ids[3], None, None, self.ids[1], "subject")
+        self.doc.sections[self.ids[1]].value_properties.set("duration", Value(1.5, "ms", 0.01))
+        self.doc.sections.add_link(self.ids[1], None, self.ids[0], "first")
+        self.doc.sections.add_link(self.ids[3], "ns", self.ids[2], "subjects")
+        self.doc.sections.add_link(self.ids[1], None, self.ids[2], "subjects")
+
+    def assert_same_output(self, doc):
+        f = io.StringIO()
+        doc.save(f)
+        expected = yaml.dump(doc.to_dict(), Dumper=yml.DUMPER, default_flow_style=False, allow_unicode=True)
+        self.assertEqual(f.getvalue(), expected)
+
+    def test_write(self):
+        self.assert_same_output(self.doc)
+        f = io.StringIO()
+        self.doc.save(f)
+        # the date is shared by the header and a value, but no anchors are written
+        self.assertNotIn(u"&id", f.getvalue())
+        self.assertIn(u"time: !time 10:30:00", f.getvalue())
+        self.doc.sections[self.ids[2]].section_properties.set("subjects", ())
+        self.assert_same_output(self.doc)
+
+    def test_write_empty(self):
+        self.assert_same_output(YamlDocument())
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_write_arrays(self):
+        doc = YamlDocument()
+        doc.create_root("Session", self.ids[0], None, None)
+        doc.sections.add("Trial", self.ids[1], None, None, self.ids[0], "trials")
+        doc.sections.add("Trial", self.ids[2], None, None, self.ids[0], "trials")
+        root = doc.sections[self.ids[0]]
+        spikes = ValueArray(numpy.array([0.5, 1.25]), "s", numpy.array([0.01, 0.02]))
+        root.value_properties.set("spikes", spikes)
+        root.value_properties.set("counts", ValueArray(numpy.array([1, 2, 3])))
+        root.value_properties.set("empty", ValueArray(numpy.array([], dtype=numpy.int32), "s"))
+        self.assert_same_output(doc)
+
+        f = io.StringIO()
+        doc.save(f)
+        self.assertIn("counts: [1, 2, 3]", f.getvalue())
+        self.assertIn("spikes: [[0.5, 1.25], s, [0.01, 0.02]]", f.getvalue())
+        for trusted in (False, True):
+            f.seek(0)
+            doc = YamlDocument()
+            doc.load(f, trusted=trusted)
+            loaded = doc.sections[self.ids[0]].value_properties
+            self.assertEqual(loaded["spikes"], spikes)
+            self.assertEqual(loaded["counts"], ValueArray([1, 2, 3]))
+            self.assertEqual(loaded["empty"].value.dtype, numpy.int32)
+            self.assertEqual(loaded["empty"].unit, "s")
+            self.assertEqual(len(doc.sections[self.ids[0]].section_properties["trials"]), 2)
+        doc = YamlDocument()
+        doc.from_dict(yaml.safe_load(f.getvalue()))
+        self.assertEqual(doc.sections[self.ids[0]].value_properties["spikes"], spikes)
+        self.assertEqual(doc.sections[self.ids[0]].value_properties["empty"].value.dtype, numpy.int32)
+
+
+class TestDeepDocument(unittest.TestCase):
+
+    def setUp(self):
+        self.depth = sys.getrecursionlimit() + 100
+        self.doc = YamlDocument()
+        parent = str(uuid4())
+        self.doc.create_root("Electrode", parent, None, None)
+        for i in range(self.depth):
+            uuid = str(uuid4())
+            self.doc.sections.add("Channel", uuid, None, None, parent, "child")
+            self.doc.sections[uuid].value_properties.set("index", Value(i))
+            parent = uuid
+
+    def test_to_from_dict(self):
+        data = self.doc.to_dict()
+        doc = YamlDocument()
+        doc.from_dict(data)
+        self.assertEqual(len(doc.sections), self.depth + 1)
+        self.assertEqual(doc.sections.keys(), self.doc.sections.keys())
+
+    def test_save_load(self):
+        f = io.StringIO()
+        self.doc.save(f)
+        doc = YamlDocument()
+        doc.load(io.StringIO(f.getvalue()))
+        self.assertEqual(len(doc.sections), self.depth + 1)
+        self.assertEqual(doc.sections.keys(), self.doc.sections.keys())
+
+
+class TestYamlSection(unittest.TestCase):
+
+    BACK_END = YamlDocument
+
+    def setUp(self):
+        self.doc = self.BACK_END()
         self.id01 = str(uuid4())
         self.id02 = str(uuid4())
         self.doc.sections.add("Experiment", self.id01, "experiment one", None, None, None)
@@ -187,3 +501,125 @@ class TestYamlSection(unittest.TestCase):
         self.assertFalse("duration" in sec.value_properties)
         self.assertIsNone(sec.value_properties.get("duration"))
         self.assertRaises(KeyError, lambda: sec.value_properties["duration"])
+
+    def test_delete_subtree(self):
+        id03, id04, id05 = tuple(str(uuid4()) for _ in range(3))
+        self.doc.sections.add("Trial", id03, None, None, parent_uuid=self.id02, parent_prop="trials")
+        self.doc.sections.add("Trial", id04, None, None, parent_uuid=self.id02, parent_prop="trials")
+        self.doc.sections.add("Stimulus", id05, None, None, parent_uuid=self.id01, parent_prop="stimuli")
+        self.doc.sections.add_link(id03, None, self.id01, "first_trial")
+        self.doc.sections.add_link(id05, None, id04, "stimulus")
+        self.assertEqual(self.doc.sections.get_parent(id03), (self.id02, "trials"))
+        self.assertEqual(self.doc.sections.get_parent(self.id01), (None, None))
+
+        del self.doc.sections[self.id02]
+        self.assertEqual(len(self.doc.sections), 2)
+        for uuid in (self.id02, id03, id04):
+            self.assertFalse(uuid in self.doc.sections)
+            self.assertEqual(self.doc.sections.get_parent(uuid), (None, None))
+
+        root = self.doc.sections[self.id01]
+        self.assertEqual(root.section_properties["sessions"], ())
+        self.assertEqual(root.section_properties["first_trial"], ())
+        self.assertEqual(len(root.section_properties["stimuli"]), 1)
+
+        del self.doc.sections[id05]
+        self.assertEqual(root.section_properties["stimuli"], ())
+
+    def test_delete_linked_section(self):
+        id03 = str(uuid4())
+        self.doc.sections.add("Trial", id03, None, None, parent_uuid=self.id01, parent_prop="trials")
+        self.doc.sections.add_link(id03, None, self.id02, "trial")
+        self.doc.sections.add_link(id03, None, self.id02, "trial")
+
+        del self.doc.sections[id03]
+        sec = self.doc.sections[self.id02]
+        self.assertEqual(sec.section_properties["trial"], ())
+
+    def test_replace_root(self):
+        id03 = str(uuid4())
+        self.doc.create_root("Experiment", id03, None, None)
+        self.assertEqual(len(self.doc.sections), 1)
+        self.assertEqual(self.doc.get_root(), id03)
+        self.assertEqual(self.doc.sections.get_parent(self.id02), (None, None))
+
+    def test_section_refs_append_and_extend(self):
+        from odml2.api.base import SectionRef
+        id03, id04 = tuple(str(uuid4()) for _ in range(2))
+        sec = self.doc.sections[self.id01]
+        self.doc.sections.add("Session", id03, None, None, parent_uuid=self.id01, parent_prop="sessions")
+        refs = sec.section_properties["sessions"]
+        self.assertEqual([r.uuid for r in refs], [self.id02, id03])
+        self.assertRaises(AttributeError, lambda: refs.append(None))
+
+        sec.section_properties.extend("links", (SectionRef(self.id02, None, True), SectionRef(id03, None, True)))
+        sec.section_properties.append("links", SectionRef(id04, "ns", True))
+        self.assertEqual([r.uuid for r in sec.section_properties["links"]], [self.id02, id03, id04])
+        self.assertEqual(len(sec.section_properties["links"][1:]), 2)
+
+        del self.doc.sections[id03]
+        self.assertEqual([r.uuid for r in sec.section_properties["links"]], [self.id02, id04])
+        self.assertEqual([r.uuid for r in refs], [self.id02, id03])
+
+
+class TestMemSectionLayout(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = YamlDocument()
+        self.id01, self.id02, self.id03 = tuple(str(uuid4()) for _ in range(3))
+        self.doc.create_root("Experiment", self.id01, None, None)
+        self.doc.sections.add("Session", self.id02, None, None, self.id01, "sessions")
+        self.doc.sections.add("Session", self.id03, None, None, self.id01, "sessions")
+
+    def test_slots(self):
+        from odml2 import NameSpace
+        from odml2.api.base import SectionRef
+        sec = self.doc.sections[self.id02]
+        objects = (sec, sec.section_properties, sec.value_properties, Value(1.0, "ms", 0.1),
+                   NameSpace("ns", "terms.yml"), SectionRef(self.id02, None, False),
+                   self.doc.sections[self.id01].section_properties["sessions"])
+        for obj in objects:
+            self.assertFalse(hasattr(obj, "__dict__"), type(obj).__name__)
+
+    def test_empty_maps(self):
+        sec02 = self.doc.sections[self.id02]
+        sec03 = self.doc.sections[self.id03]
+        self.assertEqual(len(sec02.value_properties), 0)
+        self.assertEqual(list(sec03.section_properties), [])
+
+        sec02.value_properties["b"] = Value(1)
+        sec02.value_properties["a"] = Value(2)
+        self.doc.sections.add_link(self.id02, None, self.id03, "other")
+        self.assertEqual(list(sec02.value_properties), ["a", "b"])
+        sec02.value_properties["0"] = Value(3)
+        self.assertEqual(list(sec02.value_properties), ["0", "a", "b"])
+        del sec02.value_properties["a"]
+        self.assertEqual(list(sec02.value_properties), ["0", "b"])
+        self.assertEqual(len(sec03.value_properties), 0)
+        self.assertEqual(len(sec02.section_properties), 0)
+        self.assertEqual(list(sec03.section_properties), ["other"])
+
+    def test_lazy_maps(self):
+        sec01 = self.doc.sections[self.id01]
+        sec02 = self.doc.sections[self.id02]
+        self.doc.sections.add_link(self.id02, None, self.id01, "other")
+        self.doc.to_dict()
+        self.doc.save(io.StringIO())
+        # adding sections, links and saving never creates maps which are not needed
+        self.assertIsNone(sec01._MemSection__value_properties)
+        self.assertIsNone(sec02._MemSection__value_properties)
+        self.assertIsNone(sec02._MemSection__section_properties)
+        self.assertFalse(sec02._has_value_properties())
+        self.assertTrue(sec01._has_section_properties())
+
+    def test_interned_names(self):
+        doc = YamlDocument()
+        # names created at runtime are not interned by the interpreter
+        doc.from_dict({"format_version": 2, "metadata": {"uuid": self.id01, "type": "Experiment", "sessions": [
+            {"uuid": self.id02, "type": "".join(("Sess", "ion")), "".join(("dura", "tion")): "1s"},
+            {"uuid": self.id03, "type": "".join(("Sess", "ion")), "".join(("dura", "tion")): "2s"}
+        ]}})
+        sec02 = doc.sections[self.id02]
+        sec03 = doc.sections[self.id03]
+        self.assertIs(sec02.get_type(), sec03.get_type())
+        self.assertIs(list(sec02.value_properties)[0], list(sec03.value_properties)[0])
@@ -171,3 +171,33 @@ class TestSB(unittest.TestCase):
                     )
                 }
         )
+
+    def test_bulk_build(self):
+        for back_end in ("yaml", "sqlite"):
+            doc = Document(back_end=back_end)
+            doc.root = SB("Session", trials=[SB("Trial", index=i, stimuli=[SB("Stimulus"), SB("Stimulus")])
+                                             for i in range(5)])
+            trials = doc.root["trials"]
+            self.assertEqual([t["index"] for t in trials], list(range(5)))
+            self.assertEqual(len(doc.back_end.sections), 16)
+            self.assertEqual(doc.back_end.sections.get_parent(trials[2].uuid), (doc.root.uuid, "trials"))
+
+            # sections from the document are linked after the builders were created
+            doc.root["first"] = SB("Trial", previous=trials[0], stimuli=[SB("Stimulus"), trials[0]["stimuli"][0]])
+            first = doc.root["first"]
+            self.assertTrue(first.get("previous")[0].is_link)
+            self.assertEqual([s.is_link for s in first.get("stimuli")], [False, True])
+
+            self.assertRaises(ValueError, SB("Trial", stimuli=[SB("Stimulus"), 1]).build, doc, doc.root.uuid, "x")
+            self.assertNotIn("x", doc.root)
+
+    def test_bulk_build_strict(self):
+        doc = Document(strategy=TerminologyStrategy.Create)
+        doc.root = SB("Session", trials=[SB("Trial", index=1)])
+        self.assertEqual(doc.type_definitions["Session"].properties, {"trials"})
+        self.assertEqual(doc.property_definitions["index"].types, {"float"})
+
+        doc.terminology_strategy = TerminologyStrategy.Strict
+        builder = SB("Trial", index=2, stimulus=SB("Stimulus"))
+        self.assertRaises(ValueError, builder.build, doc, doc.root.uuid, "trials")
+        self.assertEqual(len(doc.back_end.sections), 2)
@@ -0,0 +1,100 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+import os
+import unittest
+
+from odml2 import *
+
+
+class TestDocumentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = DocumentCache(max_size=2)
+        self.files = ("terms1.yml", "terms2.yml", "terms3.yml")
+        for i, path in enumerate(self.files):
+            doc = Document()
+            doc.root = SB("Terms", label="terms %d" % i)
+            doc.save(path)
+
+    def tearDown(self):
+        for path in self.files:
+            os.remove(path)
+
+    def test_hit_and_miss(self):
+        doc1 = self.cache.get_document("terms1.yml")
+        self.assertFalse(doc1.is_writable)
+        self.assertEqual(self.cache.stats(), CacheStats(0, 1, 1, 2))
+
+        doc2 = self.cache.get_document(os.path.abspath("terms1.yml"))
+        self.assertIs(doc1, doc2)
+        self.assertEqual(self.cache.stats(), CacheStats(1, 1, 1, 2))
+
+        doc3 = self.cache.get_document("file://" + os.path.abspath("terms1.yml"))
+        self.assertIs(doc1, doc3)
+        self.assertEqual(self.cache.stats().hits, 2)
+
+        self.cache.reset_stats()
+        self.assertEqual(self.cache.stats(), CacheStats(0, 0, 1, 2))
+
+    def test_modified_source(self):
+        doc1 = self.cache.get_document("terms1.yml")
+        self.assertEqual(doc1.root.label, "terms 0")
+        self.cache.get_document("terms1.yml")
+        epoch = self.cache.epoch
+
+        doc = Document()
+        doc.root = SB("Terms", label="modified terms")
+        doc.save("terms1.yml")
+        st = os.stat("terms1.yml")
+        os.utime("terms1.yml", (st.st_atime, st.st_mtime + 10))
+
+        doc2 = self.cache.get_document("terms1.yml")
+        self.assertIsNot(doc1, doc2)
+        self.assertEqual(doc2.root.label, "modified terms")
+        self.assertEqual(self.cache.stats(), CacheStats(1, 2, 1, 2))
+        self.assertEqual(self.cache.epoch, epoch + 1)
+
+    def test_lru_eviction(self):
+        self.cache.get_document("terms1.yml")
+        self.cache.get_document("terms2.yml")
+        self.cache.get_document("terms1.yml")
+        self.cache.get_document("terms3.yml")
+
+        self.assertIn("terms1.yml", self.cache)
+        self.assertNotIn("terms2.yml", self.cache)
+        self.assertIn("terms3.yml", self.cache)
+
+        self.cache.max_size = 1
+        self.assertEqual(len(self.cache), 1)
+        self.assertIn("terms3.yml", self.cache)
+
+    def test_invalidate(self):
+        self.cache.get_document("terms1.yml")
+        self.cache.get_document("terms2.yml")
+
+        self.cache.invalidate("terms1.yml")
+        self.assertNotIn("terms1.yml", self.cache)
+        self.assertIn("terms2.yml", self.cache)
+
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_shared_namespace_documents(self):
+        NAMESPACE_CACHE.invalidate()
+        doc1 = Document()
+        doc1.namespaces.set("t", "terms1.yml")
+        doc2 = Document()
+        doc2.namespaces.set("t", "terms1.yml")
+
+        ns_doc = doc1.namespaces["t"].get_document()
+        self.assertIs(ns_doc, doc2.namespaces["t"].get_document())
+        self.assertIs(ns_doc, doc1.namespaces["t"].copy().get_document())
+        NAMESPACE_CACHE.invalidate()
@@ -10,6 +10,7 @@
 
 import os
 import io
+import yaml
 import unittest
 import datetime as dt
 from uuid import uuid4
@@ -183,3 +184,370 @@ class TestDocumentLinks(unittest.TestCase):
         def set_age():
             link["age"] = 1
         self.assertRaises(RuntimeError, set_age)
+
+
+class TestNamespacePrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.files = ("main.yml", "terms_a.yml", "terms_b.yml", "terms_c.yml")
+        graph = {
+            "main.yml": {"a": "terms_a.yml", "b": "terms_b.yml"},
+            "terms_a.yml": {"c": "terms_c.yml"},
+            "terms_b.yml": {"c": "terms_c.yml", "m": "main.yml"},
+            "terms_c.yml": {"x": "missing.yml"}
+        }
+        for path in self.files:
+            doc = Document()
+            doc.root = SB("Terms", label=path)
+            for prefix, uri in graph[path].items():
+                doc.namespaces.set(prefix, uri)
+            doc.save(path)
+        NAMESPACE_CACHE.invalidate()
+
+    def tearDown(self):
+        for path in self.files:
+            os.remove(path)
+        NAMESPACE_CACHE.invalidate()
+
+    def test_prefetch_namespaces(self):
+        doc = Document()
+        report = doc.load("main.yml", prefetch_namespaces=True)
+
+        loaded = {os.path.abspath(p) for p in ("terms_a.yml", "terms_b.yml", "terms_c.yml", "missing.yml")}
+        self.assertEqual(set(report.timings), loaded)
+        self.assertTrue(all(t >= 0 for t in report.timings.values()))
+        self.assertEqual(list(report.errors), [os.path.abspath("missing.yml")])
+
+        main, terms_b = os.path.abspath("main.yml"), os.path.abspath("terms_b.yml")
+        self.assertEqual(report.cycles, [(main, terms_b, main)])
+
+        NAMESPACE_CACHE.reset_stats()
+        self.assertEqual(doc.namespaces["a"].get_document().root.label, "terms_a.yml")
+        self.assertEqual(NAMESPACE_CACHE.stats().misses, 0)
+
+    def test_prefetch_without_location(self):
+        doc = Document()
+        self.assertEqual(doc.prefetch_namespaces(), PrefetchReport({}, [], {}))
+
+        doc.namespaces.set("c", "terms_c.yml")
+        report = doc.prefetch_namespaces(max_workers=1)
+        self.assertEqual(len(report.timings), 2)
+        self.assertEqual(report.cycles, [])
+        self.assertIsNone(doc.load("terms_a.yml"))
+
+
+class TestNamespaceIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.files = ("terms_a.yml", "terms_b.yml")
+        self.roots = {}
+        for path in self.files:
+            doc = Document()
+            doc.root = SB("Terms", label=path, items=[SB("Item"), SB("Item")])
+            doc.save(path)
+            self.roots[path] = doc.root
+        NAMESPACE_CACHE.invalidate()
+
+        self.doc = Document()
+        self.doc.root = SB("Experiment")
+        self.doc.namespaces.set("a", "terms_a.yml")
+
+    def tearDown(self):
+        for path in self.files:
+            os.remove(path)
+        NAMESPACE_CACHE.invalidate()
+
+    def test_find_section_and_prefix(self):
+        item_a = self.roots["terms_a.yml"]["items"][1]
+        item_b = self.roots["terms_b.yml"]["items"][0]
+
+        section, prefix = self.doc.find_section_and_prefix(item_a.uuid, search_namespaces=True)
+        self.assertEqual(section.uuid, item_a.uuid)
+        self.assertEqual(prefix, "a")
+        self.assertEqual(self.doc.find_section_and_prefix(item_a.uuid), (None, None))
+        self.assertEqual(self.doc.find_section_and_prefix(item_b.uuid, True), (None, None))
+
+        self.doc.namespaces.set("b", "terms_b.yml")
+        section, prefix = self.doc.find_section_and_prefix(item_b.uuid, search_namespaces=True)
+        self.assertEqual(section.uuid, item_b.uuid)
+        self.assertEqual(prefix, "b")
+
+        section, prefix = self.doc.find_section_and_prefix("b:" + item_b.uuid, search_namespaces=True)
+        self.assertEqual(prefix, "b")
+        self.assertEqual(self.doc.find_section_and_prefix("a:" + item_b.uuid, True), (None, None))
+
+        del self.doc.namespaces["a"]
+        self.assertEqual(self.doc.find_section_and_prefix(item_a.uuid, True), (None, None))
+
+    def test_back_end_changes(self):
+        item_b = self.roots["terms_b.yml"]["items"][0]
+        self.assertEqual(self.doc.find_section_and_prefix(item_b.uuid, True), (None, None))
+        # namespaces set directly in the back-end are seen as well
+        self.doc.back_end.namespaces.set("b", "terms_b.yml")
+        self.assertEqual(self.doc.find_section_and_prefix(item_b.uuid, True)[1], "b")
+
+        # the index follows documents reloaded by the cache
+        ns_doc = NAMESPACE_CACHE.get_document("terms_b.yml")
+        NAMESPACE_CACHE.invalidate("terms_b.yml")
+        section, prefix = self.doc.find_section_and_prefix(item_b.uuid, True)
+        self.assertEqual(prefix, "b")
+        self.assertIsNot(section.document, ns_doc)
+        self.assertIs(section.document, NAMESPACE_CACHE.get_document("terms_b.yml"))
+
+    def test_lookup_without_io(self):
+        self.doc.namespaces.set("b", "terms_b.yml")
+        item_b = self.roots["terms_b.yml"]["items"][0]
+        self.doc.find_section_and_prefix(item_b.uuid, True)
+        NAMESPACE_CACHE.reset_stats()
+        for _ in range(100):
+            self.assertEqual(self.doc.find_section_and_prefix(item_b.uuid, True)[1], "b")
+            self.assertEqual(self.doc.find_section_and_prefix(str(uuid4()), True), (None, None))
+        # no revalidation of the linked documents
+        self.assertEqual(NAMESPACE_CACHE.stats()[:2], (0, 0))
+
+
+class TestInferTerminology(unittest.TestCase):
+
+    def setUp(self):
+        terms = Document()
+        terms.type_definitions["Subject"] = TypeDef("Subject")
+        terms.property_definitions["note"] = PropertyDef("note", types={"string"})
+        terms.root = SB("Subject", label="subject")
+        terms.save("terms.yml")
+        self.subject = terms.root
+        NAMESPACE_CACHE.invalidate()
+
+    def tearDown(self):
+        os.remove("terms.yml")
+        NAMESPACE_CACHE.invalidate()
+
+    def build(self, strategy, prefixed=True):
+        doc = Document(strategy=strategy)
+        doc.namespaces.set("t", "terms.yml")
+        doc.root = SB(
+            "Session",
+            label="session",
+            date=dt.date(2015, 1, 1),
+            trials=[SB("Trial", index=1, stimulus=SB("Stimulus", width="1ms")), SB("Trial", name="b")]
+        )
+        if prefixed:
+            doc.root["subjects"] = SB("t:Subject")
+            doc.root["t:note"] = "ok"
+            doc.root["subject"] = self.subject
+        return doc
+
+    def test_infer_terminology(self):
+        expected = self.build(TerminologyStrategy.Create, prefixed=False)
+        doc = self.build(TerminologyStrategy.Ignore, prefixed=False)
+        self.assertEqual(len(doc.type_definitions), 0)
+        self.assertEqual(len(doc.property_definitions), 0)
+
+        doc.infer_terminology()
+        self.assertEqual(set(doc.type_definitions), set(expected.type_definitions))
+        for name in expected.type_definitions:
+            self.assertEqual(doc.type_definitions[name].properties, expected.type_definitions[name].properties)
+        self.assertEqual(set(doc.property_definitions), set(expected.property_definitions))
+        for name in expected.property_definitions:
+            self.assertEqual(doc.property_definitions[name].types, expected.property_definitions[name].types)
+
+    def test_infer_prefixed_names(self):
+        doc = self.build(TerminologyStrategy.Ignore)
+        doc.infer_terminology()
+
+        self.assertEqual(set(doc.type_definitions), {"Session", "Trial", "Stimulus", "Subject"})
+        self.assertEqual(doc.type_definitions["Session"].properties,
+                         {"date", "trials", "subjects", "note", "subject"})
+        self.assertNotIn("note", doc.property_definitions)
+        self.assertEqual(doc.property_definitions["subjects"].types, {"Subject"})
+        self.assertEqual(doc.property_definitions["subject"].types, {"Subject"})
+
+        doc.terminology_strategy = TerminologyStrategy.Strict
+        doc.root["trials"][0]["stimulus"]["width"] = "2ms"
+        doc.root["t:note"] = "still ok"
+        doc.root["subjects"] = SB("t:Subject")
+
+    def test_extend_definitions(self):
+        doc = self.build(TerminologyStrategy.Ignore)
+        doc.type_definitions["Trial"] = TypeDef("Trial", definition="A trial", properties={"duration"})
+        doc.property_definitions["index"] = PropertyDef("index", types={"int"})
+
+        doc.infer_terminology()
+        self.assertEqual(doc.type_definitions["Trial"].definition, "A trial")
+        self.assertEqual(doc.type_definitions["Trial"].properties, {"duration", "index", "name", "stimulus"})
+        self.assertEqual(doc.property_definitions["index"].types, {"int", "float"})
+
+
+class TestTrustedLoad(unittest.TestCase):
+
+    def setUp(self):
+        doc = Document()
+        doc.namespaces.set("t", "terms.yml")
+        doc.type_definitions["Session"] = TypeDef("Session", properties={"duration", "trials"})
+        doc.property_definitions["duration"] = PropertyDef("duration", types={"float"})
+        doc.root = SB("Session", label="session", duration=Value(1.5, "s", 0.1),
+                      trials=[SB("Trial", index=1, date=dt.date(2015, 1, 1))])
+        doc.save("trusted.yml")
+        self.doc = doc
+
+    def tearDown(self):
+        os.remove("trusted.yml")
+
+    def test_load_trusted(self):
+        doc = Document()
+        doc.load("trusted.yml", trusted=True)
+        self.assertEqual(doc.back_end.to_dict(), self.doc.back_end.to_dict())
+        duration = doc.back_end.sections[doc.root.uuid].value_properties["duration"]
+        self.assertEqual(duration, Value(1.5, "s", 0.1))
+        self.assertEqual(doc.namespaces["t"].uri, "terms.yml")
+        self.assertEqual(doc.type_definitions["Session"].properties, {"duration", "trials"})
+        doc.validate()
+
+        doc = Document()
+        with io.open("trusted.yml", "r", encoding="utf-8") as f:
+            doc.load(f, trusted=True)
+        self.assertEqual(doc.back_end.to_dict(), self.doc.back_end.to_dict())
+
+    def test_validate(self):
+        with io.open("trusted.yml", "r", encoding="utf-8") as f:
+            content = f.read()
+        with io.open("trusted.yml", "w", encoding="utf-8") as f:
+            f.write(content.replace("t: terms.yml", "not valid: terms.yml"))
+
+        self.assertRaises(ValueError, Document().load, "trusted.yml")
+        doc = Document()
+        doc.load("trusted.yml", trusted=True)
+        self.assertRaises(ValueError, doc.validate)
+
+        del doc.namespaces["not valid"]
+        doc.validate()
+        doc.terminology_strategy = TerminologyStrategy.Strict
+        self.assertRaises(TerminologyError, doc.validate)
+
+    def test_null_values(self):
+        with io.open("trusted.yml", "r", encoding="utf-8") as f:
+            content = f.read()
+        content = content.replace("label: session", "label: session\n  empty: null")
+        with io.open("trusted.yml", "w", encoding="utf-8") as f:
+            f.write(content)
+
+        for trusted in (False, True):
+            self.assertRaises(ValueError, Document().load, "trusted.yml", trusted=trusted)
+            self.assertRaises(ValueError, Document().back_end.from_dict, yaml.safe_load(content), trusted)
+
+
+class TestFindSections(unittest.TestCase):
+
+    BACK_END = "yaml"
+
+    def setUp(self):
+        self.doc = Document(back_end=self.BACK_END)
+        self.doc.root = SB("Session", label="session", trials=[
+            SB("Trial", label="first", index=1, stimulus=SB("Stimulus")),
+            SB("Trial", label="second", index=2),
+            SB("Trial", label="third")
+        ])
+        self.trials = self.doc.root["trials"]
+
+    def find(self, **kwargs):
+        return set(s.uuid for s in self.doc.find_sections(**kwargs))
+
+    def test_find(self):
+        first, second, third = (s.uuid for s in self.trials)
+        self.assertEqual(self.find(type="Trial"), {first, second, third})
+        self.assertEqual(self.find(label="second"), {second})
+        self.assertEqual(self.find(has_property="index"), {first, second})
+        self.assertEqual(self.find(has_property="stimulus"), {first})
+        self.assertEqual(self.find(type="Trial", has_property="index", label="first"), {first})
+        self.assertEqual(self.find(type="Stimulus", label="first"), set())
+        self.assertEqual(self.find(type="Unknown"), set())
+        self.assertEqual(len(self.find()), 5)
+
+    def test_changes(self):
+        first, second, third = self.trials
+        self.find(type="Trial", label="first", has_property="index")
+
+        second.type = "Control"
+        second.label = "control"
+        third["index"] = 3
+        del first["index"]
+        self.assertEqual(self.find(type="Trial"), {first.uuid, third.uuid})
+        self.assertEqual(self.find(type="Control"), {second.uuid})
+        self.assertEqual(self.find(label="second"), set())
+        self.assertEqual(self.find(label="control"), {second.uuid})
+        self.assertEqual(self.find(has_property="index"), {second.uuid, third.uuid})
+
+        first["stimulus"] = 10
+        self.assertEqual(self.find(has_property="stimulus"), {first.uuid})
+        self.assertEqual(self.find(type="Stimulus"), set())
+
+        del self.doc.root["trials"]
+        self.assertEqual(self.find(type="Trial"), set())
+        self.assertEqual(self.find(has_property="index"), set())
+        self.doc.root["trials"] = SB("Trial", label="first")
+        self.assertEqual(self.find(label="first"), {self.doc.root["trials"].uuid})
+
+
+class TestFindSectionsSqlite(TestFindSections):
+
+    BACK_END = "sqlite"
+
+
+class TestValueIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = Document()
+        self.doc.root = SB("Session", date=dt.date(2015, 1, 1), trials=[
+            SB("Trial", label="t%d" % i, duration=Value(float(i), "s")) for i in range(10)
+        ] + [SB("Trial", label="text", duration="unknown"), SB("Trial", label="none")])
+        self.index = self.doc.create_value_index("Trial", "duration")
+
+    def labels(self, sections):
+        return [s.label for s in sections]
+
+    def test_queries(self):
+        self.assertEqual(len(self.index), 11)
+        self.assertEqual(self.labels(self.index.range(2, 5)), ["t2", "t3", "t4", "t5"])
+        self.assertEqual(self.labels(self.index.range(2, 5, inclusive=(False, False))), ["t3", "t4"])
+        self.assertEqual(self.labels(self.index.range(maximum=Value(1.0, "s"))), ["t0", "t1"])
+        self.assertEqual(self.labels(self.index.range(minimum=8)), ["t8", "t9"])
+        self.assertEqual(self.labels(self.index.range(minimum="a")), ["text"])
+        self.assertEqual(len(self.index.range()), 11)
+        self.assertEqual(self.labels(self.index.equal(3)), ["t3"])
+        self.assertEqual(self.labels(self.index.equal(3.5)), [])
+        self.assertEqual(self.labels(self.index.top(2)), ["text", "t9"])
+        self.assertEqual(self.labels(self.index.top(2, largest=False)), ["t0", "t1"])
+        self.assertRaises(ValueError, self.index.range, 1, "b")
+
+        date_index = self.doc.create_value_index("Session", "date")
+        self.assertEqual(len(date_index.range(minimum=dt.date(2014, 12, 31))), 1)
+        self.assertEqual(self.doc.create_value_index("Trial", "duration").prop, "duration")
+
+    def test_changes(self):
+        trials = self.doc.root["trials"]
+        trials[0]["duration"] = 20.0
+        del trials[1]["duration"]
+        trials[11]["duration"] = 2.5
+        self.assertEqual(self.labels(self.index.range(2, 5)), ["t2", "none", "t3", "t4", "t5"])
+        self.assertEqual(self.labels(self.index.top(1, largest=False)), ["t2"])
+        self.assertEqual(self.labels(self.index.top(1)), ["text"])
+        self.assertEqual(self.labels(self.index.range(minimum=10)), ["t0"])
+
+        trials[2].type = "Control"
+        self.assertEqual(self.labels(self.index.equal(2)), [])
+        trials[2].type = "Trial"
+        self.assertEqual(self.labels(self.index.equal(2)), ["t2"])
+
+        trials[3]["duration"] = SB("Duration")
+        self.assertEqual(self.labels(self.index.equal(3)), [])
+        del self.doc.root["trials"]
+        self.assertEqual(len(self.index), 0)
+        self.doc.root["trials"] = SB("Trial", duration=1.0)
+        self.assertEqual(len(self.index.equal(1)), 1)
+
+        self.doc.drop_value_index("Trial", "duration")
+        self.doc.root["trials"] = SB("Trial", duration=1.0)
+        self.assertEqual(len(self.index), 0)
+
+    def test_sqlite(self):
+        doc = Document(back_end="sqlite")
+        self.assertRaises(NotImplementedError, doc.create_value_index, "Trial", "duration")
@@ -0,0 +1,179 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+import io
+import shutil
+import tempfile
+import unittest
+import threading
+# noinspection PyUnresolvedReferences
+from six.moves import BaseHTTPServer
+
+from odml2 import *
+from odml2 import fetch
+
+
+class TermsHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    documents = {}
+    requests = []
+    failures = 0
+
+    # noinspection PyPep8Naming
+    def do_GET(self):
+        cls = type(self)
+        cls.requests.append((self.path, self.headers.get("If-None-Match")))
+        if cls.failures > 0:
+            cls.failures -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.path not in cls.documents:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        etag, content_type, body = cls.documents[self.path]
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpFetcher(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), TermsHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        cls.url = "http://127.0.0.1:%d" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.fetcher = HttpFetcher(cache_dir=self.cache_dir, timeout=5, retries=2, backoff=0)
+        self.default_fetcher = fetch.FETCHER
+        fetch.FETCHER = self.fetcher
+
+        doc = Document()
+        doc.root = SB("Terms", label=u"Ωhm terms")
+        TermsHandler.documents = {
+            "/terms.yml": ('"v1"', "text/yaml; charset=utf-8", self.__dump(doc)),
+            "/plain.yml": (None, "application/octet-stream", self.__dump(doc))
+        }
+        TermsHandler.requests = []
+        TermsHandler.failures = 0
+
+    def tearDown(self):
+        fetch.FETCHER = self.default_fetcher
+        self.fetcher.close()
+        shutil.rmtree(self.cache_dir)
+
+    @staticmethod
+    def __dump(doc):
+        buffer = io.StringIO()
+        doc.save(buffer)
+        return buffer.getvalue().encode("utf-8")
+
+    def test_conditional_fetch(self):
+        r1 = self.fetcher.fetch(self.url + "/terms.yml")
+        self.assertFalse(r1.from_cache)
+        self.assertEqual(r1.etag, '"v1"')
+        self.assertEqual(r1.content_type, "text/yaml")
+        self.assertEqual(r1.encoding, "utf-8")
+
+        r2 = self.fetcher.fetch(self.url + "/terms.yml")
+        self.assertTrue(r2.from_cache)
+        self.assertEqual(r1.content, r2.content)
+        self.assertEqual(TermsHandler.requests, [("/terms.yml", None), ("/terms.yml", '"v1"')])
+
+        etag, content_type, body = TermsHandler.documents["/terms.yml"]
+        TermsHandler.documents["/terms.yml"] = ('"v2"', content_type, body + b"\n")
+        r3 = self.fetcher.fetch(self.url + "/terms.yml")
+        self.assertFalse(r3.from_cache)
+        self.assertEqual(r3.etag, '"v2"')
+
+    def test_invalidate(self):
+        self.fetcher.fetch(self.url + "/terms.yml")
+        self.fetcher.invalidate(self.url + "/terms.yml")
+        self.assertFalse(self.fetcher.fetch(self.url + "/terms.yml").from_cache)
+        self.fetcher.invalidate()
+        self.assertFalse(self.fetcher.fetch(self.url + "/terms.yml").from_cache)
+
+    def test_retries(self):
+        TermsHandler.failures = 2
+        result = self.fetcher.fetch(self.url + "/terms.yml")
+        self.assertFalse(result.from_cache)
+        self.assertEqual(len(TermsHandler.requests), 3)
+
+        TermsHandler.failures = 3
+        self.assertRaises(Exception, self.fetcher.fetch, self.url + "/terms.yml")
+
+    def test_not_found(self):
+        self.assertRaises(Exception, self.fetcher.fetch, self.url + "/missing.yml")
+
+    def test_load_document(self):
+        doc = Document()
+        doc.load(self.url + "/terms.yml")
+        self.assertEqual(doc.root.label, u"Ωhm terms")
+        self.assertEqual(doc.location, self.url + "/terms.yml")
+
+        doc = Document()
+        doc.load(self.url + "/plain.yml")
+        self.assertEqual(doc.root.label, u"Ωhm terms")
+
+    def test_namespace_document(self):
+        NAMESPACE_CACHE.invalidate()
+        NAMESPACE_CACHE.reset_stats()
+        doc1 = Document()
+        doc1.namespaces.set("t", self.url + "/terms.yml")
+        doc2 = Document()
+        doc2.namespaces.set("t", self.url + "/terms.yml")
+
+        ns_doc = doc1.namespaces["t"].get_document()
+        self.assertEqual(ns_doc.root.label, u"Ωhm terms")
+        self.assertIs(ns_doc, doc2.namespaces["t"].get_document())
+        self.assertEqual(NAMESPACE_CACHE.stats().hits, 1)
+        # one download and one revalidation
+        self.assertEqual(TermsHandler.requests, [("/terms.yml", None), ("/terms.yml", '"v1"')])
+
+        # documents without ETag or Last-Modified are never hits, but downloaded only once per access
+        TermsHandler.requests = []
+        cache = DocumentCache()
+        cache.get_document(self.url + "/plain.yml")
+        cache.get_document(self.url + "/plain.yml")
+        self.assertEqual(cache.stats().hits, 0)
+        self.assertEqual(TermsHandler.requests, [("/plain.yml", None)] * 2)
+        NAMESPACE_CACHE.invalidate()
+
+    def test_fetch_with_copy(self):
+        fetcher = HttpFetcher()
+        self.assertIsNone(fetcher.cache_dir)
+        # the default fetcher doesn't write to the disk
+        self.assertIsNone(self.default_fetcher.cache_dir)
+        self.assertIsNone(fetcher.fetch(self.url + "/terms.yml", etag='"v1"'))
+        self.assertFalse(fetcher.fetch(self.url + "/terms.yml", etag='"v0"').from_cache)
+        fetcher.close()
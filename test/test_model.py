@@ -10,19 +10,27 @@
 
 import six
 import unittest
+import datetime as dt
 from uuid import uuid4
 
 from odml2.api import yml
 from odml2 import *
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class TestSection(unittest.TestCase):
 
+    BACK_END = yml.YamlDocument
+
     def setUp(self):
         # populate a backend to provide a section with subsections
         id_1, id_11, id_111, id_112 = tuple(str(uuid4()) for _ in range(4))
 
-        be = yml.YamlDocument()
+        be = self.BACK_END()
 
         be.create_root("type", id_1, "root", "./example.dat")
         sec = be.sections[id_1]
@@ -36,7 +44,7 @@ class TestSection(unittest.TestCase):
 
         # populate a back end to provide an empty section
         self.empty_id = str(uuid4())
-        be = yml.YamlDocument()
+        be = self.BACK_END()
         be.create_root("type", self.empty_id, "root", "./example.dat")
         self.empty = Section(self.empty_id, Document(be))
 
@@ -109,6 +117,77 @@ class TestSection(unittest.TestCase):
         del self.sec["prop_11"]
         self.assertEqual([p for p in self.sec], [])
 
+    def test_handles(self):
+        child = self.sec["prop_11"]
+        self.assertIs(self.sec["prop_11"], child)
+        self.assertIs(child.document.root, child.document.root)
+        grandchild = child["prop_111"]
+        self.assertEqual(grandchild.type, "type")
+
+        del child["prop_111"]
+        self.assertRaises(KeyError, lambda: grandchild.type)
+        del self.sec["prop_11"]
+        self.assertRaises(KeyError, lambda: child.type)
+
+        self.sec["prop_11"] = SB("other_type", uuid=child.uuid)
+        self.assertEqual(child.type, "other_type")
+
+        # removal through the back-end also invalidates held handles
+        del self.sec.document.back_end.sections[child.uuid]
+        self.assertRaises(KeyError, lambda: child.type)
+
+        def set_prop():
+            child["y"] = 2
+        self.assertRaises(KeyError, set_prop)
+
+    def test_extend_from_records(self):
+        uuids = [str(uuid4()) for _ in range(3)]
+        rows = [{"id": uuid, "index": i, "duration": "%d.5 s" % i, "note": None if i == 1 else "ok"}
+                for i, uuid in enumerate(uuids)]
+        self.empty.extend_from_records("trials", "Trial", iter(rows), uuid_field="id")
+        trials = self.empty.get("trials")
+        self.assertEqual([t.uuid for t in trials], uuids)
+        self.assertEqual([t["index"] for t in trials], [0, 1, 2])
+        self.assertEqual(trials[2].get("duration"), Value(2.5, "s"))
+        self.assertEqual(sorted(trials[1].keys()), ["duration", "index"])
+        self.assertEqual(trials[0].type, "Trial")
+
+        self.empty.extend_from_records("trials", "Trial", {"index": [3, 4], "valid": [True, False]})
+        trials = self.empty.get("trials")
+        self.assertEqual(len(trials), 5)
+        self.assertEqual([t["index"] for t in trials[3:]], [3, 4])
+        self.assertEqual([t["valid"] for t in trials[3:]], [True, False])
+
+        self.assertRaises(ValueError, lambda: self.empty.extend_from_records("x", "T", {"a": [1], "b": [1, 2]}))
+        self.assertRaises(ValueError, lambda: self.empty.extend_from_records("x", "T", [{"a": 1}, {"b": 1}]))
+        self.assertRaises(ValueError, lambda: self.empty.extend_from_records("x", "T", [{"a": 1}], "id"))
+        self.assertEqual(len(self.empty.get("trials")), 5)
+        self.assertNotIn("x", self.empty)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_extend_from_structured_array(self):
+        records = numpy.array([(1, 0.5, True), (2, 0.75, False)],
+                              dtype=[("index", "i8"), ("duration", "f8"), ("valid", "?")])
+        self.empty.extend_from_records("trials", "Trial", records)
+        trials = self.empty.get("trials")
+        self.assertEqual([t["index"] for t in trials], [1, 2])
+        self.assertEqual([t["duration"] for t in trials], [0.5, 0.75])
+        self.assertEqual([t["valid"] for t in trials], [True, False])
+        self.assertIs(type(trials[0]["index"]), int)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_value_array(self):
+        spikes = numpy.array([0.012, 0.107, 0.113])
+        self.empty["spikes"] = ValueArray(spikes, "s", numpy.full(3, 0.001))
+        self.empty["counts"] = numpy.array([3, 1, 2])
+        value = self.empty.get("spikes")
+        self.assertEqual(value.type, "array")
+        self.assertEqual(value.unit, "s")
+        self.assertTrue(numpy.array_equal(self.empty["spikes"], spikes))
+        self.assertTrue(numpy.array_equal(value.uncertainty, numpy.full(3, 0.001)))
+        self.assertEqual(self.empty.get("counts"), ValueArray([3, 1, 2]))
+        self.assertEqual(self.empty.get("counts").value.dtype.kind, "i")
+
     def test_eq(self):
         self.assertTrue(self.sec == self.sec)
         self.assertFalse(self.sec != self.sec)
@@ -172,6 +251,25 @@ class TestValue(unittest.TestCase):
         self.assertEqual(v.unit, u"kmol")
         self.assertIsNone(v.uncertainty)
 
+    def test_value_from_obj_cache(self):
+        text = "".join(["5", "+-0.001s"])
+        v = Value.from_obj(text)
+        self.assertEqual(v, Value(5, "s", 0.001))
+        self.assertIs(Value.from_obj(text), v)
+        self.assertIs(Value._from_trusted_obj("".join(["5", "+-0.001s"])), v)
+        for i in range(2000):
+            Value.from_obj("%d mV" % i)
+        self.assertIsNot(Value.from_obj(text), v)
+        self.assertEqual(Value.from_obj(text), v)
+        for text in ("", "+", "-.", "1e3", "3 apples", "x10"):
+            self.assertEqual(Value.from_obj(text), Value(text))
+
+    def test_type(self):
+        self.assertEqual(Value("foo").type, "string")
+        self.assertEqual(Value(dt.time(10, 30)).type, "time")
+        self.assertEqual(Value.from_obj("10 mV").type, Value(10.0).type)
+        self.assertEqual(Value._unchecked("foo").type, "string")
+
     def test_eq(self):
         self.assertEqual(Value("foo"), Value("foo"))
         self.assertEqual(Value(10, "mV"), Value(10.0, "mV"))
@@ -192,6 +290,47 @@ class TestValue(unittest.TestCase):
             self.assertEqual(str(v1), "1±0.1mV")
 
 
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestValueArray(unittest.TestCase):
+
+    def setUp(self):
+        self.values = numpy.array([1.5, 2.5, 3.5, 4.5])
+        self.array = ValueArray(self.values, "mV", [0.1, 0.2, 0.3, 0.4])
+
+    def test_init(self):
+        self.assertEqual(len(self.array), 4)
+        self.assertEqual(self.array.unit, "mV")
+        self.assertEqual(self.array.type, "array")
+        self.assertIsNone(ValueArray([1, 2]).uncertainty)
+        self.assertRaises(ValueError, lambda: ValueArray(["a", "b"]))
+        self.assertRaises(ValueError, lambda: ValueArray(numpy.zeros((2, 2))))
+        self.assertRaises(ValueError, lambda: ValueArray([1, 2], unit=1))
+        self.assertRaises(ValueError, lambda: ValueArray([1, 2], uncertainty=[0.1]))
+        self.assertIs(Value.from_obj(self.array), self.array)
+        self.assertEqual(Value.from_obj(self.values), ValueArray(self.values))
+
+    def test_no_copy(self):
+        self.assertTrue(numpy.shares_memory(self.array.value, self.values))
+        self.assertFalse(self.array.value.flags.writeable)
+        self.assertTrue(self.values.flags.writeable)
+        part = self.array[1:3]
+        self.assertTrue(numpy.shares_memory(part.value, self.values))
+        self.assertEqual(part, ValueArray([2.5, 3.5], "mV", [0.2, 0.3]))
+
+    def test_elements(self):
+        self.assertEqual(self.array[1], Value(2.5, "mV", 0.2))
+        self.assertIs(type(self.array[1].value), float)
+        self.assertEqual(list(ValueArray([True, False])), [Value(True), Value(False)])
+        self.assertEqual(list(self.array)[-1], Value(4.5, "mV", 0.4))
+
+    def test_eq(self):
+        self.assertEqual(self.array, self.array.copy())
+        self.assertNotEqual(self.array, self.array.copy(unit="V"))
+        self.assertNotEqual(self.array, ValueArray(self.values, "mV"))
+        self.assertNotEqual(self.array, Value(1.5, "mV"))
+        self.assertNotEqual(Value(1.5, "mV"), self.array)
+
+
 class TestNameSpace(unittest.TestCase):
 
     def setUp(self):
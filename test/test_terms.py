@@ -12,6 +12,7 @@ import os
 import unittest
 
 from odml2 import *
+from odml2.terms import DeferredValidation
 
 
 class TestStrictStrategy(unittest.TestCase):
@@ -58,6 +59,75 @@ class TestStrictStrategy(unittest.TestCase):
         self.assertRaises(ValueError, lambda: ts.handle_triple(self.doc, "Experiment", "terms:date", "date"))
         self.assertRaises(ValueError, lambda: ts.handle_triple(self.doc, "terms:Bar", "terms:date", "date"))
 
+    def test_local_definition_changes(self):
+        ts = self.doc.terminology_strategy
+        handle = lambda *triple: ts.handle_triple(self.doc, *triple)
+
+        self.assertRaises(ValueError, handle, "Session", "experimenter", "string")
+
+        self.doc.type_definitions["Session"] = TypeDef("Session", properties=("experimenter", "date"))
+        self.assertRaises(ValueError, handle, "Session", "experimenter", "string")
+        self.doc.property_definitions["experimenter"] = PropertyDef("experimenter", types=("string", ))
+        handle("Session", "experimenter", "string")
+        handle("Session", "terms:date", "date")
+        self.assertRaises(ValueError, handle, "Session", "experimenter", "int")
+        self.assertRaises(ValueError, handle, "Session", "experimenter", "not valid:string")
+
+        self.doc.property_definitions["experimenter"] = PropertyDef("experimenter", types=("int", ))
+        handle("Session", "experimenter", "int")
+        self.assertRaises(ValueError, handle, "Session", "experimenter", "string")
+
+        self.doc.type_definitions["Session"] = TypeDef("Session", properties=("date", ))
+        self.assertRaises(ValueError, handle, "Session", "experimenter", "int")
+        handle("Session", "terms:date", "datetime")
+
+        del self.doc.property_definitions["experimenter"]
+        del self.doc.type_definitions["Session"]
+        self.assertRaises(ValueError, handle, "Session", "terms:date", "datetime")
+        self.assertRaises(ValueError, lambda: ts.handle_type(self.doc, "Session"))
+
+    def test_back_end_definition_changes(self):
+        ts = self.doc.terminology_strategy
+        handle = lambda *triple: ts.handle_triple(self.doc, *triple)
+        self.assertRaises(ValueError, handle, "Session", "experimenter", "string")
+
+        self.doc.type_definitions["Session"] = TypeDef("Session", properties=("experimenter", ))
+        self.doc.property_definitions["experimenter"] = PropertyDef("experimenter", types=("string", ))
+        handle("Session", "experimenter", "string")
+
+        # changes which bypass the model wrappers must not leave stale triples behind
+        del self.doc.back_end.property_defs["experimenter"]
+        self.assertRaises(ValueError, handle, "Session", "experimenter", "string")
+        self.doc.back_end.property_defs.set("experimenter", types=("int", ))
+        handle("Session", "experimenter", "int")
+        self.doc.back_end.type_defs.set("Session")
+        self.assertRaises(ValueError, handle, "Session", "experimenter", "int")
+
+    def test_linked_document_changes(self):
+        ts = self.doc.terminology_strategy
+        self.assertRaises(ValueError, lambda: ts.handle_type(self.doc, "terms:Session"))
+
+        self.terms.type_definitions["Session"] = TypeDef("Session")
+        self.terms.save("terms.yml")
+        NAMESPACE_CACHE.invalidate("terms.yml")
+        ts.handle_type(self.doc, "terms:Session")
+
+    def test_namespace_changes(self):
+        ts = self.doc.terminology_strategy
+        ts.handle_type(self.doc, "terms:Experiment")
+        ts.handle_triple(self.doc, "terms:Experiment", "terms:date", "date")
+
+        del self.doc.namespaces["terms"]
+        self.assertRaises(ValueError, lambda: ts.handle_type(self.doc, "terms:Experiment"))
+        self.assertRaises(ValueError, lambda: ts.handle_triple(self.doc, "terms:Experiment", "terms:date", "date"))
+
+        self.doc.namespaces.set("t", "terms.yml")
+        ts.handle_triple(self.doc, "t:Experiment", "t:date", "date")
+
+        self.doc.namespaces.set("missing", "missing.yml")
+        ts.handle_triple(self.doc, "t:Experiment", "t:date", "date")
+        self.assertRaises(IOError, lambda: ts.handle_type(self.doc, "missing:Experiment"))
+
 
 class TestCreateStrategy(unittest.TestCase):
 
@@ -106,3 +176,66 @@ class TestCreateStrategy(unittest.TestCase):
         self.assertTrue("RecordingSession" in self.doc.type_definitions)
         self.assertEqual(len(self.doc.property_definitions), 1)
         self.assertTrue("experimenter" in self.doc.property_definitions)
+
+
+class TestDeferredValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = Document()
+        self.doc.type_definitions["Session"] = TypeDef("Session", properties=("trials", ))
+        self.doc.type_definitions["Trial"] = TypeDef("Trial", properties=("index", ))
+        self.doc.property_definitions["trials"] = PropertyDef("trials", types=("Trial", ))
+        self.doc.property_definitions["index"] = PropertyDef("index", types=("int", "float"))
+        self.doc.terminology_strategy = TerminologyStrategy.Strict
+        self.doc.root = SB("Session")
+
+    def test_deferred_validation(self):
+        calls = []
+        strict = TerminologyStrategy.Strict.value
+        handle_triple = strict.handle_triple
+        strict.handle_triple = lambda *args: calls.append(args[1:]) or handle_triple(*args)
+        try:
+            with self.doc.deferred_validation():
+                self.assertIsInstance(self.doc.terminology_strategy, DeferredValidation)
+                for i in range(10):
+                    self.doc.root["trials"] = [SB("Trial", index=i) for _ in range(3)]
+                self.assertEqual(calls, [])
+        finally:
+            del strict.handle_triple
+
+        self.assertIs(self.doc.terminology_strategy, TerminologyStrategy.Strict)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(self.doc.root["trials"]), 3)
+
+    def test_error_report(self):
+        def ingest():
+            with self.doc.deferred_validation():
+                self.doc.root["trials"] = [SB("Trial", index=1, name="a"), SB("Trial", name="b")]
+                self.doc.root["subjects"] = SB("Subject")
+                self.doc.root["date"] = 1
+
+        try:
+            ingest()
+            self.fail("TerminologyError expected")
+        except TerminologyError as e:
+            items = [item for item, _ in e.errors]
+            self.assertEqual(items, [("Trial", "name", "string"), ("Session", "subjects", "Subject"),
+                                     ("Session", "date", "float")])
+            self.assertTrue(str(e).startswith("3 terminology violation(s):"))
+        self.assertIs(self.doc.terminology_strategy, TerminologyStrategy.Strict)
+        self.assertIn("subjects", self.doc.root)
+
+    def test_nested_and_exceptions(self):
+        with self.doc.deferred_validation() as outer:
+            with self.doc.deferred_validation() as inner:
+                self.assertIs(outer, inner)
+                self.doc.root["trials"] = SB("Trial", index=1)
+            self.assertIs(self.doc.terminology_strategy, outer)
+        self.assertIs(self.doc.terminology_strategy, TerminologyStrategy.Strict)
+
+        def fail():
+            with self.doc.deferred_validation():
+                self.doc.root["bar"] = 1
+                raise KeyError("bar")
+        self.assertRaises(KeyError, fail)
+        self.assertIs(self.doc.terminology_strategy, TerminologyStrategy.Strict)
@@ -0,0 +1,108 @@
+# coding=UTF-8
+
+# Copyright (c) 2015, Adrian Stoewer (adrian.stoewer@rz.ifi.lmu.de)
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted under the terms of the BSD License. See
+# LICENSE file in the root of the project.
+
+import unittest
+
+from odml2 import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestUnitRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.units = UnitRegistry()
+        self.units.define("s")
+        self.units.define("m")
+        self.units.define("min", "s", 60, prefixes=False)
+
+    def test_define(self):
+        self.assertIn("s", self.units)
+        self.assertIn("ms", self.units)
+        self.assertIn(u"µs", self.units)
+        self.assertIn(u"μs", self.units)
+        self.assertIn("mm", self.units)
+        self.assertNotIn("kmin", self.units)
+        self.assertEqual(self.units.get("min"), ("s", 60.0))
+        self.assertEqual(self.units.get("ks"), ("s", 1000.0))
+        self.assertRaises(ValueError, lambda: self.units.get("V"))
+        self.assertRaises(ValueError, lambda: self.units.define("h", "V", 3600))
+
+    def test_factor(self):
+        self.assertEqual(self.units.factor("min", "ms"), 60000.0)
+        self.assertAlmostEqual(self.units.factor(u"μs", "s"), 1e-6)
+        self.assertTrue(self.units.is_convertible("min", "ks"))
+        self.assertFalse(self.units.is_convertible("min", "mm"))
+        self.assertFalse(self.units.is_convertible("min", "V"))
+        self.assertRaises(ValueError, lambda: self.units.factor("min", "mm"))
+        self.assertRaises(ValueError, lambda: self.units.factor("min", "V"))
+
+    def test_si_units(self):
+        self.assertEqual(UNITS.factor("kOhm", u"Ω"), 1000.0)
+        self.assertAlmostEqual(UNITS.factor(u"μΩ", "Ohm"), 1e-6)
+        self.assertEqual(UNITS.factor("h", "min"), 60.0)
+        self.assertEqual(UNITS.factor("kg", "g"), 1000.0)
+        self.assertEqual(UNITS.factor("mol", "mmol"), 1000.0)
+
+
+class TestValueUnits(unittest.TestCase):
+
+    def test_to(self):
+        v = Value(5, "ms", 0.1).to("s")
+        self.assertEqual(v.unit, "s")
+        self.assertAlmostEqual(v.value, 0.005)
+        self.assertAlmostEqual(v.uncertainty, 0.0001)
+        self.assertEqual(Value.from_obj("90 min").to("h"), Value(1.5, "h"))
+        self.assertRaises(ValueError, lambda: Value(5).to("s"))
+        self.assertRaises(ValueError, lambda: Value(5, "ms").to("V"))
+        self.assertRaises(ValueError, lambda: Value(5, "apples").to("s"))
+
+    def test_order(self):
+        self.assertTrue(Value(5, "ms") < Value(1, "s"))
+        self.assertFalse(Value(1, "s") < Value(5, "ms"))
+        self.assertTrue(Value(1, "s") > Value(5, "ms"))
+        self.assertTrue(Value(5, "ms") < Value(6, "ms"))
+        values = [Value(2, "min"), Value(1, "s"), Value(5, "ms")]
+        self.assertEqual([v.unit for v in sorted(values)], ["ms", "s", "min"])
+        self.assertRaises(TypeError, lambda: Value(1, "s") < Value(1, "V"))
+
+    def test_eq(self):
+        self.assertEqual(Value(1000, "ms"), Value(1, "s"))
+        self.assertEqual(Value(3, "ms"), Value(0.003, "s"))
+        self.assertEqual(Value(1, "s", 0.001), Value(1000, "ms", 1))
+        self.assertNotEqual(Value(1, "s", 0.001), Value(1000, "ms"))
+        self.assertNotEqual(Value(1, "s"), Value(1001, "ms"))
+        self.assertNotEqual(Value(1, "s"), Value(1, "V"))
+        self.assertNotEqual(Value(1, "s"), Value(1))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_value_array(self):
+        array = ValueArray([1.0, 2.5], "s", [0.1, 0.2])
+        converted = array.to("ms")
+        self.assertEqual(converted.unit, "ms")
+        self.assertTrue(numpy.allclose(converted.value, [1000.0, 2500.0]))
+        self.assertTrue(numpy.allclose(converted.uncertainty, [100.0, 200.0]))
+        self.assertEqual(array, converted)
+        self.assertNotEqual(array, ValueArray([1.0, 2.5], "ms", [0.1, 0.2]))
+        self.assertNotEqual(array, ValueArray([1.0, 2.5], "V", [0.1, 0.2]))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_convert_many(self):
+        values = [Value(1, "s"), Value(5, "ms"), Value(2, "min"), Value.from_obj(u"3 μs")]
+        converted = convert_many(values, "ms")
+        self.assertEqual(converted.dtype, numpy.float64)
+        self.assertTrue(numpy.allclose(converted, [1000.0, 5.0, 120000.0, 0.003]))
+        self.assertEqual(len(convert_many([], "s")), 0)
+        self.assertTrue(numpy.allclose(convert_many(ValueArray([1, 2], "s"), "ms"), [1000.0, 2000.0]))
+        self.assertRaises(ValueError, lambda: convert_many([Value(1, "s"), Value(1)], "s"))
+        self.assertRaises(ValueError, lambda: convert_many([Value(1, "s"), Value(1, "V")], "s"))